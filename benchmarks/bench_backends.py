@@ -0,0 +1,74 @@
+"""Benchmark the subprocess and pygit2 git backends.
+
+Usage:
+    python benchmarks/bench_backends.py [--files 2000] [--staged 50] [--rounds 200]
+
+Each round runs a full `GitContextCollector.collect` (status + staged diff), which is
+what batch and long-running callers pay per message.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import tempfile
+import time
+
+from smart_git_commit.git_backend import create_git_backend
+from smart_git_commit.git_context import GitContextCollector
+from smart_git_commit.repo import RepoHandle
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _build_repo(repo: Path, *, files: int, staged: int) -> None:
+    repo.mkdir(parents=True)
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "bench@example.com")
+    _git(repo, "config", "user.name", "Bench")
+    for i in range(files):
+        d = repo / f"pkg{i % 20}"
+        d.mkdir(exist_ok=True)
+        (d / f"m{i}.py").write_text("".join(f"line {j}\n" for j in range(40)))
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "chore: seed")
+    for i in range(staged):
+        p = repo / f"pkg{i % 20}" / f"m{i}.py"
+        p.write_text(p.read_text().replace("line 7\n", f"changed {i}\n"))
+    _git(repo, "add", "-A")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--staged", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp) / "repo"
+        _build_repo(repo, files=args.files, staged=args.staged)
+        os.chdir(repo)
+        handle = RepoHandle.discover()
+
+        results: dict[str, str] = {}
+        for name in ("subprocess", "pygit2"):
+            collector = GitContextCollector(
+                repo=handle, backend=create_git_backend(name, handle)
+            )
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                ctx = collector.collect(max_diff_chars=10**9)
+            elapsed = time.perf_counter() - start
+            results[name] = ctx.staged_diff
+            print(f"{name:>10}: {elapsed / args.rounds * 1000:7.2f} ms/collect")
+
+        print("staged diff identical:", results["subprocess"] == results["pygit2"])
+
+
+if __name__ == "__main__":
+    main()
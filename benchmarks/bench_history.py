@@ -0,0 +1,96 @@
+"""Benchmark building and querying the commit history index.
+
+Usage:
+    python benchmarks/bench_history.py [--commits 1000000] [--queries 200]
+
+A synthetic history is generated with `git fast-import` (each commit touches 1-3 files
+out of a few thousand spread over nested directories), then the index is built from
+scratch, updated incrementally after one more commit, and queried.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import subprocess
+import tempfile
+import time
+
+from smart_git_commit.history import HistoryIndex
+from smart_git_commit.repo import RepoHandle
+
+
+_TYPES = ("feat", "fix", "refactor", "docs", "test", "chore")
+
+
+def _path(i: int) -> str:
+    return f"svc{i % 40}/mod{(i // 40) % 25}/file{i}.py"
+
+
+def _fast_import(repo: Path, commits: int, files: int, seed: int, *, append: bool = False) -> None:
+    rng = random.Random(seed)
+    proc = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=repo, stdin=subprocess.PIPE)
+    assert proc.stdin is not None
+    write = proc.stdin.write
+    for n in range(commits):
+        touched = [rng.randrange(files) for _ in range(rng.randint(1, 3))]
+        scope = _path(touched[0]).split("/")[0]
+        msg = f"{rng.choice(_TYPES)}({scope}): change {n}\n".encode()
+        write(b"commit refs/heads/main\n")
+        when = 1_600_000_000 + n + seed * commits
+        write(f"committer Bench <b@example.com> {when} +0000\n".encode())
+        write(b"data %d\n%s\n" % (len(msg), msg))
+        if append and n == 0:
+            write(b"from refs/heads/main^0\n")
+        for i in touched:
+            content = f"{n}\n".encode()
+            write(f"M 100644 inline {_path(i)}\n".encode())
+            write(b"data %d\n%s\n" % (len(content), content))
+    proc.stdin.close()
+    proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_dir = Path(tmp) / "repo"
+        repo_dir.mkdir()
+        subprocess.run(["git", "init", "-q", "-b", "main"], cwd=repo_dir, check=True)
+        t0 = time.perf_counter()
+        _fast_import(repo_dir, args.commits, args.files, seed=1)
+        print(f"generated {args.commits} commits in {time.perf_counter() - t0:.1f}s")
+
+        repo = RepoHandle.discover(repo_dir)
+        with HistoryIndex.for_repo(repo) as index:
+            t0 = time.perf_counter()
+            added = index.update(repo)
+            elapsed = time.perf_counter() - t0
+            print(f"full build: {added} commits in {elapsed:.1f}s ({added / elapsed:,.0f}/s)")
+
+        _fast_import(repo_dir, 1, args.files, seed=2, append=True)
+        repo = RepoHandle.discover(repo_dir)
+        with HistoryIndex.for_repo(repo) as index:
+            t0 = time.perf_counter()
+            added = index.update(repo)
+            print(f"incremental: {added} commit in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+            rng = random.Random(3)
+            queries = [
+                [_path(rng.randrange(args.files)) for _ in range(rng.randint(1, 5))]
+                for _ in range(args.queries)
+            ]
+            t0 = time.perf_counter()
+            for paths in queries:
+                index.similar(paths, limit=3)
+            per_query = (time.perf_counter() - t0) / len(queries) * 1000
+            print(f"query: {per_query:.2f} ms/query (k=3)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark the generation pipeline against a replayed HTTP cassette.
+
+Usage:
+    # Record a cassette from a real provider (needs SGC_API_KEY etc.), then replay it:
+    SGC_CASSETTE=run.json SGC_CASSETTE_MODE=record sgc > /dev/null
+    python benchmarks/bench_pipeline.py --cassette run.json [--runs 200] [--latency 1.0]
+
+Without `--cassette`, a synthetic one is recorded against an in-process fake server:
+an unsupported structured-output probe, then an invalid text answer and its fix. Each
+run replays the whole cassette through `generate_commit_message`. `--latency 0` times
+local overhead only, and `--latency 1` adds the recorded latency back.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+
+import httpx
+
+from smart_git_commit.cassette import RecordingTransport, ReplayTransport
+from smart_git_commit.commit_message import generate_commit_message
+from smart_git_commit.config import LlmConfig
+from smart_git_commit.git_context import GitContext
+from smart_git_commit.llm_client import CapabilityCache, ChatCompletionsClient
+
+
+_CFG = LlmConfig(
+    base_url="https://bench.invalid/v1",
+    api_key="bench",
+    model="bench-model",
+    timeout_s=15,
+    max_tokens=120,
+    max_diff_chars=8000,
+    temperature=0.2,
+)
+
+
+def _context() -> GitContext:
+    diff = "".join(
+        f"diff --git a/src/m{i}.py b/src/m{i}.py\n+line {i}\n" for i in range(200)
+    )
+    return GitContext(
+        branch="main",
+        status_porcelain="M src/m0.py",
+        staged_diff=diff,
+        diff_truncated=False,
+        original_diff_chars=len(diff),
+    )
+
+
+def _fake_server(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    if "response_format" in body or "tools" in body:
+        return httpx.Response(400, json={"error": "unsupported"})
+    fixing = body["temperature"] == 0.0
+    content = "feat(bench): add synthetic modules" if fixing else "Add synthetic modules."
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _run(transport: httpx.BaseTransport) -> str:
+    with ChatCompletionsClient(
+        base_url=_CFG.base_url,
+        api_key=_CFG.api_key,
+        timeout_s=_CFG.timeout_s,
+        capabilities=CapabilityCache(),
+        transport=transport,
+    ) as client:
+        return generate_commit_message(client=client, context=_context(), cfg=_CFG, structured=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cassette", type=Path)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    cassette = args.cassette
+    if cassette is None:
+        cassette = Path(tempfile.mkdtemp()) / "synthetic.json"
+        _run(RecordingTransport(cassette, inner=httpx.MockTransport(_fake_server)))
+
+    message = ""
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        message = _run(ReplayTransport(cassette, latency=args.latency))
+    elapsed = time.perf_counter() - start
+    print(f"{args.runs} runs: {elapsed / args.runs * 1000:8.2f} ms/run  -> {message!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark default vs monorepo status collection on a synthetic repository.
+
+Usage:
+    python benchmarks/bench_status.py --files 300000 [--untracked 50000] [--keep DIR]
+
+The synthetic repository is built once (files are spread over nested directories and
+committed in a single `git add`), a few files are then staged and `collect` is timed in
+both modes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import tempfile
+import time
+
+from smart_git_commit.git_context import GitContextCollector
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _build_repo(repo: Path, *, files: int, untracked: int) -> None:
+    repo.mkdir(parents=True, exist_ok=True)
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "bench@example.com")
+    _git(repo, "config", "user.name", "Bench")
+    for i in range(files):
+        d = repo / f"svc{i % 100}" / f"mod{(i // 100) % 50}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"f{i}.txt").write_text(f"{i}\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "chore: seed")
+    for i in range(untracked):
+        d = repo / "scratch" / f"d{i % 200}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"u{i}.tmp").write_text("x\n")
+    for i in range(0, files, max(1, files // 50)):
+        p = repo / f"svc{i % 100}" / f"mod{(i // 100) % 50}" / f"f{i}.txt"
+        p.write_text(f"{i} changed\n")
+        _git(repo, "add", str(p.relative_to(repo)))
+
+
+def _time(collector: GitContextCollector, rounds: int) -> tuple[float, int]:
+    best = float("inf")
+    status_len = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        ctx = collector.collect()
+        best = min(best, time.perf_counter() - start)
+        status_len = len(ctx.status_porcelain)
+    return best, status_len
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=300_000)
+    parser.add_argument("--untracked", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--keep", type=Path, default=None, help="Reuse/keep the repo here.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = args.keep or Path(tmp) / "repo"
+        if not (repo / ".git").exists():
+            t0 = time.perf_counter()
+            _build_repo(repo, files=args.files, untracked=args.untracked)
+            print(f"built repo with {args.files} files in {time.perf_counter() - t0:.1f}s")
+
+        os.chdir(repo)
+        cases = {
+            "default": GitContextCollector(),
+            "monorepo": GitContextCollector(monorepo=True),
+            "monorepo+pathspec": GitContextCollector(monorepo=True, pathspecs=["svc0"]),
+        }
+        for name, collector in cases.items():
+            best, status_len = _time(collector, args.rounds)
+            print(f"{name:>18}: {best * 1000:8.1f} ms  status={status_len} chars")
+
+
+if __name__ == "__main__":
+    main()
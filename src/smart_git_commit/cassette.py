@@ -0,0 +1,231 @@
+"""Record and replay Chat Completions HTTP traffic.
+
+A cassette is a JSON file holding the exchanged requests and responses, in order, with
+the time each one took:
+
+    {"version": 1, "interactions": [
+        {"request": {"method": "POST", "path": "/v1/chat/completions", "body": {...}},
+         "response": {"status": 200, "headers": {...}, "body": {...}},
+         "elapsed_s": 0.84}
+    ]}
+
+`RecordingTransport` wraps a real httpx transport and writes the cassette when the
+client is closed. Request headers are not stored, and the API key is redacted
+everywhere else. `ReplayTransport` serves the recorded responses in order, optionally
+sleeping for the recorded latency. Failed requests (timeouts, connection errors) are
+recorded too and raised again on replay.
+
+The client picks these up from `SGC_CASSETTE`, `SGC_CASSETTE_MODE` (`record` or
+`replay`) and `SGC_CASSETTE_LATENCY`, so the full pipeline can be exercised and
+benchmarked offline.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+import httpx
+
+from smart_git_commit.errors import CassetteError
+
+
+CASSETTE_MODES: tuple[str, ...] = ("record", "replay")
+_VERSION = 1
+_REDACTED = "<redacted>"
+# Headers describing the transfer rather than the decoded body (plus cookies, never stored).
+_DROPPED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+)
+
+# Transport errors that are recorded and re-raised by name on replay.
+_ERRORS: dict[str, type[httpx.TransportError]] = {
+    "ConnectError": httpx.ConnectError,
+    "ConnectTimeout": httpx.ConnectTimeout,
+    "ReadTimeout": httpx.ReadTimeout,
+    "WriteTimeout": httpx.WriteTimeout,
+    "PoolTimeout": httpx.PoolTimeout,
+    "ReadError": httpx.ReadError,
+    "RemoteProtocolError": httpx.RemoteProtocolError,
+}
+
+
+def _encode_body(content: bytes, secret: str) -> Any:
+    text = content.decode("utf-8", errors="replace")
+    if secret:
+        text = text.replace(secret, _REDACTED)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _decode_body(body: Any) -> bytes:
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return json.dumps(body).encode("utf-8")
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Pass requests to `inner` and record them into a cassette file.
+
+    Args:
+        path: Cassette file, written (replaced) on `close`.
+        inner: Transport that performs the requests (default: a new HTTPTransport).
+        secret: Value redacted from stored URLs and bodies (the API key).
+        clock: Monotonic clock used for latency measurement.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        inner: httpx.BaseTransport | None = None,
+        secret: str = "",
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._path = path
+        self._inner = inner or httpx.HTTPTransport()
+        self._secret = secret
+        self._clock = clock
+        self._interactions: list[dict[str, Any]] = []
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.raw_path.decode("ascii")
+        if self._secret:
+            path = path.replace(self._secret, _REDACTED)
+        entry: dict[str, Any] = {
+            "request": {
+                "method": request.method,
+                "path": path,
+                "body": _encode_body(request.read(), self._secret),
+            }
+        }
+        start = self._clock()
+        try:
+            response = self._inner.handle_request(request)
+            content = response.read()
+        except httpx.TransportError as e:
+            entry["error"] = {"type": type(e).__name__, "message": str(e)}
+            entry["elapsed_s"] = round(self._clock() - start, 4)
+            self._interactions.append(entry)
+            raise
+        entry["elapsed_s"] = round(self._clock() - start, 4)
+        headers = {k: v for k, v in response.headers.items() if k not in _DROPPED_HEADERS}
+        entry["response"] = {
+            "status": response.status_code,
+            "headers": headers,
+            "body": _encode_body(content, self._secret),
+        }
+        self._interactions.append(entry)
+        # `content` is already decoded, so hand it back without the transfer headers.
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    def close(self) -> None:
+        self._inner.close()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": _VERSION, "interactions": self._interactions}
+        self._path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serve responses from a cassette, in recorded order.
+
+    Each request must have the method and path of the next recorded interaction.
+
+    Args:
+        path: Cassette file.
+        latency: Multiplier for the recorded latency (0 replays instantly).
+        sleep: Sleep function.
+
+    Raises:
+        CassetteError: If the file is missing or malformed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        latency: float = 0.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            interactions = data["interactions"]
+            if data.get("version") != _VERSION or not isinstance(interactions, list):
+                raise ValueError("unsupported cassette version")
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            raise CassetteError(f"Cannot load cassette {path}: {e}") from e
+        self._path = path
+        self._interactions: list[dict[str, Any]] = interactions
+        self._position = 0
+        self._latency = latency
+        self._sleep = sleep
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded interactions not replayed yet."""
+
+        return len(self._interactions) - self._position
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self._position >= len(self._interactions):
+            raise CassetteError(
+                f"Cassette {self._path} has no more interactions "
+                f"(request {request.method} {request.url.path})."
+            )
+        entry = self._interactions[self._position]
+        self._position += 1
+
+        recorded = entry.get("request", {})
+        path = request.url.raw_path.decode("ascii")
+        if (recorded.get("method"), recorded.get("path")) != (request.method, path):
+            raise CassetteError(
+                f"Cassette {self._path} interaction {self._position} was recorded for "
+                f"{recorded.get('method')} {recorded.get('path')}, got {request.method} {path}."
+            )
+
+        if self._latency > 0:
+            self._sleep(float(entry.get("elapsed_s", 0.0)) * self._latency)
+
+        error = entry.get("error")
+        if error is not None:
+            cls = _ERRORS.get(error.get("type"), httpx.TransportError)
+            raise cls(error.get("message", ""), request=request)
+
+        response = entry["response"]
+        return httpx.Response(
+            response["status"],
+            headers=response.get("headers", {}),
+            content=_decode_body(response.get("body", "")),
+            request=request,
+        )
+
+
+def cassette_transport(
+    path: Path, mode: str, *, secret: str = "", latency: float = 0.0
+) -> httpx.BaseTransport:
+    """Create the transport for a cassette `mode` (`record` or `replay`).
+
+    Args:
+        path: Cassette file.
+        mode: `record` or `replay`.
+        secret: API key to redact when recording.
+        latency: Recorded-latency multiplier when replaying.
+
+    Raises:
+        CassetteError: If the mode is unknown or the replay cassette cannot be loaded.
+    """
+
+    if mode == "record":
+        return RecordingTransport(path, secret=secret)
+    if mode == "replay":
+        return ReplayTransport(path, latency=latency)
+    raise CassetteError(
+        f"Unknown cassette mode {mode!r}. Expected one of: {', '.join(CASSETTE_MODES)}."
+    )
@@ -2,20 +2,34 @@
 
 from __future__ import annotations
 
+from pathlib import Path
 import sys
+import tempfile
 from typing import Annotated, Optional
 
 import typer
 from rich.console import Console
+from rich.markup import escape
 from rich.status import Status
 
-from smart_git_commit.config import LlmConfig, load_default_llm_config
+from smart_git_commit.config import (
+    LlmConfig,
+    load_default_llm_config,
+    load_git_backend_name,
+    user_cache_dir,
+)
 from smart_git_commit.errors import (
+    GitBackendUnavailableError,
     InvalidCommitMessageError,
     LlmRequestError,
     NoStagedChangesError,
     NotAGitRepositoryError,
+    RulesConfigError,
 )
+from smart_git_commit.pipeline import PipelineOptions, generate_messages, prepare_context
+from smart_git_commit.profiling import ProfileMode, phase
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.rules import load_commit_rules
 
 
 app = typer.Typer(add_completion=False, help="Generate a semantic git commit message from staged changes.")
@@ -26,6 +40,88 @@ def _print_error(message: str) -> None:
     _console.print(f"[red]Error:[/red] {message}")
 
 
+def _generate(
+    repo: RepoHandle | None,
+    cfg: LlmConfig,
+    opts: PipelineOptions,
+    *,
+    pregenerated: bool,
+    single_flight: bool,
+) -> list[str]:
+    """Run the pipeline, reusing pre-generated or concurrently generated messages."""
+
+    def _produce() -> list[str]:
+        with Status("Collecting git context...", console=_console):
+            prepared = prepare_context(repo, cfg, opts)
+        with Status("Generating commit message...", console=_console):
+            return generate_messages(prepared, cfg, opts)
+
+    if repo is None:
+        return _produce()
+
+    from smart_git_commit.pregen import PregenStore, pregen_key
+    from smart_git_commit.singleflight import SingleFlight
+
+    store = PregenStore.for_repo(repo)
+    # Only compute the key (a read-only `git diff --cached --raw`) when a watcher has
+    # stored something or runs may need coalescing.
+    use_store = pregenerated and store.path.exists()
+    key = pregen_key(repo, cfg, opts) if use_store or single_flight else ""
+    messages = store.get(key) if use_store else None
+    if messages is not None:
+        return messages
+    if not single_flight:
+        return _produce()
+    # Each run may send the initial request and a fix-up request, both possibly delayed
+    # by rate limiting.
+    flight = SingleFlight.for_repo(
+        repo, timeout_s=2 * (cfg.timeout_s + cfg.rate_limit_wait_s)
+    )
+    return flight.run(
+        key,
+        _produce,
+        on_wait=lambda: _console.print(
+            "[dim]Waiting for a concurrent sgc run on the same index...[/dim]"
+        ),
+    )
+
+
+def _start_profiler(
+    ctx: typer.Context, mode: ProfileMode, out_dir: Path | None, top: int
+) -> None:
+    """Profile this invocation; files and a summary are written when it exits."""
+
+    from smart_git_commit.profiling import PipelineProfiler
+
+    if out_dir is None:
+        try:
+            out_dir = user_cache_dir() / "profile"
+        except RuntimeError:  # No home directory.
+            out_dir = Path(tempfile.gettempdir()) / "sgc-profile"
+    profiler = PipelineProfiler(mode.value, out_dir, top=top)
+
+    def _report() -> None:
+        profiler.stop()
+        try:
+            paths = profiler.write()
+        except OSError as e:
+            _print_error(f"Could not write profile files: {e}")
+            paths = []
+        for line in profiler.summary():
+            _console.print(line, markup=False, highlight=False, soft_wrap=True)
+        if paths:
+            _console.print(
+                f"Profile files written to {out_dir}/",
+                markup=False,
+                highlight=False,
+                soft_wrap=True,
+            )
+
+    profiler.start()
+    # Runs when the command finishes, including on errors and early exits.
+    ctx.call_on_close(_report)
+
+
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
@@ -37,39 +133,131 @@ def main(
     temperature: Annotated[Optional[float], typer.Option(help="Sampling temperature.")] = None,
     max_diff_chars: Annotated[Optional[int], typer.Option(help="Max staged diff characters to send.")] = None,
     print_git_command: Annotated[bool, typer.Option(help="Print a ready-to-copy git command.")] = False,
+    monorepo: Annotated[
+        bool,
+        typer.Option(
+            help="Cheap status collection for huge worktrees (no untracked scan, summarized).",
+        ),
+    ] = False,
+    pathspec: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Restrict status/diff collection to this pathspec (repeatable)."),
+    ] = None,
+    examples: Annotated[
+        int,
+        typer.Option(
+            help="Few-shot examples from similar past commits (0 disables; builds a local index).",
+        ),
+    ] = 0,
+    infer_scope: Annotated[
+        bool,
+        typer.Option(help="Infer the scope locally from staged paths and past commit scopes."),
+    ] = False,
+    git_backend: Annotated[
+        Optional[str],
+        typer.Option(help="Git backend: subprocess (default) or pygit2 (in-process)."),
+    ] = None,
+    candidates: Annotated[
+        int,
+        typer.Option(
+            min=1,
+            help=(
+                "Alternatives to request in one call; the best valid one is printed, "
+                "others on stderr."
+            ),
+        ),
+    ] = 1,
+    structured: Annotated[
+        bool,
+        typer.Option(help="Request JSON-schema/tool-call output where the endpoint supports it."),
+    ] = False,
+    submodules: Annotated[
+        bool,
+        typer.Option(
+            help="Summarize the commits behind staged submodule bumps (queried in parallel).",
+        ),
+    ] = False,
+    pregenerated: Annotated[
+        bool,
+        typer.Option(help="Reuse a message pre-generated by `sgc watch` for the same index."),
+    ] = True,
+    single_flight: Annotated[
+        bool,
+        typer.Option(help="Wait for and reuse a concurrent sgc run on the same index and options."),
+    ] = True,
+    profile: Annotated[
+        Optional[ProfileMode],
+        typer.Option(help="Profile pipeline phases: cpu (cProfile) or memory (tracemalloc)."),
+    ] = None,
+    profile_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            show_default="~/.cache/sgc/profile",
+            help="Directory for profile files (.pstats / tracemalloc snapshots).",
+        ),
+    ] = None,
+    profile_top: Annotated[
+        int,
+        typer.Option(min=1, help="Functions or allocation sites listed in the profile summary."),
+    ] = 15,
 ) -> None:
     """Generate a commit message from staged changes."""
 
+    def _settings(repo: RepoHandle | None) -> tuple[LlmConfig, PipelineOptions]:
+        with phase("config"):
+            default = load_default_llm_config(repo)
+        cfg = LlmConfig(
+            base_url=base_url or default.base_url,
+            api_key=api_key or default.api_key,
+            model=model or default.model,
+            timeout_s=timeout_s if timeout_s is not None else default.timeout_s,
+            max_tokens=max_tokens if max_tokens is not None else default.max_tokens,
+            temperature=temperature if temperature is not None else default.temperature,
+            max_diff_chars=max_diff_chars if max_diff_chars is not None else default.max_diff_chars,
+            rate_limit_wait_s=default.rate_limit_wait_s,
+            cassette=default.cassette,
+            cassette_mode=default.cassette_mode,
+            cassette_latency=default.cassette_latency,
+        )
+        opts = PipelineOptions(
+            monorepo=monorepo,
+            pathspecs=tuple(pathspec or ()),
+            examples=examples,
+            infer_scope=infer_scope,
+            git_backend=git_backend or load_git_backend_name(),
+            candidates=candidates,
+            structured=structured,
+            submodules=submodules,
+        )
+        return cfg, opts
+
     if ctx.invoked_subcommand is not None:
+        if profile is not None:
+            _print_error(
+                f"--profile only profiles message generation, not `sgc {ctx.invoked_subcommand}`."
+            )
+            raise typer.Exit(code=2)
+        # Subcommands that generate (`watch`) share these options.
+        ctx.obj = _settings
         return
 
-    from smart_git_commit.commit_message import generate_commit_message
-    from smart_git_commit.git_context import GitContextCollector
-    from smart_git_commit.llm_client import ChatCompletionsClient
-
-    default = load_default_llm_config()
-    cfg = LlmConfig(
-        base_url=base_url or default.base_url,
-        api_key=api_key or default.api_key,
-        model=model or default.model,
-        timeout_s=timeout_s if timeout_s is not None else default.timeout_s,
-        max_tokens=max_tokens if max_tokens is not None else default.max_tokens,
-        temperature=temperature if temperature is not None else default.temperature,
-        max_diff_chars=max_diff_chars if max_diff_chars is not None else default.max_diff_chars,
-    )
+    if profile is not None:
+        _start_profiler(ctx, profile, profile_dir, profile_top)
+
+    # Discover the repository once; config loading and collection share the handle.
+    repo = RepoHandle.try_discover()
+    cfg, opts = _settings(repo)
 
-    if not cfg.api_key:
+    if not cfg.api_key and not cfg.offline:
         _print_error(
             "Missing API key. Set SGC_API_KEY (or OPENAI_API_KEY) or pass --api-key."
         )
         raise typer.Exit(code=2)
 
     try:
-        with Status("Collecting git context...", console=_console):
-            git_ctx = GitContextCollector().collect(max_diff_chars=cfg.max_diff_chars)
-        with Status("Generating commit message...", console=_console):
-            with ChatCompletionsClient.from_config(cfg) as client:
-                message = generate_commit_message(client=client, context=git_ctx, cfg=cfg)
+        messages = _generate(
+            repo, cfg, opts, pregenerated=pregenerated, single_flight=single_flight
+        )
     except KeyboardInterrupt:
         _print_error("Canceled.")
         raise typer.Exit(code=130)
@@ -83,6 +271,9 @@ def main(
             "No staged changes found. Stage your changes first (e.g., git add -p) and try again."
         )
         raise typer.Exit(code=2)
+    except (GitBackendUnavailableError, RulesConfigError) as e:
+        _print_error(str(e))
+        raise typer.Exit(code=2) from None
     except InvalidCommitMessageError as e:
         _print_error(str(e))
         raise typer.Exit(code=2)
@@ -90,6 +281,10 @@ def main(
         _print_error(str(e))
         raise typer.Exit(code=3)
 
+    message, alternates = messages[0], messages[1:]
+    for i, alternate in enumerate(alternates, start=1):
+        _console.print(f"[dim]Alternate {i}:[/dim] {escape(alternate)}", highlight=False)
+
     # Print to stdout (not stderr) so it can be captured.
     sys.stdout.write(message)
     sys.stdout.write("\n")
@@ -97,3 +292,81 @@ def main(
     if print_git_command:
         # Keep it simple: user can copy-paste.
         sys.stdout.write(f"git commit -m {message!r}\n")
+
+
+@app.command()
+def lint(
+    rev_range: Annotated[str, typer.Argument(help="Revision range, e.g. origin/main..HEAD.")],
+    jobs: Annotated[
+        int,
+        typer.Option(help="Worker processes; 1 validates in-process (fastest for default rules)."),
+    ] = 1,
+    json_output: Annotated[
+        bool, typer.Option("--json", help="Print a single JSON report instead of TSV lines.")
+    ] = False,
+    include_merges: Annotated[bool, typer.Option(help="Also validate merge commits.")] = False,
+) -> None:
+    """Validate existing commit messages in a revision range.
+
+    Invalid commits are printed as `sha<TAB>header<TAB>error` lines (or one JSON object
+    with --json). Exits with code 1 if any message is invalid.
+    """
+
+    import json
+
+    from smart_git_commit.lint import iter_commit_messages, lint_messages
+
+    try:
+        repo = RepoHandle.discover()
+        rules = load_commit_rules(repo.toplevel)
+        messages = iter_commit_messages(rev_range, git=repo.git, include_merges=include_merges)
+        report = lint_messages(messages, rules=rules, jobs=jobs)
+    except KeyboardInterrupt:
+        _print_error("Canceled.")
+        raise typer.Exit(code=130) from None
+    except (NotAGitRepositoryError, RulesConfigError) as e:
+        _print_error(str(e))
+        raise typer.Exit(code=2) from None
+
+    if json_output:
+        sys.stdout.write(json.dumps(report.to_dict(), separators=(",", ":")))
+        sys.stdout.write("\n")
+    else:
+        for issue in report.issues:
+            sys.stdout.write(f"{issue.sha}\t{issue.header}\t{issue.error}\n")
+        _console.print(f"Checked {report.checked} commits, {len(report.issues)} invalid.")
+
+    if not report.ok:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def watch(
+    ctx: typer.Context,
+    debounce_s: Annotated[
+        float, typer.Option(help="Quiet period after the last index change before generating.")
+    ] = 1.0,
+    poll: Annotated[
+        bool, typer.Option(help="Poll the index instead of using inotify.")
+    ] = False,
+) -> None:
+    """Pre-generate commit messages in the background as the index changes.
+
+    Generation options go before the subcommand (e.g. `sgc --examples 3 watch`); a later
+    `sgc` with the same options prints the pre-generated message instantly. Stop with Ctrl+C.
+    """
+
+    from smart_git_commit.pregen import watch as watch_index
+
+    try:
+        repo = RepoHandle.discover()
+        cfg, opts = ctx.obj(repo)
+        if not cfg.api_key and not cfg.offline:
+            _print_error("Missing API key. Set SGC_API_KEY (or OPENAI_API_KEY) or pass --api-key.")
+            raise typer.Exit(code=2)
+        watch_index(repo, cfg, opts, debounce_s=debounce_s, force_polling=poll, log=_console.print)
+    except KeyboardInterrupt:
+        _console.print("Stopped.")
+    except (NotAGitRepositoryError, RulesConfigError) as e:
+        _print_error(str(e))
+        raise typer.Exit(code=2) from None
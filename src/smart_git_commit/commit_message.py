@@ -2,38 +2,97 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+
 from smart_git_commit.config import LlmConfig
-from smart_git_commit.errors import InvalidCommitMessageError
 from smart_git_commit.git_context import GitContext
 from smart_git_commit.llm_client import ChatCompletionsClient, ChatMessage
-from smart_git_commit.semantic import COMMIT_TYPES, normalize_commit_message, validate_commit_message
+from smart_git_commit.profiling import phase
+from smart_git_commit.ranking import rank_commit_messages
+from smart_git_commit.semantic import (
+    DEFAULT_RULES,
+    CommitRules,
+    apply_scope,
+    assemble_commit_message,
+    check_commit_message,
+    commit_message_schema,
+    normalize_commit_message,
+    validate_commit_message,
+)
 
 
-def _build_generation_messages(context: GitContext) -> list[ChatMessage]:
-    allowed = ", ".join(COMMIT_TYPES)
-    system = (
-        "You are a senior engineer. Generate a Conventional Commit message in English. "
-        "Output ONLY the commit message (no quotes, no code fences, no extra text)."
+def _scope_line(scope_hints: Sequence[str]) -> str:
+    if len(scope_hints) == 1:
+        return f"- Use the scope: {scope_hints[0]}\n"
+    if scope_hints:
+        return f"- Choose the scope from: {', '.join(scope_hints)}\n"
+    return ""
+
+
+def _build_generation_messages(
+    context: GitContext,
+    rules: CommitRules = DEFAULT_RULES,
+    examples: Sequence[str] = (),
+    scope_hints: Sequence[str] = (),
+    structured: bool = False,
+) -> list[ChatMessage]:
+    rule_lines = "".join(f"{line}\n" for line in rules.prompt_lines())
+    rule_lines += _scope_line(scope_hints)
+    example_block = (
+        "Past commit headers for similar files (match their style and scopes):\n"
+        + "".join(f"- {example}\n" for example in examples)
+        + "\n"
+        if examples
+        else ""
+    )
+    submodule_block = (
+        "Submodule changes (commits pulled in by each bump):\n"
+        + "".join(f"- {change.describe()}\n" for change in context.submodules)
+        + "\n"
+        if context.submodules
+        else ""
     )
+    if structured:
+        system = (
+            "You are a senior engineer. Describe the staged change as the fields of a "
+            "Conventional Commit message in English."
+        )
+        output_line = (
+            "- Leave scope and body null when not needed; "
+            "set breaking only for breaking changes.\n"
+        )
+    else:
+        system = (
+            "You are a senior engineer. Generate a Conventional Commit message in English. "
+            "Output ONLY the commit message (no quotes, no code fences, no extra text)."
+        )
+        output_line = (
+            "- Output ONLY the commit message (no quotes, no code fences, no extra text).\n"
+        )
     user = (
         "Rules:\n"
         "- Use Conventional Commits header format: type(scope): subject OR type: subject\n"
-        f"- Allowed types: {allowed}\n"
+        f"{rule_lines}"
         "- Subject must be extremely concise (under 50 chars) and imperative, no trailing period\n"
         "- Focus ONLY on the most significant changes. Omit minor details or trivial refactors.\n"
         "- If a body is necessary, keep it brief and use bullet points (max 3 items).\n"
-        "- Output ONLY the commit message (no quotes, no code fences, no extra text).\n\n"
+        f"{output_line}\n"
+        f"{example_block}"
         f"Branch: {context.branch}\n"
         "Git status (porcelain):\n"
         f"{context.status_porcelain}\n\n"
+        f"{submodule_block}"
         "Staged diff:\n"
         f"{context.staged_diff}\n"
     )
     return [ChatMessage(role="system", content=system), ChatMessage(role="user", content=user)]
 
 
-def _build_fix_messages(bad_message: str) -> list[ChatMessage]:
-    allowed = ", ".join(COMMIT_TYPES)
+def _build_fix_messages(
+    bad_message: str, rules: CommitRules = DEFAULT_RULES, error: str = ""
+) -> list[ChatMessage]:
+    rule_lines = "".join(f"{line}\n" for line in rules.prompt_lines())
+    problem = f"Problem: {error}\n" if error else ""
     system = (
         "You are a formatter. Fix the commit message to match Conventional Commits. "
         "Output ONLY the corrected commit message."
@@ -42,50 +101,170 @@ def _build_fix_messages(bad_message: str) -> list[ChatMessage]:
         "Fix the following output to be a valid Conventional Commit message in English.\n"
         "Requirements:\n"
         "- Header must match: type(scope): subject OR type: subject\n"
-        f"- Allowed types: {allowed}\n"
+        f"{rule_lines}"
         "- No quotes, no code fences, no leading labels\n\n"
+        f"{problem}"
         f"Bad output:\n{bad_message}\n"
     )
     return [ChatMessage(role="system", content=system), ChatMessage(role="user", content=user)]
 
 
-def generate_commit_message(*, client: ChatCompletionsClient, context: GitContext, cfg: LlmConfig) -> str:
-    """Generate and validate a commit message.
+def _fill_scope(message: str, scope_hints: Sequence[str], rules: CommitRules) -> str:
+    if len(scope_hints) != 1:
+        return message
+    scoped = apply_scope(message, scope_hints[0])
+    # Keep the model's output if the scoped header would break a rule (e.g. length).
+    if scoped != message and check_commit_message(scoped, rules) is None:
+        return scoped
+    return message
 
-    This function performs at most one additional "fix" attempt if the initial output is invalid.
+
+def generate_commit_candidates(
+    *,
+    client: ChatCompletionsClient,
+    context: GitContext,
+    cfg: LlmConfig,
+    rules: CommitRules = DEFAULT_RULES,
+    examples: Sequence[str] = (),
+    scope_hints: Sequence[str] = (),
+    n: int = 1,
+    structured: bool = False,
+) -> list[str]:
+    """Generate `n` alternative commit messages and return the valid ones, best first.
+
+    With `n > 1` all choices come from one request (see `ChatCompletionsClient.create_many`)
+    and are validated and ranked locally, so a fix request is only needed when none of
+    them is valid.
 
     Args:
         client: Chat completions client.
         context: Git context.
         cfg: LLM config.
+        rules: Repository commit rules, included in the prompt and used for validation.
+        examples: Headers of similar past commits, included as few-shot examples.
+        scope_hints: Scopes inferred locally from the staged paths, most likely first.
+            A single hint is also filled into a scopeless output.
+        n: Number of candidates to request.
+        structured: Ask for JSON fields (`type`, `scope`, `subject`, `body`, `breaking`)
+            and assemble the message locally when the endpoint supports it. Only used
+            for single-candidate requests; otherwise, or if unsupported, free text is
+            requested.
 
     Returns:
-        A validated commit message.
+        Distinct validated commit messages (at least one), best first.
 
     Raises:
-        InvalidCommitMessageError: If output cannot be validated after a fix attempt.
+        InvalidCommitMessageError: If no output can be validated after a fix attempt.
     """
 
-    raw = client.create(
-        model=cfg.model,
-        messages=_build_generation_messages(context),
-        max_tokens=cfg.max_tokens,
-        temperature=cfg.temperature,
-    )
-    msg = normalize_commit_message(raw)
+    raws: list[str] = []
+    if structured and n <= 1:
+        with phase("prompt"):
+            messages = _build_generation_messages(
+                context, rules, examples, scope_hints, structured=True
+            )
+            schema = commit_message_schema(rules)
+        with phase("create"):
+            structured_out = client.create_structured(
+                model=cfg.model,
+                messages=messages,
+                max_tokens=cfg.max_tokens,
+                temperature=cfg.temperature,
+                schema=schema,
+                name="commit_message",
+            )
+        if isinstance(structured_out, dict):
+            raws = [assemble_commit_message(structured_out)]
+        elif structured_out:
+            # The endpoint ignored the schema and answered in plain text.
+            raws = [structured_out]
+
+    if not raws:
+        with phase("prompt"):
+            messages = _build_generation_messages(context, rules, examples, scope_hints)
+        with phase("create"):
+            if n > 1:
+                raws = client.create_many(
+                    model=cfg.model,
+                    messages=messages,
+                    max_tokens=cfg.max_tokens,
+                    temperature=cfg.temperature,
+                    n=n,
+                )
+            else:
+                raws = [
+                    client.create(
+                        model=cfg.model,
+                        messages=messages,
+                        max_tokens=cfg.max_tokens,
+                        temperature=cfg.temperature,
+                    )
+                ]
+    with phase("normalize"):
+        candidates = [
+            _fill_scope(normalize_commit_message(raw), scope_hints, rules) for raw in raws
+        ]
+        ranked = rank_commit_messages(candidates, rules=rules, scope_hints=scope_hints)
+    if ranked:
+        return ranked
 
-    try:
-        validate_commit_message(msg)
-        return msg
-    except InvalidCommitMessageError:
-        # One lightweight fix attempt.
+    # One lightweight fix attempt, on the server's first choice.
+    error = check_commit_message(candidates[0], rules) or ""
+    with phase("prompt"):
+        messages = _build_fix_messages(raws[0], rules, error)
+    with phase("create"):
         fixed_raw = client.create(
             model=cfg.model,
-            messages=_build_fix_messages(raw),
+            messages=messages,
             max_tokens=cfg.max_tokens,
             temperature=0.0,
         )
-        fixed = normalize_commit_message(fixed_raw)
-        validate_commit_message(fixed)
-        return fixed
+    with phase("normalize"):
+        fixed = _fill_scope(normalize_commit_message(fixed_raw), scope_hints, rules)
+    validate_commit_message(fixed, rules)
+    return [fixed]
+
+
+def generate_commit_message(
+    *,
+    client: ChatCompletionsClient,
+    context: GitContext,
+    cfg: LlmConfig,
+    rules: CommitRules = DEFAULT_RULES,
+    examples: Sequence[str] = (),
+    scope_hints: Sequence[str] = (),
+    candidates: int = 1,
+    structured: bool = False,
+) -> str:
+    """Generate and validate a commit message.
+
+    This function performs at most one additional "fix" attempt if the initial output is invalid.
+
+    Args:
+        client: Chat completions client.
+        context: Git context.
+        cfg: LLM config.
+        rules: Repository commit rules, included in the prompt and used for validation.
+        examples: Headers of similar past commits, included as few-shot examples.
+        scope_hints: Scopes inferred locally from the staged paths, most likely first.
+            A single hint is also filled into a scopeless output.
+        candidates: Alternatives to request in one call; the best valid one is returned.
+        structured: Prefer schema-constrained output (see `generate_commit_candidates`).
+
+    Returns:
+        A validated commit message.
+
+    Raises:
+        InvalidCommitMessageError: If output cannot be validated after a fix attempt.
+    """
 
+    return generate_commit_candidates(
+        client=client,
+        context=context,
+        cfg=cfg,
+        rules=rules,
+        examples=examples,
+        scope_hints=scope_hints,
+        n=candidates,
+        structured=structured,
+    )[0]
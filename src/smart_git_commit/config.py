@@ -9,7 +9,8 @@ from dataclasses import dataclass
 import os
 from pathlib import Path
 import re
-import subprocess
+
+from smart_git_commit.repo import RepoHandle
 
 
 @dataclass(frozen=True)
@@ -23,6 +24,10 @@ class LlmConfig:
         timeout_s: Total request timeout in seconds.
         max_tokens: Upper bound of output tokens.
         temperature: Sampling temperature.
+        rate_limit_wait_s: Max time to wait for rate-limit capacity (0 disables pacing).
+        cassette: HTTP cassette file to record to or replay from (empty: live traffic).
+        cassette_mode: `record` or `replay`.
+        cassette_latency: Multiplier for recorded latency when replaying.
     """
 
     base_url: str
@@ -32,6 +37,16 @@ class LlmConfig:
     max_tokens: int
     max_diff_chars: int
     temperature: float
+    rate_limit_wait_s: float = 30.0
+    cassette: str = ""
+    cassette_mode: str = "replay"
+    cassette_latency: float = 0.0
+
+    @property
+    def offline(self) -> bool:
+        """Whether requests are served from a cassette, so no API key is needed."""
+
+        return bool(self.cassette) and self.cassette_mode == "replay"
 
 
 _EXPORT_PREFIX_RE = re.compile(r"^export\s+", flags=re.IGNORECASE)
@@ -86,12 +101,15 @@ def _load_dotenv_file(path: Path, *, override: bool = False) -> None:
         os.environ[key] = value
 
 
-def _try_load_dotenv() -> None:
+def _try_load_dotenv(repo: RepoHandle | None = None) -> None:
     """Best-effort .env loading.
 
     Resolution order:
         1) .env in current working directory
         2) .env in git repository root (if inside a repo)
+
+    Args:
+        repo: Repository discovered by the caller; discovered here when omitted.
     """
 
     cwd_env = Path.cwd() / ".env"
@@ -100,40 +118,29 @@ def _try_load_dotenv() -> None:
         return
 
     # Try repo root for common workflows (run from subdirectory).
-    try:
-        proc = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=1.5,
-        )
-    except Exception:
-        return
-
-    if proc.returncode != 0:
-        return
-
-    root = (proc.stdout or "").strip()
-    if not root:
+    if repo is None:
+        repo = RepoHandle.try_discover(timeout_s=1.5)
+    if repo is None:
         return
 
-    root_env = Path(root) / ".env"
-    _load_dotenv_file(root_env)
+    _load_dotenv_file(repo.toplevel / ".env")
 
 
-def load_default_llm_config() -> LlmConfig:
+def load_default_llm_config(repo: RepoHandle | None = None) -> LlmConfig:
     """Load default configuration from environment variables.
 
     Precedence:
     - SGC_* variables
     - OPENAI_* variables (for convenience)
 
+    Args:
+        repo: Repository discovered by the caller, used to locate the root `.env`.
+
     Returns:
         A default LlmConfig.
     """
 
-    _try_load_dotenv()
+    _try_load_dotenv(repo)
 
     base_url = os.getenv("SGC_BASE_URL") or os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1"
     api_key = os.getenv("SGC_API_KEY") or os.getenv("OPENAI_API_KEY") or ""
@@ -142,6 +149,10 @@ def load_default_llm_config() -> LlmConfig:
     max_tokens = int(os.getenv("SGC_MAX_TOKENS") or "120")
     max_diff_chars = int(os.getenv("SGC_MAX_DIFF_CHARS") or "8000")
     temperature = float(os.getenv("SGC_TEMPERATURE") or "0.2")
+    rate_limit_wait_s = float(os.getenv("SGC_RATE_LIMIT_WAIT_S") or "30")
+    cassette = os.getenv("SGC_CASSETTE") or ""
+    cassette_mode = os.getenv("SGC_CASSETTE_MODE") or "replay"
+    cassette_latency = float(os.getenv("SGC_CASSETTE_LATENCY") or "0")
     return LlmConfig(
         base_url=base_url,
         api_key=api_key,
@@ -150,4 +161,24 @@ def load_default_llm_config() -> LlmConfig:
         max_tokens=max_tokens,
         max_diff_chars=max_diff_chars,
         temperature=temperature,
+        rate_limit_wait_s=rate_limit_wait_s,
+        cassette=cassette,
+        cassette_mode=cassette_mode,
+        cassette_latency=cassette_latency,
     )
+
+
+def user_cache_dir() -> Path:
+    """Return SGC's per-user cache directory (`$XDG_CACHE_HOME/sgc`, default `~/.cache/sgc`)."""
+
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "sgc"
+
+
+def load_git_backend_name() -> str:
+    """Return the git backend selected by `SGC_GIT_BACKEND` (default: `subprocess`).
+
+    Call after `load_default_llm_config` so values from `.env` are visible.
+    """
+
+    return os.getenv("SGC_GIT_BACKEND") or "subprocess"
@@ -14,6 +14,10 @@ class NotAGitRepositoryError(SgcError):
     """Raised when running outside a Git worktree."""
 
 
+class GitBackendUnavailableError(SgcError):
+    """Raised when the configured git backend cannot be used."""
+
+
 class NoStagedChangesError(SgcError):
     """Raised when there is no staged change to summarize."""
 
@@ -22,6 +26,13 @@ class LlmRequestError(SgcError):
     """Raised when the LLM request fails."""
 
 
+class CassetteError(LlmRequestError):
+    """Raised when a recorded HTTP cassette cannot be loaded or does not match a request."""
+
+
 class InvalidCommitMessageError(SgcError):
     """Raised when a commit message cannot be validated."""
 
+
+class RulesConfigError(SgcError):
+    """Raised when the repository's commit rules config is invalid."""
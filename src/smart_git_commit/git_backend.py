@@ -0,0 +1,258 @@
+"""Git access backends used by the context collector.
+
+Two implementations share the `GitBackend` protocol:
+
+- `SubprocessGitBackend` shells out to the `git` executable (the default).
+- `Pygit2GitBackend` reads the index and object database in-process through libgit2
+  (via the optional `pygit2` package), avoiding a fork/exec per call in batch or
+  long-running use.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import fnmatch
+import os
+from pathlib import Path
+import subprocess
+from typing import TYPE_CHECKING, Any, Protocol
+
+from smart_git_commit.errors import GitBackendUnavailableError, NotAGitRepositoryError
+
+if TYPE_CHECKING:
+    from smart_git_commit.repo import RepoHandle
+
+
+GIT_BACKENDS: tuple[str, ...] = ("subprocess", "pygit2")
+
+
+class GitBackend(Protocol):
+    """Read-only view of a repository needed to build a GitContext."""
+
+    def branch(self) -> str:
+        """Return the branch name, or `detached@<sha>` when HEAD is detached."""
+        ...
+
+    def status(
+        self,
+        pathspecs: Sequence[str] = (),
+        *,
+        include_untracked: bool = True,
+        optional_locks: bool = True,
+    ) -> str:
+        """Return `git status --porcelain=v1` output (without trailing newline)."""
+        ...
+
+    def staged_diff(self, pathspecs: Sequence[str] = ()) -> str:
+        """Return `git diff --staged --no-color` output (without trailing newline)."""
+        ...
+
+
+def _git_run(
+    args: list[str], *, git: str = "git", timeout_s: float = 10.0
+) -> subprocess.CompletedProcess[str]:
+    try:
+        return subprocess.run(
+            [git, *args],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=timeout_s,
+        )
+    except FileNotFoundError as e:
+        raise NotAGitRepositoryError("git is not installed or not found in PATH") from e
+
+
+def _run_git_checked(args: list[str], *, git: str = "git", timeout_s: float = 10.0) -> str:
+    proc = _git_run(args, git=git, timeout_s=timeout_s)
+    if proc.returncode != 0:
+        stderr = (proc.stderr or "").strip()
+        raise NotAGitRepositoryError(stderr or f"git {args!r} failed")
+    return proc.stdout
+
+
+def _pathspec_args(pathspecs: Sequence[str]) -> list[str]:
+    return ["--", *pathspecs] if pathspecs else []
+
+
+class SubprocessGitBackend:
+    """Backend running one `git` process per query."""
+
+    def __init__(self, repo: RepoHandle) -> None:
+        self._repo = repo
+
+    def branch(self) -> str:
+        return self._repo.branch
+
+    def status(
+        self,
+        pathspecs: Sequence[str] = (),
+        *,
+        include_untracked: bool = True,
+        optional_locks: bool = True,
+    ) -> str:
+        args = [] if optional_locks else ["--no-optional-locks"]
+        args += ["status", "--porcelain=v1"]
+        if not include_untracked:
+            args.append("--untracked-files=no")
+        args += _pathspec_args(pathspecs)
+        return _run_git_checked(args, git=self._repo.git).rstrip("\n")
+
+    def staged_diff(self, pathspecs: Sequence[str] = ()) -> str:
+        # Pin the gitlink format: `diff.submodule=log|diff` replaces the
+        # `Subproject commit` lines that `gitlink_changes` parses.
+        args = ["diff", "--staged", "--no-color", "--submodule=short"]
+        args += _pathspec_args(pathspecs)
+        return _run_git_checked(args, git=self._repo.git).rstrip("\n")
+
+
+class Pygit2GitBackend:
+    """In-process backend built on libgit2 (requires the optional `pygit2` package).
+
+    Output mirrors the subprocess backend for regular files. Pathspecs support plain
+    paths, directory prefixes and shell globs (no magic signatures); when pathspecs are
+    given, untracked directories are listed file by file. Paths with unusual characters
+    are not C-quoted the way git does.
+    """
+
+    def __init__(self, repo: RepoHandle) -> None:
+        try:
+            import pygit2
+        except ImportError as e:
+            raise GitBackendUnavailableError(
+                "The pygit2 git backend requires the 'pygit2' package (pip install pygit2)."
+            ) from e
+
+        self._pygit2: Any = pygit2
+        self._repo = repo
+        self._git: Any = pygit2.Repository(str(repo.toplevel))
+
+    def branch(self) -> str:
+        return self._repo.branch
+
+    def _relative_pathspecs(self, pathspecs: Sequence[str]) -> list[str]:
+        # git interprets pathspecs relative to the current directory; libgit2 paths are
+        # relative to the worktree root.
+        top = self._repo.toplevel.resolve()
+        out = []
+        for spec in pathspecs:
+            rel = os.path.relpath(Path.cwd().resolve() / spec, top).replace(os.sep, "/")
+            out.append("" if rel == "." else rel.rstrip("/"))
+        return out
+
+    @staticmethod
+    def _matches(path: str, specs: Sequence[str]) -> bool:
+        if not specs:
+            return True
+        for spec in specs:
+            if not spec or path == spec or path.startswith(spec + "/"):
+                return True
+            if fnmatch.fnmatchcase(path, spec):
+                return True
+        return False
+
+    def _staged(self) -> Any:
+        git = self._git
+        if git.head_is_unborn:
+            # Compare against the empty tree, as git does for a root commit.
+            base = git[git.TreeBuilder().write()]
+        else:
+            base = git.revparse_single("HEAD").peel(self._pygit2.Tree)
+        diff = base.diff_to_index(git.index)
+        # `git diff` detects renames by default (diff.renames=true).
+        diff.find_similar()
+        return diff
+
+    def status(
+        self,
+        pathspecs: Sequence[str] = (),
+        *,
+        include_untracked: bool = True,
+        optional_locks: bool = True,
+    ) -> str:
+        _ = optional_locks  # libgit2 status never rewrites the index.
+        fs = self._pygit2.enums.FileStatus
+        specs = self._relative_pathspecs(pathspecs)
+        # Collapsed "dir/" entries cannot be matched against file pathspecs.
+        mode = "no" if not include_untracked else "all" if specs else "normal"
+        flags = self._git.status(untracked_files=mode)
+
+        index_codes = (
+            (fs.INDEX_NEW, "A"),
+            (fs.INDEX_MODIFIED, "M"),
+            (fs.INDEX_DELETED, "D"),
+            (fs.INDEX_RENAMED, "R"),
+            (fs.INDEX_TYPECHANGE, "T"),
+        )
+        wt_codes = (
+            (fs.WT_MODIFIED, "M"),
+            (fs.WT_DELETED, "D"),
+            (fs.WT_TYPECHANGE, "T"),
+            (fs.WT_RENAMED, "R"),
+        )
+
+        # Fold staged renames into single "R  old -> new" entries like git status does.
+        renames: dict[str, str] = {}
+        if any(flag & (fs.INDEX_NEW | fs.INDEX_DELETED) for flag in flags.values()):
+            delta_renamed = self._pygit2.enums.DeltaStatus.RENAMED
+            for delta in self._staged().deltas:
+                if delta.status == delta_renamed:
+                    renames[delta.new_file.path] = delta.old_file.path
+
+        tracked: list[tuple[str, str]] = []
+        untracked: list[str] = []
+        renamed_from = set(renames.values())
+        for path, flag in flags.items():
+            if flag & fs.IGNORED or path in renamed_from:
+                continue
+            if flag == fs.WT_NEW:
+                if include_untracked and self._matches(path, specs):
+                    untracked.append(path)
+                continue
+            if not self._matches(path, specs):
+                continue
+            x = next((code for bit, code in index_codes if flag & bit), " ")
+            y = next((code for bit, code in wt_codes if flag & bit), " ")
+            if path in renames:
+                tracked.append((path, f"R{y} {renames[path]} -> {path}"))
+            else:
+                tracked.append((path, f"{x}{y} {path}"))
+
+        lines = [line for _, line in sorted(tracked)]
+        lines += [f"?? {path}" for path in sorted(untracked)]
+        return "\n".join(lines)
+
+    def staged_diff(self, pathspecs: Sequence[str] = ()) -> str:
+        diff = self._staged()
+        specs = self._relative_pathspecs(pathspecs)
+        if not specs:
+            return (diff.patch or "").rstrip("\n")
+        parts = []
+        for patch in diff:
+            delta = patch.delta
+            paths = (delta.new_file.path, delta.old_file.path)
+            if any(self._matches(path, specs) for path in paths):
+                parts.append(patch.text or "")
+        return "".join(parts).rstrip("\n")
+
+
+def create_git_backend(name: str, repo: RepoHandle) -> GitBackend:
+    """Create a backend by name.
+
+    Args:
+        name: One of `GIT_BACKENDS`.
+        repo: Repository to operate on.
+
+    Returns:
+        A GitBackend.
+
+    Raises:
+        GitBackendUnavailableError: If the name is unknown or its dependency is missing.
+    """
+
+    if name == "subprocess":
+        return SubprocessGitBackend(repo)
+    if name == "pygit2":
+        return Pygit2GitBackend(repo)
+    allowed = ", ".join(GIT_BACKENDS)
+    raise GitBackendUnavailableError(f"Unknown git backend {name!r}. Allowed: {allowed}.")
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
-import subprocess
 
-from smart_git_commit.errors import NoStagedChangesError, NotAGitRepositoryError
+from smart_git_commit.errors import NoStagedChangesError
+from smart_git_commit.git_backend import GitBackend, SubprocessGitBackend
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.submodules import SubmoduleChange, gitlink_changes, summarize_submodules
 
 
 @dataclass(frozen=True)
@@ -14,10 +17,14 @@ class GitContext:
 
     Attributes:
         branch: Current branch name.
-        status_porcelain: Output of `git status --porcelain=v1`.
+        status_porcelain: Output of `git status --porcelain=v1` (summarized by directory in
+            monorepo mode when it exceeds the status budget).
         staged_diff: Output of `git diff --staged --no-color` (possibly truncated).
         diff_truncated: Whether staged_diff was truncated.
         original_diff_chars: Original staged diff size (in characters).
+        staged_paths: Paths touched by the staged diff (taken before truncation).
+        submodules: Staged submodule changes with their log summaries (only collected
+            when requested).
     """
 
     branch: str
@@ -25,31 +32,119 @@ class GitContext:
     staged_diff: str
     diff_truncated: bool
     original_diff_chars: int
+    staged_paths: tuple[str, ...] = ()
+    submodules: tuple[SubmoduleChange, ...] = ()
 
 
-def _git_run(args: list[str], *, timeout_s: float = 10.0) -> subprocess.CompletedProcess[str]:
-    try:
-        return subprocess.run(
-            ["git", *args],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-        )
-    except FileNotFoundError as e:
-        raise NotAGitRepositoryError("git is not installed or not found in PATH") from e
+def staged_paths_from_diff(diff: str) -> tuple[str, ...]:
+    """Return the post-image paths of a `git diff` output, in order of appearance.
+
+    Quoted paths (unusual characters) are returned with their quotes stripped but not
+    unescaped.
+    """
+
+    paths = []
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            _, sep, path = line.rpartition(" b/")
+            if not sep:
+                _, sep, path = line.rpartition(' "b/')
+                path = path.rstrip('"')
+            if sep:
+                paths.append(path)
+    return tuple(paths)
+
+
+def _status_path(line: str) -> str:
+    # Porcelain v1 lines look like "XY path" or "XY old -> new" for renames.
+    path = line[3:]
+    if " -> " in path:
+        path = path.split(" -> ", 1)[1]
+    return path.strip('"')
+
+
+def summarize_status(status_porcelain: str, *, max_chars: int = 2000, depth: int = 2) -> str:
+    """Summarize porcelain status output under a hard size cap.
 
+    Small outputs are returned unchanged. Larger ones are aggregated per directory
+    (truncated to ``depth`` components) with a count per status code, sorted by
+    file count, and cut off once ``max_chars`` would be exceeded.
 
-def _run_git_checked(args: list[str], *, timeout_s: float = 10.0) -> str:
-    proc = _git_run(args, timeout_s=timeout_s)
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        raise NotAGitRepositoryError(stderr or f"git {args!r} failed")
-    return proc.stdout
+    Args:
+        status_porcelain: Output of `git status --porcelain=v1`.
+        max_chars: Upper bound of the returned text length.
+        depth: Number of leading path components used as the aggregation key.
+
+    Returns:
+        The original status or a per-directory summary of at most ``max_chars`` characters.
+    """
+
+    if len(status_porcelain) <= max_chars:
+        return status_porcelain
+
+    groups: dict[str, dict[str, int]] = {}
+    for line in status_porcelain.splitlines():
+        if len(line) < 4:
+            continue
+        code = line[:2].strip() or "?"
+        parts = _status_path(line).split("/")[:-1][:depth]
+        key = "/".join(parts) + "/" if parts else "./"
+        counts = groups.setdefault(key, {})
+        counts[code] = counts.get(code, 0) + 1
+
+    ordered = sorted(groups.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+    lines: list[str] = []
+    used = 0
+    for index, (key, counts) in enumerate(ordered):
+        total = sum(counts.values())
+        codes = ", ".join(f"{code}={n}" for code, n in sorted(counts.items()))
+        entry = f"{key} ({total} files: {codes})"
+        remaining = len(ordered) - index
+        # Always keep room for the trailing "more directories" note.
+        note = f"[NOTE] {remaining} more directories omitted."
+        if used + len(entry) + 1 + len(note) > max_chars:
+            lines.append(note)
+            break
+        lines.append(entry)
+        used += len(entry) + 1
+    return "\n".join(lines)[:max_chars]
 
 
 class GitContextCollector:
-    """Collect Git information from the current working directory."""
+    """Collect Git information from the current working directory.
+
+    Args:
+        repo: Repository discovered earlier in the run; discovered on demand when omitted.
+        backend: Git backend to query; a SubprocessGitBackend over `repo` by default.
+        monorepo: Use cheap status collection suited to very large worktrees: skip
+            untracked files, avoid optional index locks and summarize the status output.
+            Git still honors the repository's `core.fsmonitor` / `core.untrackedCache`
+            settings, so enabling them in huge repositories keeps status fast.
+        pathspecs: Optional pathspecs restricting status and diff collection.
+        max_status_chars: Status size cap applied in monorepo mode.
+        submodules: Summarize the commits behind staged submodule bumps (queried
+            concurrently, see `smart_git_commit.submodules`).
+        max_submodule_chars: Character budget shared by all submodule summaries.
+    """
+
+    def __init__(
+        self,
+        *,
+        repo: RepoHandle | None = None,
+        backend: GitBackend | None = None,
+        monorepo: bool = False,
+        pathspecs: Sequence[str] = (),
+        max_status_chars: int = 2000,
+        submodules: bool = False,
+        max_submodule_chars: int = 4000,
+    ) -> None:
+        self._repo = repo
+        self._backend = backend
+        self._monorepo = monorepo
+        self._pathspecs = tuple(pathspecs)
+        self._max_status_chars = max_status_chars
+        self._submodules = submodules
+        self._max_submodule_chars = max_submodule_chars
 
     def collect(self, *, max_diff_chars: int = 8000) -> GitContext:
         """Collect staged diff and minimal metadata.
@@ -65,25 +160,35 @@ class GitContextCollector:
             NoStagedChangesError: If there is no staged change.
         """
 
-        inside = _run_git_checked(["rev-parse", "--is-inside-work-tree"]).strip().lower()
-        if inside != "true":
-            raise NotAGitRepositoryError("not inside a git worktree")
-
-        # Branch name should work even without an initial commit.
-        branch_proc = _git_run(["symbolic-ref", "--quiet", "--short", "HEAD"])
-        branch = (branch_proc.stdout or "").strip() if branch_proc.returncode == 0 else ""
-        if not branch:
-            # Detached HEAD or otherwise not resolvable.
-            sha_proc = _git_run(["rev-parse", "--short", "HEAD"])
-            sha = (sha_proc.stdout or "").strip() if sha_proc.returncode == 0 else ""
-            branch = f"detached@{sha}" if sha else "detached"
-
-        status = _run_git_checked(["status", "--porcelain=v1"]).rstrip("\n")
-        diff = _run_git_checked(["diff", "--staged", "--no-color"]).rstrip("\n")
+        repo = self._repo
+        if repo is None and (self._backend is None or self._submodules):
+            repo = RepoHandle.discover()
+        backend = self._backend
+        if backend is None:
+            assert repo is not None
+            backend = SubprocessGitBackend(repo)
+
+        status = backend.status(
+            self._pathspecs,
+            include_untracked=not self._monorepo,
+            optional_locks=not self._monorepo,
+        )
+        if self._monorepo:
+            status = summarize_status(status, max_chars=self._max_status_chars)
+        diff = backend.staged_diff(self._pathspecs)
 
         if not diff.strip():
             raise NoStagedChangesError("no staged diff")
 
+        staged_paths = staged_paths_from_diff(diff)
+        submodules: tuple[SubmoduleChange, ...] = ()
+        if self._submodules and repo is not None:
+            submodules = summarize_submodules(
+                gitlink_changes(diff),
+                root=repo.toplevel,
+                git=repo.git,
+                max_chars=self._max_submodule_chars,
+            )
         original_len = len(diff)
         diff_truncated = original_len > max_diff_chars
         if diff_truncated:
@@ -91,9 +196,11 @@ class GitContextCollector:
             diff += "\n\n[NOTE] The staged diff is truncated for performance.\n"
 
         return GitContext(
-            branch=branch,
+            branch=backend.branch(),
             status_porcelain=status,
             staged_diff=diff,
             diff_truncated=diff_truncated,
             original_diff_chars=original_len,
+            staged_paths=staged_paths,
+            submodules=submodules,
         )
@@ -0,0 +1,442 @@
+"""Local index of past commits used to retrieve few-shot examples.
+
+The index lives in `<git common dir>/sgc/history.sqlite3` and stores, per commit, its
+header line and a signature of path tokens (directory prefixes, file stems and
+extensions). An inverted token -> commit table makes retrieval a handful of indexed
+lookups regardless of history size. Commits are keyed by sha, and `git log` output is
+streamed into the database in batches.
+
+Updates are incremental: the index remembers the last indexed tip of every branch (and
+of each worktree's detached HEAD), and only logs commits that none of those tips
+reach. Switching between diverged branches or worktrees therefore only indexes
+commits that are new. When a branch is rewritten (rebase, reset, force-push), the
+commits only its old tip reached are pruned, so they are not offered as examples.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from functools import lru_cache
+import heapq
+import math
+from pathlib import Path
+import sqlite3
+import subprocess
+import threading
+import time
+
+from smart_git_commit.errors import NotAGitRepositoryError
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.semantic import DEFAULT_RULES, CommitRules, compile_rules
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    ct INTEGER NOT NULL,
+    ntokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (token TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    ct INTEGER NOT NULL,
+    commit_id INTEGER NOT NULL,
+    ntokens INTEGER NOT NULL,
+    PRIMARY KEY (token, ct, commit_id)
+) WITHOUT ROWID;
+"""
+
+# Commits touching more paths than this (mass renames, vendoring) only index a prefix.
+_MAX_PATHS_PER_COMMIT = 200
+# Keeps `sha IN (...)` lookups under SQLite's historical 999 bound-parameter limit.
+_INSERT_BATCH = 900
+# Batches per transaction; committing rarely keeps large builds write-efficient.
+_BATCHES_PER_COMMIT = 50
+# Per-token candidate cap; very common tokens only contribute their most recent commits.
+_MAX_POSTINGS_PER_TOKEN = 1000
+_MAX_DF_RATIO = 0.5
+# Meta keys holding the last indexed tip of a branch or detached HEAD.
+_TIP_PREFIX = "tip:"
+
+
+@lru_cache(maxsize=1 << 16)
+def path_tokens(path: str) -> frozenset[str]:
+    """Return the similarity tokens of a repository-relative path.
+
+    Example: `src/pkg/cli.py` -> `d:src`, `d:src/pkg`, `f:cli`, `e:py`. Results are
+    memoized since histories touch the same paths over and over.
+    """
+
+    *dirs, name = path.split("/")
+    tokens = {"d:" + "/".join(dirs[: i + 1]) for i in range(len(dirs))}
+    stem, dot, ext = name.rpartition(".")
+    if dot and stem:
+        tokens.add("f:" + stem)
+        tokens.add("e:" + ext)
+    else:
+        tokens.add("f:" + name)
+    return frozenset(tokens)
+
+
+def signature(paths: Iterable[str]) -> set[str]:
+    """Return the union of path tokens for a set of paths."""
+
+    tokens: set[str] = set()
+    for path in paths:
+        tokens |= path_tokens(path)
+    return tokens
+
+
+def _stream_git(repo: RepoHandle, args: list[str], *, idle_timeout_s: float) -> Iterator[str]:
+    """Yield stdout lines of `git <args>`; fail if git exits non-zero or stalls.
+
+    Full-history walks can legitimately take longer than any fixed timeout, so git is
+    only killed if it produces no output for `idle_timeout_s` (e.g. hung on a lock).
+
+    Raises:
+        NotAGitRepositoryError: If git is missing, fails or stalls.
+    """
+
+    try:
+        proc = subprocess.Popen(
+            [repo.git, *args],
+            cwd=repo.toplevel,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+        )
+    except FileNotFoundError as e:
+        raise NotAGitRepositoryError("git is not installed or not found in PATH") from e
+
+    assert proc.stdout is not None
+    last_output = time.monotonic()
+    stalled = threading.Event()
+    done = threading.Event()
+
+    def _watchdog() -> None:
+        while not done.wait(min(1.0, idle_timeout_s)):
+            if time.monotonic() - last_output > idle_timeout_s:
+                stalled.set()
+                proc.kill()
+                return
+
+    threading.Thread(target=_watchdog, name="sgc-git-watchdog", daemon=True).start()
+    try:
+        for line in proc.stdout:
+            last_output = time.monotonic()
+            yield line.rstrip("\n")
+    finally:
+        done.set()
+        proc.stdout.close()
+        stderr = proc.stderr.read() if proc.stderr is not None else ""
+        returncode = proc.wait()
+    if stalled.is_set():
+        raise NotAGitRepositoryError(f"git {args[0]} produced no output for {idle_timeout_s}s")
+    if returncode != 0:
+        raise NotAGitRepositoryError(stderr.strip() or f"git {args[0]} failed")
+
+
+def _iter_log(
+    repo: RepoHandle, rev: str, exclude: Iterable[str], *, idle_timeout_s: float = 10.0
+) -> Iterator[tuple[str, str, int, list[str]]]:
+    """Stream `(sha, subject, commit_time, paths)` of commits in `rev` but not `exclude`.
+
+    Excluded commits that no longer exist (e.g. pruned after a rewrite) are ignored.
+    """
+
+    args = ["-c", "core.quotePath=false", "log", "--no-merges", "--name-only"]
+    args += ["--ignore-missing", "--format=%x1e%H%x1f%ct%x1f%s", rev, "--not", *exclude, "--"]
+    current: tuple[str, str, int, list[str]] | None = None
+    for line in _stream_git(repo, args, idle_timeout_s=idle_timeout_s):
+        if line.startswith("\x1e"):
+            if current is not None:
+                yield current
+            sha, ct, subject = line[1:].split("\x1f", 2)
+            current = (sha, subject, int(ct), [])
+        elif line and current is not None and len(current[3]) < _MAX_PATHS_PER_COMMIT:
+            current[3].append(line)
+    if current is not None:
+        yield current
+
+
+def _is_ancestor(repo: RepoHandle, ancestor: str, rev: str, *, timeout_s: float = 10.0) -> bool:
+    """Return whether `ancestor` is reachable from `rev` (False if git fails)."""
+
+    try:
+        proc = subprocess.run(
+            [repo.git, "merge-base", "--is-ancestor", ancestor, rev],
+            cwd=repo.toplevel,
+            check=False,
+            capture_output=True,
+            timeout=timeout_s,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return proc.returncode == 0
+
+
+def _tip_key(repo: RepoHandle) -> str:
+    # Detached HEADs are per worktree; keying them by git dir keeps worktrees apart.
+    return _TIP_PREFIX + (repo.head_ref or f"detached:{repo.git_dir}")
+
+
+class HistoryIndex:
+    """On-disk commit history index for one repository.
+
+    Args:
+        path: SQLite database file (created on first use).
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=5.0)
+        # The index is a rebuildable cache: trade durability for write speed.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA cache_size=-65536")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def for_repo(cls, repo: RepoHandle) -> HistoryIndex:
+        """Open the index stored in the repository's common git directory."""
+
+        return cls(repo.common_dir / "sgc" / "history.sqlite3")
+
+    def close(self) -> None:
+        """Close the database."""
+
+        self._db.close()
+
+    def __enter__(self) -> HistoryIndex:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        row = self._db.execute("SELECT COUNT(*) FROM commits").fetchone()
+        return int(row[0])
+
+    def update(self, repo: RepoHandle) -> int:
+        """Index commits reachable from HEAD that are not indexed yet.
+
+        Args:
+            repo: Repository to read history from.
+
+        Returns:
+            Number of newly indexed commits.
+
+        Raises:
+            NotAGitRepositoryError: If git fails or stalls.
+        """
+
+        head = repo.resolve_head()
+        if not head:
+            return 0
+        key = _tip_key(repo)
+        tips = dict(
+            self._db.execute(
+                "SELECT key, value FROM meta WHERE key LIKE ?", (_TIP_PREFIX + "%",)
+            ).fetchall()
+        )
+        last = tips.pop(key, None)
+        if last == head:
+            return 0
+        if last is not None and _is_ancestor(repo, last, head):
+            tips[key] = last
+        elif last is not None:
+            # This branch was rewritten: drop what only its old tip reached.
+            self._prune(repo, last)
+
+        added = self._ingest(_iter_log(repo, head, tips.values()))
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, head))
+        return added
+
+    def _prune(self, repo: RepoHandle, old_tip: str) -> None:
+        """Delete indexed commits reachable from `old_tip` but from no ref or HEAD."""
+
+        args = ["rev-list", "--no-merges", "--ignore-missing", old_tip, "--not", "--all"]
+        try:
+            dropped = list(_stream_git(repo, args, idle_timeout_s=10.0))
+        except NotAGitRepositoryError:
+            # The old tip was garbage-collected; its commits can't be listed any more.
+            dropped = []
+        with self._db:
+            for start in range(0, len(dropped), _INSERT_BATCH):
+                self._delete(dropped[start : start + _INSERT_BATCH])
+
+    def _delete(self, shas: Sequence[str]) -> None:
+        db = self._db
+        marks = ",".join("?" * len(shas))
+        ids = [row[0] for row in db.execute(f"SELECT id FROM commits WHERE sha IN ({marks})", shas)]
+        if not ids:
+            return
+        marks = ",".join("?" * len(ids))
+        df = Counter(
+            token
+            for (token,) in db.execute(
+                f"SELECT token FROM postings WHERE commit_id IN ({marks})", ids
+            )
+        )
+        db.execute(f"DELETE FROM postings WHERE commit_id IN ({marks})", ids)
+        db.execute(f"DELETE FROM commits WHERE id IN ({marks})", ids)
+        db.executemany(
+            "UPDATE tokens SET df = df - ? WHERE token = ?", [(n, t) for t, n in df.items()]
+        )
+        db.execute("DELETE FROM tokens WHERE df <= 0")
+
+    def _ingest(self, records: Iterable[tuple[str, str, int, list[str]]]) -> int:
+        added = 0
+        pending = 0
+        batch: list[tuple[str, str, int, list[str]]] = []
+        with self._db:
+            for record in records:
+                batch.append(record)
+                if len(batch) < _INSERT_BATCH:
+                    continue
+                added += self._insert(batch)
+                batch = []
+                pending += 1
+                if pending >= _BATCHES_PER_COMMIT:
+                    self._db.commit()
+                    pending = 0
+            if batch:
+                added += self._insert(batch)
+        return added
+
+    def _insert(self, batch: Sequence[tuple[str, str, int, list[str]]]) -> int:
+        db = self._db
+        marks = ",".join("?" * len(batch))
+        known = {
+            row[0]
+            for row in db.execute(
+                f"SELECT sha FROM commits WHERE sha IN ({marks})", [r[0] for r in batch]
+            )
+        }
+        next_id = int(db.execute("SELECT COALESCE(MAX(id), 0) FROM commits").fetchone()[0]) + 1
+
+        commits: list[tuple[int, str, str, int, int]] = []
+        postings: list[tuple[str, int, int, int]] = []
+        df = Counter[str]()
+        for sha, subject, ct, paths in batch:
+            if sha in known:
+                continue
+            known.add(sha)
+            tokens = signature(paths)
+            commits.append((next_id, sha, subject, ct, len(tokens)))
+            postings.extend((token, ct, next_id, len(tokens)) for token in tokens)
+            df.update(tokens)
+            next_id += 1
+
+        db.executemany(
+            "INSERT INTO commits (id, sha, subject, ct, ntokens) VALUES (?, ?, ?, ?, ?)",
+            commits,
+        )
+        db.executemany(
+            "INSERT INTO postings (token, ct, commit_id, ntokens) VALUES (?, ?, ?, ?)",
+            postings,
+        )
+        db.executemany(
+            "INSERT INTO tokens (token, df) VALUES (?, ?) "
+            "ON CONFLICT(token) DO UPDATE SET df = df + excluded.df",
+            df.items(),
+        )
+        return len(commits)
+
+    def similar(self, paths: Iterable[str], *, limit: int = 3) -> list[str]:
+        """Return headers of past commits whose touched paths best match `paths`.
+
+        Commits are scored by the IDF-weighted overlap of path tokens, normalized by
+        the size of each commit's signature; ties favor more recent commits.
+
+        Args:
+            paths: Repository-relative paths of the change being described.
+            limit: Maximum number of headers to return.
+
+        Returns:
+            Distinct commit headers, best match first.
+        """
+
+        total = len(self)
+        if not total or limit <= 0:
+            return []
+
+        scores: dict[int, float] = {}
+        meta: dict[int, tuple[int, int]] = {}
+        for token in signature(paths):
+            row = self._db.execute("SELECT df FROM tokens WHERE token = ?", (token,)).fetchone()
+            # Tokens present in most commits (e.g. a file extension) carry no signal.
+            if row is None or row[0] > total * _MAX_DF_RATIO:
+                continue
+            idf = math.log(1 + total / row[0])
+            rows = self._db.execute(
+                "SELECT commit_id, ct, ntokens FROM postings WHERE token = ? "
+                "ORDER BY ct DESC LIMIT ?",
+                (token, _MAX_POSTINGS_PER_TOKEN),
+            )
+            for commit_id, ct, ntokens in rows:
+                scores[commit_id] = scores.get(commit_id, 0.0) + idf
+                meta[commit_id] = (ct, ntokens)
+        if not scores:
+            return []
+
+        def _rank(commit_id: int) -> tuple[float, int]:
+            ct, ntokens = meta[commit_id]
+            return scores[commit_id] / math.sqrt(max(1, ntokens)), ct
+
+        best = heapq.nlargest(limit * 4, scores, key=_rank)
+        marks = ",".join("?" * len(best))
+        subjects = dict(
+            self._db.execute(f"SELECT id, subject FROM commits WHERE id IN ({marks})", best)
+        )
+        out: list[str] = []
+        for commit_id in best:
+            subject = subjects.get(commit_id)
+            if subject and subject not in out:
+                out.append(subject)
+            if len(out) >= limit:
+                break
+        return out
+
+
+def similar_commit_headers(
+    repo: RepoHandle,
+    paths: Sequence[str],
+    *,
+    limit: int = 3,
+    rules: CommitRules = DEFAULT_RULES,
+) -> list[str]:
+    """Update the repository's history index and return valid headers of similar commits.
+
+    This is best-effort: index or git failures yield no examples instead of an error.
+
+    Args:
+        repo: Repository to index.
+        paths: Paths of the staged change.
+        limit: Maximum number of headers.
+        rules: Only headers passing these rules are returned.
+
+    Returns:
+        Up to `limit` commit headers, best match first.
+    """
+
+    if limit <= 0 or not paths:
+        return []
+    check = compile_rules(rules).check
+    try:
+        with HistoryIndex.for_repo(repo) as index:
+            index.update(repo)
+            candidates = index.similar(paths, limit=limit * 4)
+    except (sqlite3.Error, OSError, NotAGitRepositoryError):
+        return []
+    return [header for header in candidates if check(header) is None][:limit]
@@ -0,0 +1,174 @@
+"""Bulk validation of existing commit messages (`sgc lint`)."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain, islice
+import multiprocessing
+import subprocess
+
+from smart_git_commit.errors import NotAGitRepositoryError
+from smart_git_commit.semantic import DEFAULT_RULES, CommitRules, compile_rules
+
+
+_READ_CHUNK = 1 << 20
+_BATCH_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class LintIssue:
+    """A commit whose message failed validation.
+
+    Attributes:
+        sha: Commit id.
+        header: First line of the message.
+        error: Validation error.
+    """
+
+    sha: str
+    header: str
+    error: str
+
+
+@dataclass
+class LintReport:
+    """Result of linting a stream of commit messages.
+
+    Attributes:
+        checked: Number of messages validated.
+        issues: Invalid messages, in input order.
+    """
+
+    checked: int = 0
+    issues: list[LintIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether every message was valid."""
+
+        return not self.issues
+
+    def to_dict(self) -> dict[str, object]:
+        """Return a JSON-serializable representation."""
+
+        return {
+            "checked": self.checked,
+            "invalid": len(self.issues),
+            "issues": [
+                {"sha": i.sha, "header": i.header, "error": i.error} for i in self.issues
+            ],
+        }
+
+
+def iter_commit_messages(
+    rev_range: str, *, git: str = "git", include_merges: bool = False
+) -> Iterator[tuple[str, str]]:
+    """Stream `(sha, message)` pairs for a revision range from a single `git log`.
+
+    Records are NUL-separated (`git log -z`) and parsed incrementally, so memory use is
+    bounded by the largest single message rather than the size of the range.
+
+    Args:
+        rev_range: Revision range understood by `git log` (e.g. `origin/main..HEAD`).
+        git: Git executable.
+        include_merges: Also yield merge commits (skipped by default).
+
+    Raises:
+        NotAGitRepositoryError: If `git log` cannot be run or fails.
+    """
+
+    args = [git, "log", "-z", "--format=%H%n%B"]
+    if not include_merges:
+        args.append("--no-merges")
+    args += [rev_range, "--"]
+    try:
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise NotAGitRepositoryError("git is not installed or not found in PATH") from e
+
+    assert proc.stdout is not None
+    pending = b""
+    try:
+        while chunk := proc.stdout.read(_READ_CHUNK):
+            records = (pending + chunk).split(b"\0")
+            pending = records.pop()
+            for record in records:
+                yield _parse_record(record)
+        if pending.strip():
+            yield _parse_record(pending)
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read() if proc.stderr is not None else b""
+        returncode = proc.wait()
+    if returncode != 0:
+        message = stderr.decode("utf-8", errors="replace").strip()
+        raise NotAGitRepositoryError(message or f"git log {rev_range!r} failed")
+
+
+def _parse_record(record: bytes) -> tuple[str, str]:
+    text = record.decode("utf-8", errors="replace").lstrip("\n")
+    sha, _, message = text.partition("\n")
+    return sha, message
+
+
+def _check_batch(batch: list[tuple[str, str]], rules: CommitRules) -> list[LintIssue]:
+    check = compile_rules(rules).check
+    issues = []
+    for sha, message in batch:
+        error = check(message)
+        if error is not None:
+            header = message.partition("\n")[0].strip()
+            issues.append(LintIssue(sha=sha, header=header, error=error))
+    return issues
+
+
+def _batches(items: Iterable[tuple[str, str]], size: int) -> Iterator[list[tuple[str, str]]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def lint_messages(
+    items: Iterable[tuple[str, str]],
+    *,
+    rules: CommitRules = DEFAULT_RULES,
+    jobs: int = 1,
+    batch_size: int = _BATCH_SIZE,
+) -> LintReport:
+    """Validate `(sha, message)` pairs, optionally in a process pool.
+
+    Messages are validated in batches; only failures cross the process boundary. If the
+    input fits in a single batch, it is validated in-process to skip pool startup.
+
+    Args:
+        items: `(sha, message)` pairs, e.g. from `iter_commit_messages`.
+        rules: Commit rules to validate against.
+        jobs: Worker processes; `1` validates in the calling process.
+        batch_size: Messages per batch sent to a worker.
+
+    Returns:
+        A LintReport.
+    """
+
+    report = LintReport()
+    batches = _batches(items, batch_size)
+    head = list(islice(batches, 2))
+    stream = chain(head, batches)
+
+    if jobs <= 1 or len(head) < 2:
+        for batch in stream:
+            report.checked += len(batch)
+            report.issues.extend(_check_batch(batch, rules))
+        return report
+
+    def _counted() -> Iterator[list[tuple[str, str]]]:
+        for batch in stream:
+            report.checked += len(batch)
+            yield batch
+
+    with multiprocessing.Pool(processes=jobs) as pool:
+        for issues in pool.imap(partial(_check_batch, rules=rules), _counted()):
+            report.issues.extend(issues)
+    return report
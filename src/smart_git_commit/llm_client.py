@@ -3,13 +3,25 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-
+import json
+from pathlib import Path
+from typing import Any
 from urllib.parse import urlparse
 
 import httpx
 
-from smart_git_commit.config import LlmConfig
+from smart_git_commit.cassette import cassette_transport
+from smart_git_commit.config import LlmConfig, user_cache_dir
 from smart_git_commit.errors import LlmRequestError
+from smart_git_commit.ratelimit import RateLimitScheduler
+
+
+# Retries of a 429 response when a scheduler is attached (each waits as instructed).
+_MAX_RATE_LIMIT_RETRIES = 3
+
+# Structured-output mechanisms, in the order they are probed.
+STRUCTURED_MODES: tuple[str, ...] = ("json_schema", "tools")
+_UNSUPPORTED = "none"
 
 
 @dataclass(frozen=True)
@@ -43,14 +55,87 @@ def _normalize_base_url(base_url: str) -> str:
     return base
 
 
+class CapabilityCache:
+    """Structured-output support per endpoint and model, persisted as a JSON file.
+
+    Values are one of `STRUCTURED_MODES` or `"none"`. Without a path the cache only
+    lives in memory. I/O errors are ignored; the worst case is probing again.
+
+    Args:
+        path: JSON file to load from and save to, or None.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._path = path
+        self._data: dict[str, str] | None = None
+
+    @classmethod
+    def default(cls) -> CapabilityCache:
+        """Create a cache stored in the user cache directory."""
+
+        try:
+            return cls(user_cache_dir() / "capabilities.json")
+        except RuntimeError:  # No home directory to derive the cache directory from.
+            return cls()
+
+    def _load(self) -> dict[str, str]:
+        if self._data is None:
+            self._data = {}
+            if self._path is not None:
+                try:
+                    data = json.loads(self._path.read_text(encoding="utf-8"))
+                    if isinstance(data, dict):
+                        self._data = {k: v for k, v in data.items() if isinstance(v, str)}
+                except (OSError, ValueError):
+                    pass
+        return self._data
+
+    def get(self, key: str) -> str | None:
+        """Return the recorded capability for `key`, if any."""
+
+        return self._load().get(key)
+
+    def set(self, key: str, value: str | None) -> None:
+        """Record (or with None, forget) the capability for `key`."""
+
+        data = self._load()
+        if value is None:
+            data.pop(key, None)
+        else:
+            data[key] = value
+        if self._path is None:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(self._path)
+        except OSError:
+            pass
+
+
 class ChatCompletionsClient:
     """A minimal client that speaks OpenAI-compatible Chat Completions."""
 
-    def __init__(self, *, base_url: str, api_key: str, timeout_s: float) -> None:
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        api_key: str,
+        timeout_s: float,
+        scheduler: RateLimitScheduler | None = None,
+        capabilities: CapabilityCache | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
         self._base_url = _normalize_base_url(base_url)
+        self._scheduler = scheduler
+        self._capabilities = capabilities or CapabilityCache()
+        # Whether the server honors `n` (None until the first multi-choice request).
+        self._supports_n: bool | None = None
         self._client = httpx.Client(
             base_url=self._base_url,
             timeout=httpx.Timeout(timeout_s),
+            transport=transport,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
@@ -59,9 +144,43 @@ class ChatCompletionsClient:
 
     @classmethod
     def from_config(cls, cfg: LlmConfig) -> "ChatCompletionsClient":
-        """Create a client from config."""
+        """Create a client from config.
 
-        return cls(base_url=cfg.base_url, api_key=cfg.api_key, timeout_s=cfg.timeout_s)
+        Raises:
+            CassetteError: If a cassette is configured with an unknown mode or cannot be loaded.
+        """
+
+        scheduler = (
+            RateLimitScheduler.default(max_wait_s=cfg.rate_limit_wait_s)
+            if cfg.rate_limit_wait_s > 0
+            else None
+        )
+        capabilities = CapabilityCache.default()
+        transport = None
+        if cfg.cassette:
+            transport = cassette_transport(
+                Path(cfg.cassette),
+                cfg.cassette_mode,
+                secret=cfg.api_key,
+                latency=cfg.cassette_latency,
+            )
+            # Cassettes must not depend on (or leak into) state shared with live runs:
+            # capability probes are recorded and replayed, and replayed limits are not real.
+            # Replay keeps the retry loop so recorded 429s are retried as they were live,
+            # but without shared state or actual waiting.
+            capabilities = CapabilityCache()
+            if cfg.cassette_mode == "replay" and scheduler is not None:
+                scheduler = RateLimitScheduler(
+                    None, max_wait_s=cfg.rate_limit_wait_s, sleep=lambda _: None
+                )
+        return cls(
+            base_url=cfg.base_url,
+            api_key=cfg.api_key,
+            timeout_s=cfg.timeout_s,
+            scheduler=scheduler,
+            capabilities=capabilities,
+            transport=transport,
+        )
 
     def close(self) -> None:
         """Close the underlying HTTP client."""
@@ -74,6 +193,52 @@ class ChatCompletionsClient:
     def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
         self.close()
 
+    def _post(self, payload: dict[str, object], *, key: str, tokens: int) -> httpx.Response:
+        attempt = 0
+        while True:
+            if self._scheduler is not None:
+                self._scheduler.acquire(key, tokens)
+            try:
+                resp = self._client.post("/chat/completions", json=payload)
+            except httpx.TimeoutException as e:
+                raise LlmRequestError(
+                    "Request timed out. Try increasing --timeout-s or reducing --max-diff-chars."
+                ) from e
+            except httpx.HTTPError as e:
+                raise LlmRequestError(f"HTTP request failed: {e}") from e
+
+            if self._scheduler is None:
+                return resp
+            retry_in = self._scheduler.observe(key, resp.headers, resp.status_code)
+            if resp.status_code != 429 or retry_in is None or attempt >= _MAX_RATE_LIMIT_RETRIES:
+                return resp
+            # The scheduler blocks the next acquire until the provider's retry time.
+            attempt += 1
+
+    def _complete(
+        self,
+        *,
+        model: str,
+        messages: list[ChatMessage],
+        max_tokens: int,
+        temperature: float,
+        n: int = 1,
+        extra: dict[str, object] | None = None,
+    ) -> httpx.Response:
+        payload: dict[str, object] = {
+            "model": model,
+            "messages": [{"role": m.role, "content": m.content} for m in messages],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if n > 1:
+            payload["n"] = n
+        if extra:
+            payload.update(extra)
+        # Rough token cost for rate-limit pacing: ~4 characters per token plus max output.
+        tokens = sum(len(m.content) for m in messages) // 4 + max_tokens * n
+        return self._post(payload, key=f"{self._base_url}|{model}", tokens=tokens)
+
     def create(
         self,
         *,
@@ -94,49 +259,214 @@ class ChatCompletionsClient:
             The assistant message content.
         """
 
-        payload = {
-            "model": model,
-            "messages": [{"role": m.role, "content": m.content} for m in messages],
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
+        resp = self._complete(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+        )
+        _raise_for_status(resp)
+        contents = _choice_contents(resp)
+        if not contents:
+            raise LlmRequestError("Empty response from LLM server.")
+        return contents[0]
 
-        try:
-            resp = self._client.post("/chat/completions", json=payload)
-        except httpx.TimeoutException as e:
-            raise LlmRequestError(
-                "Request timed out. Try increasing --timeout-s or reducing --max-diff-chars."
-            ) from e
-        except httpx.HTTPError as e:
-            raise LlmRequestError(f"HTTP request failed: {e}") from e
-
-        if resp.status_code >= 400:
-            detail = ""
-            try:
-                data = resp.json()
-                detail = str(data.get("error") or data)
-            except Exception:
-                detail = (resp.text or "").strip()
-
-            url = str(resp.request.url)
-            hint = (
-                "If you are using a non-OpenAI provider, ensure --base-url/SGC_BASE_URL points to the API prefix "
-                "that contains `/chat/completions`."
+    def create_many(
+        self,
+        *,
+        model: str,
+        messages: list[ChatMessage],
+        max_tokens: int,
+        temperature: float,
+        n: int,
+    ) -> list[str]:
+        """Create up to `n` alternative completions, in a single request when possible.
+
+        The `n` parameter is sent once per client; providers that reject it (HTTP 400)
+        or return fewer choices are topped up with sequential `create` calls, and later
+        calls on this client go sequential right away. If the first sequential call
+        fails too, the 400 was not about `n` and is raised.
+
+        Args:
+            model: Model name.
+            messages: Chat messages.
+            max_tokens: Max output tokens per choice.
+            temperature: Sampling temperature.
+            n: Number of completions wanted.
+
+        Returns:
+            Non-empty assistant contents, in the order the server returned them.
+
+        Raises:
+            LlmRequestError: If the request fails for a reason other than `n`.
+        """
+
+        contents: list[str] = []
+        if n > 1 and self._supports_n is not False:
+            resp = self._complete(
+                model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, n=n
             )
-            suffix = f" {detail}" if detail else ""
-            raise LlmRequestError(
-                f"LLM request failed ({resp.status_code}) at {url}:{suffix}\n{hint}"
+            if resp.status_code == 400:
+                # Either `n` is unsupported or the request itself is bad (e.g. too long).
+                # One plain request tells them apart; a bad request reports the original
+                # error instead of being sent again n times.
+                try:
+                    contents.append(
+                        self.create(
+                            model=model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                        )
+                    )
+                except LlmRequestError:
+                    _raise_for_status(resp)
+                    raise
+                self._supports_n = False
+            else:
+                _raise_for_status(resp)
+                contents = _choice_contents(resp)
+                self._supports_n = len(contents) >= n
+
+        while len(contents) < n:
+            contents.append(
+                self.create(
+                    model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+                )
             )
+        return contents
 
-        try:
-            data = resp.json()
-            choices = data["choices"]
-            message = choices[0]["message"]
-            content = message.get("content")
-        except Exception as e:
-            raise LlmRequestError("Invalid response schema from LLM server.") from e
-
-        if not isinstance(content, str) or not content.strip():
-            raise LlmRequestError("Empty response from LLM server.")
+    def create_structured(
+        self,
+        *,
+        model: str,
+        messages: list[ChatMessage],
+        max_tokens: int,
+        temperature: float,
+        schema: dict[str, Any],
+        name: str,
+    ) -> dict[str, Any] | str | None:
+        """Create a completion constrained to a JSON schema and return the parsed object.
+
+        The endpoint's supported mechanism (`response_format` JSON schema, then a forced
+        function/tool call) is probed once and remembered in the capability cache, so
+        endpoints without structured output cost no extra request after the first run.
+        Endpoints that ignore the parameters and answer in plain text are recorded as
+        unsupported, and that answer is returned instead of being thrown away. When both
+        mechanisms are rejected with 400/422, a one-token plain request confirms that the
+        parameters (not the prompt) were the problem before that is recorded.
+
+        Args:
+            model: Model name.
+            messages: Chat messages.
+            max_tokens: Max output tokens.
+            temperature: Sampling temperature.
+            schema: JSON schema of the object to return.
+            name: Schema / function name.
+
+        Returns:
+            The parsed object; the plain-text answer if the endpoint ignored the
+            structured parameters; or None if it rejected them (the caller should fall
+            back to `create`).
+        """
 
-        return content.strip()
+        key = f"{self._base_url}|{model}"
+        known = self._capabilities.get(key)
+        if known == _UNSUPPORTED:
+            return None
+        modes = (known,) if known in STRUCTURED_MODES else STRUCTURED_MODES
+
+        rejected = False
+        for mode in modes:
+            resp = self._complete(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                extra=_structured_params(mode, schema, name),
+            )
+            fields = None
+            # 400/422: the provider may reject the parameters; anything else is a real error.
+            rejected = resp.status_code in (400, 422)
+            if not rejected:
+                _raise_for_status(resp)
+                fields = _structured_fields(resp, mode)
+                if fields is None and (contents := _choice_contents(resp)):
+                    # Parameters ignored, but the text answer is still usable.
+                    self._capabilities.set(key, None if known else _UNSUPPORTED)
+                    return contents[0]
+            if fields is not None:
+                if known != mode:
+                    self._capabilities.set(key, mode)
+                return fields
+
+        if rejected:
+            # A 400/422 may also mean the request itself is bad (e.g. context length
+            # exceeded). Only remember the outcome once the same prompt without the
+            # structured parameters is accepted; the caller's plain request reports the
+            # error otherwise.
+            probe = self._complete(
+                model=model, messages=messages, max_tokens=1, temperature=temperature
+            )
+            if probe.status_code >= 400:
+                return None
+        # A remembered mode that stopped working is forgotten and probed again next time.
+        self._capabilities.set(key, None if known else _UNSUPPORTED)
+        return None
+
+
+def _structured_params(mode: str, schema: dict[str, Any], name: str) -> dict[str, object]:
+    if mode == "json_schema":
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": name, "schema": schema, "strict": True},
+            }
+        }
+    return {
+        "tools": [{"type": "function", "function": {"name": name, "parameters": schema}}],
+        "tool_choice": {"type": "function", "function": {"name": name}},
+    }
+
+
+def _structured_fields(resp: httpx.Response, mode: str) -> dict[str, Any] | None:
+    """Return the JSON object carried by a structured response, or None if absent."""
+
+    try:
+        message = resp.json()["choices"][0]["message"]
+        if mode == "json_schema":
+            raw = message.get("content")
+        else:
+            raw = message["tool_calls"][0]["function"]["arguments"]
+        fields = json.loads(raw) if isinstance(raw, str) else raw
+    except (ValueError, LookupError, TypeError, AttributeError):
+        return None
+    return fields if isinstance(fields, dict) else None
+
+
+def _raise_for_status(resp: httpx.Response) -> None:
+    if resp.status_code < 400:
+        return
+    detail = ""
+    try:
+        data = resp.json()
+        detail = str(data.get("error") or data)
+    except Exception:
+        detail = (resp.text or "").strip()
+
+    url = str(resp.request.url)
+    hint = (
+        "If you are using a non-OpenAI provider, ensure --base-url/SGC_BASE_URL points to the "
+        "API prefix that contains `/chat/completions`."
+    )
+    suffix = f" {detail}" if detail else ""
+    raise LlmRequestError(f"LLM request failed ({resp.status_code}) at {url}:{suffix}\n{hint}")
+
+
+def _choice_contents(resp: httpx.Response) -> list[str]:
+    """Return the stripped, non-empty contents of all choices in a response."""
+
+    try:
+        data = resp.json()
+        choices = data["choices"]
+        contents = [choice["message"].get("content") for choice in choices]
+    except Exception as e:
+        raise LlmRequestError("Invalid response schema from LLM server.") from e
+    return [c.strip() for c in contents if isinstance(c, str) and c.strip()]
@@ -0,0 +1,127 @@
+"""The generation pipeline shared by `sgc` and `sgc watch`.
+
+Heavier modules (history index, scope map, HTTP client) are imported when a stage
+runs, so importing this module stays cheap for the CLI.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from smart_git_commit.config import LlmConfig
+from smart_git_commit.git_context import GitContext
+from smart_git_commit.profiling import phase
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.rules import load_commit_rules
+from smart_git_commit.semantic import CommitRules
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """Options that shape the prompt and the output.
+
+    Attributes:
+        monorepo: Cheap status collection (no untracked scan, summarized).
+        pathspecs: Restrict status/diff collection to these pathspecs.
+        examples: Few-shot examples from similar past commits (0 disables).
+        infer_scope: Infer the scope locally from staged paths.
+        git_backend: Git backend name.
+        candidates: Alternatives to request in one call.
+        structured: Prefer schema-constrained output.
+        submodules: Summarize the commits behind staged submodule bumps.
+    """
+
+    monorepo: bool = False
+    pathspecs: tuple[str, ...] = ()
+    examples: int = 0
+    infer_scope: bool = False
+    git_backend: str = "subprocess"
+    candidates: int = 1
+    structured: bool = False
+    submodules: bool = False
+
+
+@dataclass(frozen=True)
+class PreparedContext:
+    """Everything the prompt is built from.
+
+    Attributes:
+        context: Collected git context.
+        rules: Repository commit rules.
+        examples: Headers of similar past commits.
+        scope_hints: Locally inferred scopes, most likely first.
+    """
+
+    context: GitContext
+    rules: CommitRules
+    examples: tuple[str, ...] = ()
+    scope_hints: tuple[str, ...] = ()
+
+
+def prepare_context(
+    repo: RepoHandle | None, cfg: LlmConfig, opts: PipelineOptions
+) -> PreparedContext:
+    """Collect git context, rules, few-shot examples and scope hints.
+
+    Raises:
+        NotAGitRepositoryError: If not inside a git worktree.
+        NoStagedChangesError: If nothing is staged.
+        GitBackendUnavailableError: If the git backend cannot be used.
+        RulesConfigError: If the commit rules or scope overrides are invalid.
+    """
+
+    from smart_git_commit.git_backend import create_git_backend
+    from smart_git_commit.git_context import GitContextCollector
+    from smart_git_commit.history import similar_commit_headers
+    from smart_git_commit.scopes import ScopeMap
+
+    backend = create_git_backend(opts.git_backend, repo) if repo is not None else None
+    collector = GitContextCollector(
+        repo=repo,
+        backend=backend,
+        monorepo=opts.monorepo,
+        pathspecs=opts.pathspecs,
+        submodules=opts.submodules,
+    )
+    with phase("collect"):
+        context = collector.collect(max_diff_chars=cfg.max_diff_chars)
+    rules = load_commit_rules(repo.toplevel if repo is not None else None)
+    few_shot = (
+        similar_commit_headers(repo, context.staged_paths, limit=opts.examples, rules=rules)
+        if repo is not None
+        else []
+    )
+    scope_hints: list[str] = []
+    if opts.infer_scope and repo is not None and context.staged_paths:
+        scope_hints = ScopeMap.for_repo(repo).infer(context.staged_paths)
+        if rules.scopes:
+            scope_hints = [s for s in scope_hints if s in rules.scopes]
+    return PreparedContext(
+        context=context, rules=rules, examples=tuple(few_shot), scope_hints=tuple(scope_hints)
+    )
+
+
+def generate_messages(
+    prepared: PreparedContext, cfg: LlmConfig, opts: PipelineOptions
+) -> list[str]:
+    """Generate validated commit messages for a prepared context, best first.
+
+    Raises:
+        InvalidCommitMessageError: If no output can be validated.
+        LlmRequestError: If the LLM request fails.
+    """
+
+    from smart_git_commit.commit_message import generate_commit_candidates
+    from smart_git_commit.llm_client import ChatCompletionsClient
+
+    with ChatCompletionsClient.from_config(cfg) as client:
+        return generate_commit_candidates(
+            client=client,
+            context=prepared.context,
+            cfg=cfg,
+            rules=prepared.rules,
+            examples=prepared.examples,
+            scope_hints=prepared.scope_hints,
+            n=opts.candidates,
+            structured=opts.structured,
+        )
@@ -0,0 +1,354 @@
+"""Speculative pre-generation of commit messages (`sgc watch`).
+
+The watcher waits for `.git/index` to change (inotify on Linux, stat polling
+elsewhere) and debounces bursts of writes. It then runs the pipeline in a background
+process for the staged tree. Results are stored in `<git dir>/sgc/pregen.json` under a
+key made of the staged changes, HEAD, the branch and every option that shapes the
+prompt. A later `sgc` with the same options and index prints the stored message
+instead of calling the model.
+
+The key is computed without writing to the repository (see `staged_signature`), and
+speculation runs git with optional locks disabled, so the watcher does not trigger
+itself by touching the index.
+
+When the staged tree changes again, speculation still running for the old tree is
+terminated. Index rewrites that don't change the tree (e.g. `git status` refreshing
+stat data) leave it running. Speculation holds the single-flight lock for its key
+(see `smart_git_commit.singleflight`), so an `sgc` started while it runs waits for
+its result.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import ctypes
+import ctypes.util
+from dataclasses import asdict
+import hashlib
+import json
+import multiprocessing
+from multiprocessing.process import BaseProcess
+import os
+from pathlib import Path
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+
+from smart_git_commit.config import LlmConfig
+from smart_git_commit.errors import SgcError
+from smart_git_commit.pipeline import PipelineOptions, generate_messages, prepare_context
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.rules import load_commit_rules
+
+
+# Stored results kept per repository (newest first).
+_MAX_ENTRIES = 16
+
+# inotify(7) constants.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def staged_signature(repo: RepoHandle, *, timeout_s: float = 10.0) -> str:
+    """Return a digest of the staged changes, or "" if the index has conflicts.
+
+    Together with HEAD this identifies the staged tree. It is computed read-only from
+    `git diff --cached --raw` (full object ids) with optional locks disabled, so it
+    never takes `index.lock`, rewrites the index or writes objects. That matters when
+    `sgc` runs from a hook during `git commit`, or from the watcher reacting to index
+    writes.
+    """
+
+    try:
+        proc = subprocess.run(
+            [repo.git, "diff", "--cached", "--raw", "-z", "--no-abbrev", "--no-renames"],
+            cwd=repo.toplevel,
+            env={**os.environ, "GIT_OPTIONAL_LOCKS": "0"},
+            check=False,
+            capture_output=True,
+            timeout=timeout_s,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    if proc.returncode != 0:
+        return ""
+    # Records are ":<modes> <ids> <status>\0<path>\0"; unmerged entries have status U.
+    if any(
+        field.startswith(b":") and field.endswith(b" U") for field in proc.stdout.split(b"\0")
+    ):
+        return ""
+    return hashlib.sha256(proc.stdout).hexdigest()
+
+
+def pregen_key(repo: RepoHandle, cfg: LlmConfig, opts: PipelineOptions) -> str:
+    """Return the store key for the current index and options ("" if unavailable).
+
+    Raises:
+        RulesConfigError: If the repository's commit rules are invalid.
+    """
+
+    staged = staged_signature(repo)
+    if not staged:
+        return ""
+    parts: list[Any] = [
+        staged,
+        repo.resolve_head(),
+        repo.branch,
+        cfg.base_url,
+        cfg.model,
+        cfg.max_tokens,
+        cfg.temperature,
+        cfg.max_diff_chars,
+        asdict(opts),
+        repr(load_commit_rules(repo.toplevel)),
+    ]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PregenStore:
+    """Pre-generated messages keyed by `pregen_key`, stored as JSON.
+
+    Args:
+        path: Store file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @classmethod
+    def for_repo(cls, repo: RepoHandle) -> PregenStore:
+        """Open the store in the repository's (per-worktree) git directory."""
+
+        return cls(repo.git_dir / "sgc" / "pregen.json")
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key: str) -> list[str] | None:
+        """Return the messages stored for `key`, best first, if any."""
+
+        entry = self._load().get(key) if key else None
+        messages = entry.get("messages") if isinstance(entry, dict) else None
+        if isinstance(messages, list) and messages and all(isinstance(m, str) for m in messages):
+            return messages
+        return None
+
+    def put(self, key: str, messages: list[str]) -> None:
+        """Store `messages` for `key`, evicting the oldest entries beyond a small cap."""
+
+        data = self._load()
+        data[key] = {"messages": messages, "created": time.time()}
+        newest = sorted(data.items(), key=lambda kv: -float(kv[1].get("created", 0)))
+        data = dict(newest[:_MAX_ENTRIES])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class IndexWatcher:
+    """Wait for changes of a git index file.
+
+    Uses inotify on the index's directory when available (git replaces the index by
+    renaming `index.lock`), otherwise polls the file's stat signature.
+
+    Args:
+        index_path: Index file to watch.
+        poll_interval_s: Polling period when inotify is unavailable.
+        force_polling: Poll even if inotify is available.
+    """
+
+    def __init__(
+        self, index_path: Path, *, poll_interval_s: float = 0.5, force_polling: bool = False
+    ) -> None:
+        self._path = index_path
+        self._poll_interval_s = poll_interval_s
+        self._signature = self._stat()
+        self._fd = -1 if force_polling else _inotify_watch(index_path.parent)
+
+    @property
+    def uses_inotify(self) -> bool:
+        """Whether inotify is in use."""
+
+        return self._fd >= 0
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> IndexWatcher:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        try:
+            st = self._path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def wait(self, timeout_s: float) -> bool:
+        """Wait up to `timeout_s` for the index to change.
+
+        Returns:
+            True if the index changed.
+        """
+
+        if self._fd >= 0:
+            return self._wait_inotify(timeout_s)
+        deadline = time.monotonic() + timeout_s
+        while True:
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self._poll_interval_s, remaining))
+
+    def _wait_inotify(self, timeout_s: float) -> bool:
+        deadline = time.monotonic() + timeout_s
+        name = self._path.name.encode()
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            data = os.read(self._fd, 64 * 1024)
+            offset = 0
+            changed = False
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                start = offset + _EVENT_HEADER.size
+                changed |= data[start : start + length].rstrip(b"\0") == name
+                offset = start + length
+            if changed:
+                self._signature = self._stat()
+                return True
+
+
+def _inotify_watch(directory: Path) -> int:
+    """Return an inotify descriptor watching `directory`, or -1 if unavailable."""
+
+    if not sys.platform.startswith("linux"):
+        return -1
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return -1
+    if fd < 0:
+        return -1
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return -1
+    return fd
+
+
+def _speculate(repo: RepoHandle, cfg: LlmConfig, opts: PipelineOptions, key: str) -> None:
+    """Background-process entry point: generate and store messages for `key`."""
+
+    from smart_git_commit.singleflight import SingleFlight
+
+    # `git status` would otherwise refresh and rewrite the index, waking the watcher.
+    os.environ["GIT_OPTIONAL_LOCKS"] = "0"
+    try:
+        # Hold the single-flight lock so an `sgc` started meanwhile waits for this result.
+        messages = SingleFlight.for_repo(repo).run(
+            key, lambda: generate_messages(prepare_context(repo, cfg, opts), cfg, opts)
+        )
+    except (SgcError, KeyboardInterrupt):
+        # Nothing staged, invalid output, provider errors, Ctrl+C: nothing to store.
+        return
+    PregenStore.for_repo(repo).put(key, messages)
+
+
+def watch(
+    repo: RepoHandle,
+    cfg: LlmConfig,
+    opts: PipelineOptions,
+    *,
+    debounce_s: float = 1.0,
+    poll_interval_s: float = 0.5,
+    force_polling: bool = False,
+    stop: threading.Event | None = None,
+    log: Callable[[str], None] = lambda message: None,
+) -> None:
+    """Pre-generate messages whenever the staged tree changes, until `stop` is set.
+
+    Args:
+        repo: Repository to watch.
+        cfg: LLM config used for generation.
+        opts: Pipeline options; `sgc` must be run with the same ones to reuse results.
+        debounce_s: Quiet period after the last index write before generating.
+        poll_interval_s: Polling period when inotify is unavailable.
+        force_polling: Poll even if inotify is available.
+        stop: Event that ends the loop (default: run until interrupted).
+        log: Progress callback.
+    """
+
+    stop = stop or threading.Event()
+    store = PregenStore.for_repo(repo)
+    mp = multiprocessing.get_context("spawn")
+    running: tuple[str, BaseProcess] | None = None
+    dirty = True  # Generate for the current index on startup.
+
+    with IndexWatcher(
+        repo.git_dir / "index", poll_interval_s=poll_interval_s, force_polling=force_polling
+    ) as watcher:
+        mode = "inotify" if watcher.uses_inotify else "polling"
+        log(f"Watching {repo.git_dir / 'index'} ({mode}).")
+        try:
+            while not stop.is_set():
+                if dirty:
+                    dirty = False
+                    # Branch switches and commits change HEAD, which is part of the key
+                    # and of the prompt.
+                    repo = repo.reread_head()
+                    key = pregen_key(repo, cfg, opts)
+                    if running is not None and running[0] != key and running[1].is_alive():
+                        running[1].terminate()
+                        running[1].join()
+                        log("Staged tree changed; canceled stale generation.")
+                        running = None
+                    if key and store.get(key) is None and (running is None or running[0] != key):
+                        process = mp.Process(
+                            target=_speculate, args=(repo, cfg, opts, key), daemon=True
+                        )
+                        process.start()
+                        running = (key, process)
+                        log("Generating for the staged tree...")
+
+                if running is not None and not running[1].is_alive():
+                    running[1].join()
+                    if store.get(running[0]) is not None:
+                        log("Commit message ready.")
+                    running = None
+
+                if watcher.wait(poll_interval_s):
+                    # Debounce: wait until the index has been quiet for `debounce_s`.
+                    while not stop.is_set() and watcher.wait(debounce_s):
+                        pass
+                    dirty = True
+        finally:
+            if running is not None and running[1].is_alive():
+                running[1].terminate()
+                running[1].join()
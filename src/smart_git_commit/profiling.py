@@ -0,0 +1,247 @@
+"""CPU and memory profiling of pipeline phases (`sgc --profile cpu|memory`).
+
+Pipeline code marks its phases with `phase("collect")` and similar calls. These are no-ops
+unless a `PipelineProfiler` is active. In `cpu` mode each phase gets its own `cProfile`
+profile. In `memory` mode `tracemalloc` records each phase's peak traced memory above
+its starting level, and snapshots taken at the phase's start and end show which lines
+allocated what is still live. Profile files are written to a directory. A short
+summary is returned for stderr.
+
+Only the calling thread is profiled, so work done in helper threads (e.g. submodule
+summaries) shows up as time spent waiting. Nested phases are attributed to the
+outermost one.
+"""
+
+from __future__ import annotations
+
+import cProfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from enum import Enum
+import io
+from pathlib import Path
+import pstats
+import time
+import tracemalloc
+
+
+class ProfileMode(str, Enum):
+    """Profiling modes accepted by `PipelineProfiler` (and `sgc --profile`)."""
+
+    CPU = "cpu"
+    MEMORY = "memory"
+
+
+PROFILE_MODES = tuple(mode.value for mode in ProfileMode)
+
+_ACTIVE: ContextVar[PipelineProfiler | None] = ContextVar("sgc_profiler", default=None)
+
+# Allocations made by the profiler itself or by the import system are not interesting.
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the enclosed work to pipeline phase `name` if profiling is active."""
+
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
+
+
+@dataclass
+class PhaseStats:
+    """Measurements of one pipeline phase.
+
+    Attributes:
+        name: Phase name.
+        calls: Times the phase was entered.
+        wall_s: Total wall time.
+        peak_bytes: Largest peak traced memory above the phase's starting level
+            (memory mode only).
+    """
+
+    name: str
+    calls: int = 0
+    wall_s: float = 0.0
+    peak_bytes: int = 0
+    _profile: cProfile.Profile | None = field(default=None, repr=False)
+    _allocations: list[tracemalloc.StatisticDiff] = field(default_factory=list, repr=False)
+    _snapshot: tracemalloc.Snapshot | None = field(default=None, repr=False)
+
+
+class PipelineProfiler:
+    """Profile the phases marked with `phase` between `start` and `stop`.
+
+    Args:
+        mode: "cpu" or "memory".
+        out_dir: Directory for `cpu-<phase>.pstats` or `memory-<phase>.snapshot` files.
+        top: Functions or allocation sites listed in the summary.
+
+    Raises:
+        ValueError: If `mode` is unknown.
+    """
+
+    def __init__(self, mode: str, out_dir: Path, *, top: int = 15) -> None:
+        if mode not in PROFILE_MODES:
+            expected = ", ".join(PROFILE_MODES)
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {expected}.")
+        self.mode = mode
+        self.out_dir = out_dir
+        self.top = top
+        self.phases: dict[str, PhaseStats] = {}
+        self._depth = 0
+        self._started = 0.0
+        self._total_s = 0.0
+        self._token: Token[PipelineProfiler | None] | None = None
+
+    def start(self) -> None:
+        """Activate the profiler for `phase` calls in the current context."""
+
+        self._token = _ACTIVE.set(self)
+        if self.mode == "memory":
+            tracemalloc.start()
+        self._started = time.perf_counter()
+
+    def stop(self) -> None:
+        """Deactivate the profiler."""
+
+        if self._token is None:
+            return
+        self._total_s = time.perf_counter() - self._started
+        _ACTIVE.reset(self._token)
+        self._token = None
+        if self.mode == "memory":
+            tracemalloc.stop()
+
+    def __enter__(self) -> PipelineProfiler:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the enclosed work as phase `name`."""
+
+        if self._depth:
+            yield
+            return
+        stats = self.phases.setdefault(name, PhaseStats(name))
+        stats.calls += 1
+        self._depth += 1
+        try:
+            if self.mode == "cpu":
+                if stats._profile is None:
+                    stats._profile = cProfile.Profile()
+                stats._profile.enable()
+                start = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    stats._profile.disable()
+                    stats.wall_s += time.perf_counter() - start
+            else:
+                before = tracemalloc.take_snapshot()
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                # Snapshots are slow; keep them out of the phase's wall time.
+                start = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    stats.wall_s += time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1] - base
+                    if peak >= stats.peak_bytes:
+                        stats.peak_bytes = peak
+                        after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+                        stats._snapshot = after
+                        stats._allocations = after.compare_to(
+                            before.filter_traces(_SNAPSHOT_FILTERS), "lineno"
+                        )
+        finally:
+            self._depth -= 1
+
+    def write(self) -> list[Path]:
+        """Write one profile file per phase and return their paths."""
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        paths: list[Path] = []
+        for stats in self.phases.values():
+            if stats._profile is not None:
+                path = self.out_dir / f"cpu-{stats.name}.pstats"
+                stats._profile.dump_stats(path)
+            elif stats._snapshot is not None:
+                path = self.out_dir / f"memory-{stats.name}.snapshot"
+                stats._snapshot.dump(str(path))
+            else:
+                continue
+            paths.append(path)
+        return paths
+
+    def summary(self) -> list[str]:
+        """Return summary lines: a per-phase table, then the top-N list."""
+
+        lines = [f"Profile ({self.mode}), total {self._total_s * 1000:.1f} ms:"]
+        header = f"  {'phase':<12} {'calls':>5} {'wall ms':>10}"
+        lines.append(header + (f" {'peak MiB':>10}" if self.mode == "memory" else ""))
+        for stats in self.phases.values():
+            row = f"  {stats.name:<12} {stats.calls:>5} {stats.wall_s * 1000:>10.1f}"
+            if self.mode == "memory":
+                row += f" {stats.peak_bytes / 2**20:>10.2f}"
+            lines.append(row)
+        if self.mode == "cpu":
+            lines.extend(self._top_functions())
+        else:
+            lines.extend(self._top_allocations())
+        return lines
+
+    def _top_functions(self) -> list[str]:
+        profiles = [s._profile for s in self.phases.values() if s._profile is not None]
+        if not profiles:
+            return []
+        out = io.StringIO()
+        combined = pstats.Stats(profiles[0], stream=out)
+        for profile in profiles[1:]:
+            combined.add(profile)
+        combined.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+        # Keep the table (from its `ncalls` header on), not the totals printed above it.
+        report = out.getvalue().splitlines()
+        start = next((i for i, line in enumerate(report) if "ncalls" in line), len(report))
+        table = [line.rstrip() for line in report[start:] if line.strip()]
+        if len(table) < 2:
+            return []
+        lines = [f"Top {len(table) - 1} functions by own time (seconds):"]
+        lines.extend(f"  {line}" for line in table)
+        return lines
+
+    def _top_allocations(self) -> list[str]:
+        diffs = [
+            (stats.name, diff)
+            for stats in self.phases.values()
+            for diff in stats._allocations
+            if diff.size_diff > 0
+        ]
+        diffs.sort(key=lambda item: -item[1].size_diff)
+        rows = diffs[: self.top]
+        if not rows:
+            return []
+        lines = [f"Top {len(rows)} allocation sites still live at phase end:"]
+        lines.append(f"  {'KiB':>9} {'blocks':>7}  {'phase':<12} site")
+        for name, diff in rows:
+            frame = diff.traceback[0]
+            lines.append(
+                f"  {diff.size_diff / 1024:>9.1f} {diff.count_diff:>7}  {name:<12} "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        return lines
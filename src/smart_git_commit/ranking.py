@@ -0,0 +1,102 @@
+"""Local ranking of alternative commit messages.
+
+Candidates are scored with cheap heuristics instead of another model call:
+
+- header length: headers up to 50 characters are preferred, longer ones lose points;
+- imperative mood: subjects starting with a past-tense, gerund or third-person verb
+  ("added", "adding", "adds") or a capital letter lose points;
+- scope consistency: a scope matching the locally inferred scopes gains points, a
+  different or missing scope loses some;
+- body size: bodies longer than three lines lose points.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+from smart_git_commit.semantic import (
+    DEFAULT_RULES,
+    CommitRules,
+    compile_rules,
+    parse_commit_header,
+)
+
+
+_PREFERRED_HEADER_LENGTH = 50
+_MAX_BODY_LINES = 3
+# Words ending like non-imperative verbs that are fine as a first word.
+_IMPERATIVE_EXCEPTIONS = frozenset(
+    {"address", "bring", "embed", "feed", "focus", "need", "process", "seed", "speed", "string"}
+)
+
+
+def _looks_imperative(word: str) -> bool:
+    word = word.lower()
+    if word in _IMPERATIVE_EXCEPTIONS:
+        return True
+    if word.endswith(("ed", "ing")):
+        return False
+    return not (word.endswith("s") and not word.endswith(("ss", "us", "is")))
+
+
+def score_commit_message(message: str, *, scope_hints: Sequence[str] = ()) -> float:
+    """Return a heuristic quality score for a commit message (higher is better).
+
+    Args:
+        message: Normalized commit message.
+        scope_hints: Locally inferred scopes, most likely first.
+    """
+
+    header, _, body = message.partition("\n")
+    header = header.strip()
+    m = parse_commit_header(header)
+    if not m:
+        return float("-inf")
+
+    score = 0.0
+    if len(header) > _PREFERRED_HEADER_LENGTH:
+        score -= (len(header) - _PREFERRED_HEADER_LENGTH) / 10
+
+    subject = m.group("subject").strip()
+    first = subject.split(" ", 1)[0]
+    if not _looks_imperative(first):
+        score -= 1.0
+    if first[:1].isupper() and not first.isupper():
+        score -= 0.5
+
+    scope = m.group("scope")
+    if scope_hints:
+        if scope is None:
+            score -= 0.5
+        elif scope.strip() == scope_hints[0]:
+            score += 1.0
+        elif scope.strip() in scope_hints:
+            score += 0.5
+        else:
+            score -= 0.5
+
+    body_lines = [line for line in body.splitlines() if line.strip()]
+    if len(body_lines) > _MAX_BODY_LINES:
+        score -= 0.25 * (len(body_lines) - _MAX_BODY_LINES)
+    return score
+
+
+def rank_commit_messages(
+    messages: Iterable[str],
+    *,
+    rules: CommitRules = DEFAULT_RULES,
+    scope_hints: Sequence[str] = (),
+) -> list[str]:
+    """Return the distinct messages that pass `rules`, best first.
+
+    Ties keep the input order, so the server's first choice wins among equals.
+
+    Args:
+        messages: Normalized candidate messages.
+        rules: Rules every returned message satisfies.
+        scope_hints: Locally inferred scopes, most likely first.
+    """
+
+    check = compile_rules(rules).check
+    valid = [m for m in dict.fromkeys(messages) if check(m) is None]
+    return sorted(valid, key=lambda m: -score_commit_message(m, scope_hints=scope_hints))
@@ -0,0 +1,303 @@
+"""Client-side rate-limit pacing shared across processes.
+
+Providers report their limits in response headers (`x-ratelimit-limit-*`,
+`x-ratelimit-remaining-*`, `x-ratelimit-reset-*`, `Retry-After`). The scheduler keeps a
+request bucket and a token bucket per endpoint in a small JSON state file, guarded by
+an advisory file lock, so concurrent `sgc` processes sharing one API key wait for
+capacity instead of all hitting 429.
+
+Each bucket refills at the rate implied by the last response: the missing capacity
+(`limit - remaining`) comes back over the reported reset duration. Malformed entries in
+the state file are ignored and overwritten, like an unreadable file.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import json
+import math
+from pathlib import Path
+import re
+import time
+from typing import Any
+
+from smart_git_commit.config import user_cache_dir
+from smart_git_commit.errors import LlmRequestError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse a reset duration such as `20ms`, `1s`, `6m0s` or a plain number of seconds."""
+
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str], now: float) -> float | None:
+    """Return the delay in seconds requested by `retry-after-ms` / `Retry-After`, if any."""
+
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return max(0.0, float(ms) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value: object) -> float | None:
+    """Return `value` as a finite float, or None if it is not a JSON number."""
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    number = float(value)
+    return number if math.isfinite(number) else None
+
+
+@dataclass
+class _Bucket:
+    limit: float
+    remaining: float
+    rate: float  # units refilled per second
+    updated_at: float
+
+    @classmethod
+    def from_state(cls, data: object) -> _Bucket | None:
+        """Parse a bucket stored in the state file; None if it is malformed."""
+
+        if not isinstance(data, dict):
+            return None
+        limit, remaining, rate, updated_at = (
+            _number(data.get(name)) for name in ("limit", "remaining", "rate", "updated_at")
+        )
+        if limit is None or remaining is None or rate is None or updated_at is None:
+            return None
+        if limit <= 0 or rate <= 0:
+            return None
+        return cls(limit=limit, remaining=remaining, rate=rate, updated_at=updated_at)
+
+    def available(self, now: float) -> float:
+        return min(self.limit, self.remaining + self.rate * max(0.0, now - self.updated_at))
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)."""
+
+        missing = min(amount, self.limit) - self.available(now)
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self.remaining = self.available(now) - amount
+        self.updated_at = now
+
+
+class RateLimitScheduler:
+    """Pace requests per endpoint using limits learned from response headers.
+
+    Without a usable state file (no path, or I/O errors such as an unwritable cache
+    directory) requests are not paced; a 429 is still retried after `Retry-After`.
+
+    Args:
+        state_path: JSON state file shared by all processes using the same key, or None.
+        max_wait_s: Longest total wait before giving up with LlmRequestError.
+        clock: Wall-clock source (seconds since the epoch).
+        sleep: Sleep function.
+    """
+
+    def __init__(
+        self,
+        state_path: Path | None,
+        *,
+        max_wait_s: float = 30.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._path = state_path
+        self._max_wait_s = max_wait_s
+        self._clock = clock
+        self._sleep = sleep
+
+    @classmethod
+    def default(cls, *, max_wait_s: float = 30.0) -> RateLimitScheduler:
+        """Create a scheduler with its state in the user cache directory."""
+
+        try:
+            path: Path | None = user_cache_dir() / "ratelimit.json"
+        except RuntimeError:  # No home directory to derive the cache directory from.
+            path = None
+        return cls(path, max_wait_s=max_wait_s)
+
+    @contextmanager
+    def _locked_state(self, path: Path) -> Iterator[dict[str, Any]]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".lock"), "a+") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(path.read_text(encoding="utf-8"))
+                    if not isinstance(state, dict):
+                        state = {}
+                except (OSError, ValueError):
+                    state = {}
+                yield state
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+                tmp.replace(path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def acquire(self, key: str, tokens: int) -> None:
+        """Block until one request of about `tokens` tokens fits the limits, then reserve it.
+
+        Raises:
+            LlmRequestError: If the required wait exceeds `max_wait_s`.
+        """
+
+        waited = 0.0
+        while True:
+            if self._path is None:
+                return
+            try:
+                delay = self._reserve(self._path, key, tokens)
+            except OSError:
+                # Pacing is an optimization; an unusable state file must not fail requests.
+                self._path = None
+                return
+            if delay <= 0:
+                return
+            if waited + delay > self._max_wait_s:
+                raise LlmRequestError(
+                    f"Rate limited: capacity frees up in {delay:.1f}s, beyond the "
+                    f"{self._max_wait_s:.0f}s wait budget. Try again later."
+                )
+            self._sleep(delay)
+            waited += delay
+
+    def _reserve(self, path: Path, key: str, tokens: int) -> float:
+        """Reserve capacity and return 0, or return the delay until it is available."""
+
+        with self._locked_state(path) as state:
+            now = self._clock()
+            blocked_until, buckets = _load_entry(state.get(key))
+            delay = max(0.0, blocked_until - now)
+            amounts = {"requests": 1.0, "tokens": float(tokens)}
+            for name, bucket in buckets.items():
+                delay = max(delay, bucket.wait_for(amounts[name], now))
+            if delay <= 0:
+                for name, bucket in buckets.items():
+                    bucket.take(amounts[name], now)
+            _store_entry(state, key, blocked_until, buckets)
+        return delay
+
+    def observe(self, key: str, headers: Mapping[str, str], status_code: int) -> float | None:
+        """Record limits from a response.
+
+        Returns:
+            For a 429 response, the delay before retrying (None if unknown).
+        """
+
+        now = self._clock()
+        retry_after = parse_retry_after(headers, now)
+        if self._path is None:
+            return retry_after if status_code == 429 else None
+        try:
+            return self._record(self._path, key, headers, status_code, now, retry_after)
+        except OSError:
+            self._path = None
+            return retry_after if status_code == 429 else None
+
+    def _record(
+        self,
+        path: Path,
+        key: str,
+        headers: Mapping[str, str],
+        status_code: int,
+        now: float,
+        retry_after: float | None,
+    ) -> float | None:
+        with self._locked_state(path) as state:
+            blocked_until, buckets = _load_entry(state.get(key))
+            for name in ("requests", "tokens"):
+                bucket = _bucket_from_headers(headers, name, now)
+                if bucket is not None:
+                    buckets[name] = bucket
+            delay = None
+            if status_code == 429:
+                delay = retry_after
+                if delay is None and "requests" in buckets:
+                    # Without Retry-After, wait until one request fits the request bucket.
+                    delay = buckets["requests"].wait_for(1.0, now)
+                if delay is not None:
+                    blocked_until = now + delay
+            else:
+                blocked_until = 0.0
+            _store_entry(state, key, blocked_until, buckets)
+        return delay
+
+
+def _load_entry(data: object) -> tuple[float, dict[str, _Bucket]]:
+    """Return `(blocked_until, buckets)` of a state entry, skipping malformed fields."""
+
+    if not isinstance(data, dict):
+        return 0.0, {}
+    blocked_until = _number(data.get("blocked_until")) or 0.0
+    buckets: dict[str, _Bucket] = {}
+    for name in ("requests", "tokens"):
+        bucket = _Bucket.from_state(data.get(name))
+        if bucket is not None:
+            buckets[name] = bucket
+    return blocked_until, buckets
+
+
+def _store_entry(
+    state: dict[str, Any], key: str, blocked_until: float, buckets: Mapping[str, _Bucket]
+) -> None:
+    entry: dict[str, Any] = {name: bucket.__dict__ for name, bucket in buckets.items()}
+    if blocked_until > 0:
+        entry["blocked_until"] = blocked_until
+    if entry:
+        state[key] = entry
+    else:
+        state.pop(key, None)
+
+
+def _bucket_from_headers(headers: Mapping[str, str], name: str, now: float) -> _Bucket | None:
+    try:
+        limit = float(headers[f"x-ratelimit-limit-{name}"])
+        remaining = float(headers[f"x-ratelimit-remaining-{name}"])
+    except (KeyError, ValueError):
+        return None
+    reset = parse_duration(headers.get(f"x-ratelimit-reset-{name}", "") or "")
+    if reset is None or reset <= 0 or limit <= 0:
+        return None
+    rate = max(limit - remaining, 1.0) / reset
+    return _Bucket(limit=limit, remaining=remaining, rate=rate, updated_at=now)
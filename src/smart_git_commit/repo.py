@@ -0,0 +1,161 @@
+"""Repository discovery shared by configuration loading and context collection."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from functools import cached_property
+from pathlib import Path
+import shutil
+import subprocess
+
+from smart_git_commit.errors import NotAGitRepositoryError
+
+
+@dataclass(frozen=True)
+class RepoHandle:
+    """A Git repository discovered once per run.
+
+    Discovery costs a single `git rev-parse` call; HEAD is read straight from the
+    git directory. `GIT_DIR`/`GIT_WORK_TREE`, linked worktrees and submodules are
+    handled by git itself, so `git_dir` may differ from `toplevel / ".git"`.
+
+    Attributes:
+        git: Absolute path of the git executable.
+        toplevel: Root of the worktree.
+        git_dir: Per-worktree git directory (holds HEAD and the index).
+        common_dir: Git directory shared between worktrees (holds objects and refs).
+        head_ref: Symbolic ref HEAD points to (e.g. `refs/heads/main`), empty when detached.
+        head_sha: Commit HEAD points to when detached, otherwise empty.
+    """
+
+    git: str
+    toplevel: Path
+    git_dir: Path
+    common_dir: Path
+    head_ref: str
+    head_sha: str
+
+    @cached_property
+    def branch(self) -> str:
+        """Branch name, or `detached@<short sha>` when HEAD is detached.
+
+        The short sha comes from `git rev-parse --short`, so it is as long as git needs
+        to keep it unambiguous (and honours `core.abbrev`).
+        """
+
+        if self.head_ref:
+            return self.head_ref.removeprefix("refs/heads/")
+        if not self.head_sha:
+            return "detached"
+        try:
+            proc = subprocess.run(
+                [self.git, "rev-parse", "--short", self.head_sha],
+                cwd=self.toplevel,
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=10.0,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            proc = None
+        short = proc.stdout.strip() if proc is not None and proc.returncode == 0 else ""
+        return f"detached@{short or self.head_sha[:7]}"
+
+    def resolve_head(self, *, timeout_s: float = 10.0) -> str:
+        """Return the full commit id HEAD points to, or an empty string if unborn.
+
+        An empty string is also returned if git fails or exceeds `timeout_s`.
+        """
+
+        if self.head_sha:
+            return self.head_sha
+        try:
+            proc = subprocess.run(
+                [self.git, "rev-parse", "--verify", "--quiet", "HEAD"],
+                cwd=self.toplevel,
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=timeout_s,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+        return (proc.stdout or "").strip() if proc.returncode == 0 else ""
+
+    def reread_head(self) -> RepoHandle:
+        """Return a handle for the current HEAD (for long-running processes)."""
+
+        head_ref, head_sha = _read_head(self.git_dir)
+        return replace(self, head_ref=head_ref, head_sha=head_sha)
+
+    @classmethod
+    def discover(cls, cwd: Path | None = None, *, timeout_s: float = 10.0) -> RepoHandle:
+        """Discover the repository containing `cwd` (default: current directory).
+
+        Raises:
+            NotAGitRepositoryError: If git is missing or `cwd` is not inside a worktree.
+        """
+
+        git = shutil.which("git")
+        if git is None:
+            raise NotAGitRepositoryError("git is not installed or not found in PATH")
+
+        try:
+            proc = subprocess.run(
+                [
+                    git,
+                    "rev-parse",
+                    "--is-inside-work-tree",
+                    "--show-toplevel",
+                    "--absolute-git-dir",
+                    "--git-common-dir",
+                ],
+                cwd=cwd,
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=timeout_s,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise NotAGitRepositoryError(f"git rev-parse failed: {e}") from e
+
+        lines = (proc.stdout or "").splitlines()
+        if proc.returncode != 0 or len(lines) < 4 or lines[0].strip() != "true":
+            stderr = (proc.stderr or "").strip()
+            raise NotAGitRepositoryError(stderr or "not inside a git worktree")
+
+        toplevel = Path(lines[1])
+        git_dir = Path(lines[2])
+        # --git-common-dir may be relative to the current directory.
+        common_dir = Path(lines[3])
+        if not common_dir.is_absolute():
+            common_dir = ((cwd or Path.cwd()) / common_dir).resolve()
+
+        head_ref, head_sha = _read_head(git_dir)
+        return cls(
+            git=git,
+            toplevel=toplevel,
+            git_dir=git_dir,
+            common_dir=common_dir,
+            head_ref=head_ref,
+            head_sha=head_sha,
+        )
+
+    @classmethod
+    def try_discover(cls, cwd: Path | None = None, *, timeout_s: float = 10.0) -> RepoHandle | None:
+        """Like `discover`, but return None instead of raising."""
+
+        try:
+            return cls.discover(cwd, timeout_s=timeout_s)
+        except NotAGitRepositoryError:
+            return None
+
+
+def _read_head(git_dir: Path) -> tuple[str, str]:
+    try:
+        content = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return "", ""
+    if content.startswith("ref:"):
+        return content[4:].strip(), ""
+    return "", content
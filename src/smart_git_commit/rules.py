@@ -0,0 +1,141 @@
+"""Load per-repository commit rules from a commitlint configuration.
+
+Supported files (first match wins, JSON only): `.commitlintrc.json`, `.commitlintrc`.
+
+Supported subset of commitlint rules (level 2 only; levels 0/1 are ignored):
+
+- `type-enum`: `[2, "always", [...]]`
+- `scope-enum`: `[2, "always", [...]]`
+- `scope-empty`: `[2, "never"]`
+- `header-max-length`: `[2, "always", 72]`
+- `subject-full-stop`: `[2, "never", "."]`
+- `references-empty`: `[2, "never"]` (prefixes from `parserPreset.parserOpts.issuePrefixes`)
+- `breaking-body-empty`: `[2, "never"]` (SGC extension: breaking changes need a body)
+
+Other rules and `extends` are ignored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from smart_git_commit.errors import RulesConfigError
+from smart_git_commit.semantic import DEFAULT_RULES, CommitRules
+
+
+RULES_FILENAMES: tuple[str, ...] = (".commitlintrc.json", ".commitlintrc")
+
+# Parsed rules keyed by the SHA-256 of the config file content.
+_RULES_CACHE: dict[str, CommitRules] = {}
+
+
+def _rule(rules: dict[str, Any], name: str) -> tuple[str, Any] | None:
+    """Return (applicable, value) for an enabled error-level rule, else None."""
+
+    spec = rules.get(name)
+    if spec is None:
+        return None
+    if not isinstance(spec, list) or not spec or not isinstance(spec[0], int):
+        raise RulesConfigError(f"Invalid commitlint rule {name!r}: expected [level, when, value].")
+    if spec[0] < 2:
+        return None
+    applicable = spec[1] if len(spec) > 1 else "always"
+    value = spec[2] if len(spec) > 2 else None
+    return applicable, value
+
+
+def _str_tuple(name: str, value: Any) -> tuple[str, ...]:
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise RulesConfigError(f"Invalid commitlint rule {name!r}: expected a list of strings.")
+    return tuple(value)
+
+
+def parse_commitlint_config(data: Any) -> CommitRules:
+    """Build CommitRules from a parsed commitlint config object.
+
+    Args:
+        data: Parsed JSON content of a commitlint config.
+
+    Returns:
+        CommitRules; rules not present in the config keep their defaults.
+
+    Raises:
+        RulesConfigError: If a supported rule is malformed.
+    """
+
+    if not isinstance(data, dict):
+        raise RulesConfigError("Invalid commitlint config: expected a JSON object.")
+    rules = data.get("rules") or {}
+    if not isinstance(rules, dict):
+        raise RulesConfigError("Invalid commitlint config: 'rules' must be an object.")
+
+    kwargs: dict[str, Any] = {}
+    if (r := _rule(rules, "type-enum")) and r[0] == "always":
+        kwargs["types"] = _str_tuple("type-enum", r[1])
+    if (r := _rule(rules, "scope-enum")) and r[0] == "always":
+        kwargs["scopes"] = _str_tuple("scope-enum", r[1])
+    if (r := _rule(rules, "scope-empty")) and r[0] == "never":
+        kwargs["scope_required"] = True
+    if (r := _rule(rules, "header-max-length")) and r[0] == "always":
+        if not isinstance(r[1], int) or r[1] <= 0:
+            raise RulesConfigError(
+                "Invalid commitlint rule 'header-max-length': expected a positive int."
+            )
+        kwargs["header_max_length"] = r[1]
+    if (r := _rule(rules, "subject-full-stop")) and r[0] == "never" and r[1] in (None, "."):
+        kwargs["subject_no_full_stop"] = True
+    if (r := _rule(rules, "breaking-body-empty")) and r[0] == "never":
+        kwargs["breaking_body_required"] = True
+    if (r := _rule(rules, "references-empty")) and r[0] == "never":
+        kwargs["references_required"] = True
+        # A string preset names an npm package, which can't be resolved here; only inline
+        # parser options are read.
+        preset = data.get("parserPreset")
+        parser_opts = preset.get("parserOpts") if isinstance(preset, dict) else None
+        if isinstance(parser_opts, dict) and "issuePrefixes" in parser_opts:
+            kwargs["issue_prefixes"] = _str_tuple("issuePrefixes", parser_opts["issuePrefixes"])
+    return CommitRules(**kwargs)
+
+
+def load_commit_rules(root: Path | None) -> CommitRules:
+    """Load commit rules from the first commitlint config found in `root`.
+
+    Parsed rules are memoized by the file content hash, so repeated loads of an
+    unchanged file cost one read.
+
+    Args:
+        root: Repository root; None returns the default rules.
+
+    Returns:
+        The repository's CommitRules, or the defaults when no config exists.
+
+    Raises:
+        RulesConfigError: If the config file is not valid JSON or a supported rule is malformed.
+    """
+
+    if root is None:
+        return DEFAULT_RULES
+
+    for name in RULES_FILENAMES:
+        path = root / name
+        try:
+            content = path.read_bytes()
+        except OSError:
+            continue
+
+        key = hashlib.sha256(content).hexdigest()
+        cached = _RULES_CACHE.get(key)
+        if cached is not None:
+            return cached
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise RulesConfigError(f"{path}: not valid JSON ({e}).") from e
+        rules = parse_commitlint_config(data)
+        _RULES_CACHE[key] = rules
+        return rules
+
+    return DEFAULT_RULES
@@ -0,0 +1,236 @@
+"""Local scope inference from a path-prefix -> scope trie.
+
+The trie is learned from `type(scope): ...` headers in `git log` (which directories
+each scope's commits touched) and can be overridden per repository with a
+`.sgc-scopes.json` file mapping path prefixes to scopes:
+
+    {"src/smart_git_commit/cli.py": "cli", "docs": "docs"}
+
+It is cached in `<git common dir>/sgc/scopes.json` together with the HEAD it was built
+from; when HEAD moves, only the new commits are folded in.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+import json
+from pathlib import Path
+import re
+import subprocess
+from typing import Any
+
+from smart_git_commit.errors import RulesConfigError
+from smart_git_commit.repo import RepoHandle
+
+
+SCOPES_FILENAME = ".sgc-scopes.json"
+
+_SCOPE_RE = re.compile(r"^[a-z]+\((?P<scope>[^)\r\n]+)\)!?: ")
+# Directory depth learned from history; deeper paths fall back to their ancestors.
+_MAX_DEPTH = 4
+# Commits scanned per build or update (the most recent ones).
+_MAX_COMMITS = 5000
+# A directory is assigned a scope when it has this many votes and this share of them.
+_MIN_VOTES = 2
+_MIN_SHARE = 0.6
+# Bumped when the vote semantics change so stale caches are rebuilt.
+_CACHE_VERSION = 2
+
+
+class ScopeTrie:
+    """Prefix trie of path components annotated with scope votes.
+
+    Nodes are plain dicts (`"n"`: scope votes, `"s"`: decided scope, `"c"`: children)
+    so the whole trie serializes compactly to JSON.
+    """
+
+    def __init__(self, root: dict[str, Any] | None = None) -> None:
+        self.root: dict[str, Any] = root if root is not None else {}
+
+    def _node(self, parts: Sequence[str]) -> dict[str, Any]:
+        node = self.root
+        for part in parts:
+            node = node.setdefault("c", {}).setdefault(part, {})
+        return node
+
+    def vote(self, paths: Iterable[str], scope: str) -> None:
+        """Record that one commit with `scope` touched `paths`.
+
+        Each directory gets at most one vote per commit, so a commit touching many
+        files weighs as much as one touching a single file.
+        """
+
+        prefixes = {tuple(path.split("/")[:-1][:_MAX_DEPTH]) for path in paths}
+        voted: set[tuple[str, ...]] = set()
+        for dirs in prefixes:
+            node = self.root
+            for depth, part in enumerate(dirs, start=1):
+                node = node.setdefault("c", {}).setdefault(part, {})
+                if dirs[:depth] in voted:
+                    continue
+                voted.add(dirs[:depth])
+                votes = node.setdefault("n", {})
+                votes[scope] = votes.get(scope, 0) + 1
+
+    def assign(self, prefix: str, scope: str) -> None:
+        """Pin `scope` to a path prefix (file or directory)."""
+
+        parts = [p for p in prefix.strip("/").split("/") if p]
+        self._node(parts)["s"] = scope
+
+    def decide(self) -> None:
+        """Derive each node's scope from its votes."""
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            votes = node.get("n")
+            if votes:
+                scope, count = max(votes.items(), key=lambda item: item[1])
+                if count >= _MIN_VOTES and count >= _MIN_SHARE * sum(votes.values()):
+                    node["s"] = scope
+                else:
+                    node.pop("s", None)
+            stack.extend(node.get("c", {}).values())
+
+    def lookup(self, path: str) -> str | None:
+        """Return the scope of the deepest annotated prefix of `path`, if any."""
+
+        node = self.root
+        found = node.get("s")
+        for part in path.split("/"):
+            node = node.get("c", {}).get(part)
+            if node is None:
+                break
+            found = node.get("s", found)
+        return found
+
+
+class ScopeMap:
+    """Scope lookup combining repository overrides and learned history.
+
+    Args:
+        history: Trie learned from `git log`.
+        overrides: Trie built from `.sgc-scopes.json`; takes precedence.
+    """
+
+    def __init__(self, history: ScopeTrie, overrides: ScopeTrie | None = None) -> None:
+        self.history = history
+        self.overrides = overrides or ScopeTrie()
+
+    def lookup(self, path: str) -> str | None:
+        """Return the scope for a repository-relative path, if known."""
+
+        return self.overrides.lookup(path) or self.history.lookup(path)
+
+    def infer(self, paths: Iterable[str]) -> list[str]:
+        """Return the scopes of `paths`, most common first."""
+
+        counts = Counter(scope for path in paths if (scope := self.lookup(path)))
+        return [scope for scope, _ in counts.most_common()]
+
+    @classmethod
+    def for_repo(cls, repo: RepoHandle) -> ScopeMap:
+        """Load the cached trie for `repo`, updating it if HEAD moved.
+
+        Git or cache failures degrade to an empty history map rather than raising.
+
+        Raises:
+            RulesConfigError: If `.sgc-scopes.json` exists but is invalid.
+        """
+
+        return cls(_load_history(repo), _load_overrides(repo.toplevel))
+
+
+def _iter_scoped_commits(
+    repo: RepoHandle, head: str, since: str | None, *, timeout_s: float = 10.0
+) -> Iterator[tuple[str, list[str]]]:
+    args = [repo.git, "-c", "core.quotePath=false", "log", "--no-merges", "--name-only"]
+    args += ["--format=%x1e%s", head]
+    args.append(f"--max-count={_MAX_COMMITS}")
+    if since:
+        args += ["--not", since]
+    args.append("--")
+    proc = subprocess.run(
+        args,
+        cwd=repo.toplevel,
+        check=True,
+        capture_output=True,
+        text=True,
+        errors="replace",
+        timeout=timeout_s,
+    )
+    for record in proc.stdout.split("\x1e")[1:]:
+        subject, _, names = record.partition("\n")
+        m = _SCOPE_RE.match(subject)
+        if m:
+            yield m.group("scope").strip(), [n for n in names.splitlines() if n]
+
+
+def _load_history(repo: RepoHandle) -> ScopeTrie:
+    head = repo.resolve_head()
+    if not head:
+        return ScopeTrie()
+
+    cache = repo.common_dir / "sgc" / "scopes.json"
+    cached_head: str | None = None
+    trie = ScopeTrie()
+    try:
+        data = json.loads(cache.read_text(encoding="utf-8"))
+        if data.get("version") == _CACHE_VERSION:
+            cached_head = data["head"]
+            trie = ScopeTrie(data["trie"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if cached_head == head:
+        return trie
+
+    try:
+        try:
+            records = list(_iter_scoped_commits(repo, head, cached_head))
+        except subprocess.CalledProcessError:
+            # Cached HEAD no longer exists (history rewritten and pruned): rebuild.
+            trie = ScopeTrie()
+            records = list(_iter_scoped_commits(repo, head, None))
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return trie
+
+    for scope, paths in records:
+        trie.vote(paths, scope)
+    trie.decide()
+
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"version": _CACHE_VERSION, "head": head, "trie": trie.root},
+                separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(cache)
+    except OSError:
+        pass
+    return trie
+
+
+def _load_overrides(root: Path) -> ScopeTrie:
+    trie = ScopeTrie()
+    path = root / SCOPES_FILENAME
+    try:
+        content = path.read_text(encoding="utf-8")
+    except OSError:
+        return trie
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise RulesConfigError(f"{path}: not valid JSON ({e}).") from e
+    if not isinstance(data, dict) or not all(
+        isinstance(k, str) and isinstance(v, str) for k, v in data.items()
+    ):
+        raise RulesConfigError(f"{path}: expected an object mapping path prefixes to scopes.")
+    for prefix, scope in data.items():
+        trie.assign(prefix, scope)
+    return trie
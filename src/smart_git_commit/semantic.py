@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
 import re
+from typing import Any
 
 from smart_git_commit.errors import InvalidCommitMessageError
 
@@ -21,12 +25,145 @@ COMMIT_TYPES: tuple[str, ...] = (
     "revert",
 )
 
-
 _HEADER_RE = re.compile(
     r"^(?P<type>[a-z]+)(\((?P<scope>[^)\r\n]+)\))?(?P<breaking>!)?: (?P<subject>[^\r\n]+)$"
 )
 
 
+@dataclass(frozen=True)
+class CommitRules:
+    """Declarative commit message rules.
+
+    The defaults reproduce the built-in Conventional Commit checks; repositories can
+    tighten them through a commitlint config (see `smart_git_commit.rules`).
+
+    Attributes:
+        types: Allowed commit types.
+        scopes: Allowed scopes; empty means any scope.
+        scope_required: Whether a scope must be present.
+        header_max_length: Maximum header length; 0 means unlimited.
+        subject_no_full_stop: Whether the subject must not end with a period.
+        breaking_body_required: Whether breaking changes (`type!:`) need a body.
+        references_required: Whether the message must reference an issue.
+        issue_prefixes: Prefixes that start an issue reference (e.g. `#`, `PROJ-`).
+    """
+
+    types: tuple[str, ...] = COMMIT_TYPES
+    scopes: tuple[str, ...] = ()
+    scope_required: bool = False
+    header_max_length: int = 0
+    subject_no_full_stop: bool = False
+    breaking_body_required: bool = False
+    references_required: bool = False
+    issue_prefixes: tuple[str, ...] = ("#",)
+
+    def prompt_lines(self) -> list[str]:
+        """Return prompt bullet lines describing these rules to the model."""
+
+        lines = [f"- Allowed types: {', '.join(self.types)}"]
+        if self.scopes:
+            required = " (scope is required)" if self.scope_required else ""
+            lines.append(f"- Allowed scopes: {', '.join(self.scopes)}{required}")
+        elif self.scope_required:
+            lines.append("- A scope is required: type(scope): subject")
+        if self.header_max_length:
+            lines.append(f"- The header line must be at most {self.header_max_length} characters")
+        if self.subject_no_full_stop:
+            lines.append("- The subject must not end with a period")
+        if self.breaking_body_required:
+            lines.append("- Breaking changes (type!:) must include a body explaining the break")
+        if self.references_required:
+            examples = " or ".join(f"{prefix}123" for prefix in self.issue_prefixes)
+            lines.append(f"- Reference the related issue in the message (e.g. {examples})")
+        return lines
+
+
+DEFAULT_RULES = CommitRules()
+
+
+class CommitValidator:
+    """Commit message checker compiled from CommitRules.
+
+    Lookup sets and regular expressions are built once, so checking a message costs a
+    single header match plus a few set/length tests. Obtain instances through
+    `compile_rules` to share them across calls.
+    """
+
+    def __init__(self, rules: CommitRules) -> None:
+        self.rules = rules
+        self._types = frozenset(rules.types)
+        self._scopes = frozenset(rules.scopes)
+        self._allowed_types = ", ".join(rules.types)
+        self._reference_re = (
+            re.compile(
+                "(?:" + "|".join(re.escape(p) for p in rules.issue_prefixes) + r")[\w-]*\d+"
+            )
+            if rules.references_required and rules.issue_prefixes
+            else None
+        )
+
+    def check(self, message: str) -> str | None:
+        """Return None if the message is valid, otherwise a human-readable error."""
+
+        header, _, body = message.partition("\n")
+        header = header.strip()
+        if not header:
+            return "Invalid commit message: empty output. Expected format like 'feat: add X'."
+
+        m = _HEADER_RE.match(header)
+        if not m:
+            return (
+                "Invalid commit message header. "
+                "Expected 'type(scope): subject' or 'type: subject'. "
+                f"Allowed types: {self._allowed_types}. Got: {header!r}"
+            )
+
+        ctype = m.group("type")
+        subject = m.group("subject").strip()
+        if ctype not in self._types:
+            return f"Unknown commit type {ctype!r}. Allowed types: {self._allowed_types}."
+        if not subject:
+            return "Commit subject must not be empty."
+
+        rules = self.rules
+        scope = m.group("scope")
+        if scope is None:
+            if rules.scope_required:
+                return "Commit scope is required: use 'type(scope): subject'."
+        elif self._scopes:
+            for part in scope.split(","):
+                if part.strip() not in self._scopes:
+                    allowed = ", ".join(rules.scopes)
+                    return f"Unknown commit scope {part.strip()!r}. Allowed scopes: {allowed}."
+        if rules.header_max_length and len(header) > rules.header_max_length:
+            return (
+                f"Commit header is {len(header)} characters long; "
+                f"the maximum is {rules.header_max_length}."
+            )
+        if rules.subject_no_full_stop and subject.endswith("."):
+            return "Commit subject must not end with a period."
+        if rules.breaking_body_required and m.group("breaking") and not body.strip():
+            return "Breaking changes ('type!:') require a commit body describing the break."
+        if self._reference_re is not None and not self._reference_re.search(message):
+            examples = " or ".join(f"{prefix}123" for prefix in rules.issue_prefixes)
+            return f"Commit message must reference an issue (e.g. {examples})."
+        return None
+
+    def validate(self, message: str) -> None:
+        """Raise InvalidCommitMessageError if the message is invalid."""
+
+        error = self.check(message)
+        if error is not None:
+            raise InvalidCommitMessageError(error)
+
+
+@lru_cache(maxsize=32)
+def compile_rules(rules: CommitRules = DEFAULT_RULES) -> CommitValidator:
+    """Compile rules into a validator, reusing earlier compilations of equal rules."""
+
+    return CommitValidator(rules)
+
+
 def normalize_commit_message(text: str) -> str:
     """Normalize a model output into a plain commit message string."""
 
@@ -44,40 +181,103 @@ def normalize_commit_message(text: str) -> str:
     return msg.strip()
 
 
-def validate_commit_message(message: str) -> None:
-    """Validate a semantic commit message.
+def parse_commit_header(header: str) -> re.Match[str] | None:
+    """Match a Conventional Commit header.
+
+    Returns:
+        A match with groups `type`, `scope`, `breaking` and `subject`, or None.
+    """
+
+    return _HEADER_RE.match(header.strip())
 
-    We validate the first line (header) and allow an optional body.
+
+def apply_scope(message: str, scope: str) -> str:
+    """Insert `scope` into a scopeless Conventional Commit header.
+
+    Messages that already have a scope or whose header does not parse are returned
+    unchanged.
+    """
+
+    header, sep, rest = message.partition("\n")
+    m = _HEADER_RE.match(header.strip())
+    if not m or m.group("scope") is not None:
+        return message
+    breaking = m.group("breaking") or ""
+    return f"{m.group('type')}({scope}){breaking}: {m.group('subject')}{sep}{rest}"
+
+
+def commit_message_schema(rules: CommitRules = DEFAULT_RULES) -> dict[str, Any]:
+    """Return a JSON schema for a commit message split into fields.
+
+    The schema is strict-mode compatible (every property required, optional values
+    nullable) and restricts `type` (and `scope`, if configured) to the allowed values.
+    """
+
+    scope: dict[str, Any] = {"type": ["string", "null"]}
+    if rules.scopes:
+        scope["enum"] = [*rules.scopes, None]
+    return {
+        "type": "object",
+        "properties": {
+            "type": {"type": "string", "enum": list(rules.types)},
+            "scope": scope,
+            "subject": {"type": "string", "description": "Imperative summary, no trailing period."},
+            "body": {"type": ["string", "null"], "description": "Optional short body."},
+            "breaking": {"type": "boolean"},
+        },
+        "required": ["type", "scope", "subject", "body", "breaking"],
+        "additionalProperties": False,
+    }
+
+
+def assemble_commit_message(fields: Mapping[str, Any]) -> str:
+    """Build a commit message from fields matching `commit_message_schema`.
+
+    Missing or mistyped fields are treated as empty, so malformed output yields a message
+    that fails validation rather than raising.
+    """
+
+    def _text(name: str) -> str:
+        value = fields.get(name)
+        return value.strip() if isinstance(value, str) else ""
+
+    header = _text("type")
+    if scope := _text("scope"):
+        header += f"({scope})"
+    if fields.get("breaking") is True:
+        header += "!"
+    header += f": {_text('subject')}"
+    body = _text("body")
+    return f"{header}\n\n{body}" if body else header
+
+
+def check_commit_message(message: str, rules: CommitRules = DEFAULT_RULES) -> str | None:
+    """Check a semantic commit message without raising.
+
+    This is the non-raising core of `validate_commit_message`, suited to bulk linting.
 
     Args:
         message: Commit message (may include body).
+        rules: Rules to check against (default: built-in Conventional Commit rules).
 
-    Raises:
-        InvalidCommitMessageError: If the header is invalid.
+    Returns:
+        None if the message is valid, otherwise a human-readable error.
     """
 
-    lines = message.splitlines()
-    if not lines or not lines[0].strip():
-        raise InvalidCommitMessageError(
-            "Invalid commit message: empty output. Expected format like 'feat: add X'."
-        )
+    return compile_rules(rules).check(message)
 
-    header = lines[0].strip()
-    m = _HEADER_RE.match(header)
-    if not m:
-        allowed = ", ".join(COMMIT_TYPES)
-        raise InvalidCommitMessageError(
-            "Invalid commit message header. Expected 'type(scope): subject' or 'type: subject'. "
-            f"Allowed types: {allowed}. Got: {header!r}"
-        )
 
-    ctype = m.group("type")
-    subject = m.group("subject").strip()
-    if ctype not in COMMIT_TYPES:
-        allowed = ", ".join(COMMIT_TYPES)
-        raise InvalidCommitMessageError(
-            f"Unknown commit type {ctype!r}. Allowed types: {allowed}."
-        )
-    if not subject:
-        raise InvalidCommitMessageError("Commit subject must not be empty.")
+def validate_commit_message(message: str, rules: CommitRules = DEFAULT_RULES) -> None:
+    """Validate a semantic commit message.
+
+    We validate the first line (header) and allow an optional body.
+
+    Args:
+        message: Commit message (may include body).
+        rules: Rules to validate against (default: built-in Conventional Commit rules).
+
+    Raises:
+        InvalidCommitMessageError: If the message violates the rules.
+    """
 
+    compile_rules(rules).validate(message)
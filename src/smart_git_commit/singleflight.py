@@ -0,0 +1,155 @@
+"""Coalesce concurrent generations for the same staged index.
+
+An editor plugin and a commit hook often run `sgc` on the same index at nearly the same
+time. Each run takes an exclusive `flock` on `<git dir>/sgc/inflight/<key>.lock`, where
+`key` is `pregen_key` (staged changes, HEAD and options). The first run generates and
+writes its result next to the lock before releasing it. Runs that had to wait for the
+lock reuse that result instead of sending their own request.
+
+Holders that crash release their lock with their process, so waiters never hang on a
+dead holder. If the holder failed, a waiter finds no fresh result and generates
+itself. If the holder is slow, a waiter gives up after `timeout_s` and generates
+independently.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import contextlib
+import errno
+import json
+import os
+from pathlib import Path
+import time
+
+from smart_git_commit.repo import RepoHandle
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+
+# Result files older than this are removed when a new result is written.
+_RESULT_TTL_S = 600.0
+
+
+class SingleFlight:
+    """Per-repository single-flight coordinator.
+
+    Args:
+        directory: Directory holding lock and result files.
+        timeout_s: Longest wait for another run before generating independently.
+        poll_interval_s: Lock polling period while waiting.
+    """
+
+    def __init__(
+        self, directory: Path, *, timeout_s: float = 60.0, poll_interval_s: float = 0.05
+    ) -> None:
+        self._dir = directory
+        self._timeout_s = timeout_s
+        self._poll_interval_s = poll_interval_s
+
+    @classmethod
+    def for_repo(cls, repo: RepoHandle, *, timeout_s: float = 60.0) -> SingleFlight:
+        """Coordinate runs in the repository's (per-worktree) git directory."""
+
+        return cls(repo.git_dir / "sgc" / "inflight", timeout_s=timeout_s)
+
+    def _lock(self, path: Path, on_wait: Callable[[], None]) -> tuple[int, bool]:
+        """Return (fd, waited); fd is -1 if the wait timed out."""
+
+        deadline = time.monotonic() + self._timeout_s
+        waited = False
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                os.close(fd)
+                if e.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+                if not waited:
+                    waited = True
+                    on_wait()
+                if time.monotonic() >= deadline:
+                    return -1, waited
+                time.sleep(self._poll_interval_s)
+                continue
+            # The previous holder unlinks the file before unlocking; a lock on an
+            # unlinked file does not exclude newcomers, so start over on a fresh file.
+            try:
+                same = os.fstat(fd).st_ino == os.stat(path).st_ino
+            except FileNotFoundError:
+                same = False
+            if same:
+                return fd, waited
+            os.close(fd)
+
+    def run(
+        self,
+        key: str,
+        produce: Callable[[], list[str]],
+        *,
+        on_wait: Callable[[], None] = lambda: None,
+    ) -> list[str]:
+        """Return the result for `key`, produced here or by a concurrent run.
+
+        Args:
+            key: Identity of the work (see `smart_git_commit.pregen.pregen_key`).
+            produce: Generates the result when no concurrent run provides it.
+            on_wait: Called once if another run holds the lock.
+
+        Returns:
+            The produced or reused messages.
+        """
+
+        if fcntl is None or not key:
+            return produce()
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return produce()
+
+        lock_path = self._dir / f"{key}.lock"
+        result_path = self._dir / f"{key}.json"
+        started = time.time()
+        fd, waited = self._lock(lock_path, on_wait)
+        try:
+            if waited:
+                reused = self._read_result(result_path, since=started)
+                if reused is not None:
+                    return reused
+            messages = produce()
+            if fd >= 0:
+                self._write_result(result_path, messages)
+            return messages
+        finally:
+            if fd >= 0:
+                with contextlib.suppress(OSError):
+                    lock_path.unlink()
+                os.close(fd)
+
+    @staticmethod
+    def _read_result(path: Path, *, since: float) -> list[str] | None:
+        try:
+            if path.stat().st_mtime < since:
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if isinstance(data, list) and data and all(isinstance(m, str) for m in data):
+            return data
+        return None
+
+    def _write_result(self, path: Path, messages: list[str]) -> None:
+        try:
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(messages), encoding="utf-8")
+            tmp.replace(path)
+            cutoff = time.time() - _RESULT_TTL_S
+            for old in self._dir.glob("*.json"):
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,160 @@
+"""Summaries of staged submodule (gitlink) changes.
+
+In a superproject's staged diff, a submodule bump is only a pair of
+`Subproject commit <sha>` lines. To say what changed, the log and diffstat between the
+old and new commits are read from each checked-out submodule. Submodules are queried
+concurrently with a thread pool. They share one character budget and one deadline, so
+many bumps cost about as much wall time as the slowest one, and together they can't
+crowd out the superproject diff.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import subprocess
+import time
+
+
+_SUBPROJECT_PREFIX = "Subproject commit "
+# Commits listed per submodule.
+_MAX_LOG_ENTRIES = 20
+# Smallest useful summary; when the budget can't give every change this much, the
+# changes past the budget get no summary.
+_MIN_SHARE = 80
+
+
+@dataclass(frozen=True)
+class SubmoduleChange:
+    """A staged submodule change and what it contains.
+
+    Attributes:
+        path: Submodule path in the superproject.
+        old: Previously recorded commit (empty for an added submodule).
+        new: Newly recorded commit (empty for a removed submodule).
+        summary: One-line commit log and diffstat between `old` and `new`, or a note
+            explaining why it is unavailable.
+    """
+
+    path: str
+    old: str
+    new: str
+    summary: str = ""
+
+    def describe(self) -> str:
+        """Return a prompt block for this change."""
+
+        if not self.old:
+            head = f"{self.path}: added at {self.new[:12]}"
+        elif not self.new:
+            head = f"{self.path}: removed (was {self.old[:12]})"
+        else:
+            head = f"{self.path}: {self.old[:12]}..{self.new[:12]}"
+        body = "".join(f"\n  {line}" for line in self.summary.splitlines())
+        return head + body
+
+
+def gitlink_changes(diff: str) -> list[SubmoduleChange]:
+    """Return the submodule changes in a `git diff` output, without summaries."""
+
+    changes: list[SubmoduleChange] = []
+    path = ""
+    old = new = ""
+    in_gitlink = False
+
+    def _flush() -> None:
+        if in_gitlink and (old or new) and old != new:
+            changes.append(SubmoduleChange(path=path, old=old, new=new))
+
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            _flush()
+            _, _, path = line.rpartition(" b/")
+            old = new = ""
+            in_gitlink = False
+        elif line.startswith(("index ", "new file mode ", "deleted file mode ")):
+            in_gitlink = in_gitlink or line.endswith(" 160000")
+        elif line.startswith("-" + _SUBPROJECT_PREFIX):
+            old = line[1 + len(_SUBPROJECT_PREFIX) :].split()[0]
+        elif line.startswith("+" + _SUBPROJECT_PREFIX):
+            new = line[1 + len(_SUBPROJECT_PREFIX) :].split()[0]
+    _flush()
+    return changes
+
+
+def _summarize(
+    git: str, root: Path, change: SubmoduleChange, deadline: float, max_chars: int
+) -> SubmoduleChange:
+    if not change.new:
+        return change
+    cwd = root / change.path
+    if not (cwd / ".git").exists():
+        return SubmoduleChange(change.path, change.old, change.new, "(not checked out)")
+
+    def _git(*args: str) -> str:
+        timeout = max(0.1, deadline - time.monotonic())
+        proc = subprocess.run(
+            [git, *args],
+            cwd=cwd,
+            check=True,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+        )
+        return proc.stdout.strip()
+
+    rev_range = f"{change.old}..{change.new}" if change.old else change.new
+    try:
+        log = _git(
+            "log", "--no-merges", f"--max-count={_MAX_LOG_ENTRIES}", "--format=%h %s", rev_range
+        )
+        stat = _git("diff", "--shortstat", change.old, change.new) if change.old else ""
+    except subprocess.TimeoutExpired:
+        summary = "(timed out)"
+    except (OSError, subprocess.CalledProcessError):
+        summary = "(commits not available locally)"
+    else:
+        summary = "\n".join(part for part in (log, stat) if part)
+    if len(summary) > max_chars:
+        summary = summary[: max(0, max_chars - 12)].rstrip() + "\n[truncated]"
+    return SubmoduleChange(change.path, change.old, change.new, summary)
+
+
+def summarize_submodules(
+    changes: Sequence[SubmoduleChange],
+    *,
+    root: Path,
+    git: str = "git",
+    max_chars: int = 4000,
+    timeout_s: float = 10.0,
+    max_workers: int = 8,
+) -> tuple[SubmoduleChange, ...]:
+    """Fill in summaries for `changes` by querying the submodules concurrently.
+
+    Args:
+        changes: Changes from `gitlink_changes`.
+        root: Superproject worktree root.
+        git: Git executable.
+        max_chars: Character budget shared by all summaries (split evenly). Changes
+            that don't fit at `_MIN_SHARE` characters each are left without summary.
+        timeout_s: Deadline shared by all git calls; late submodules are marked timed out.
+        max_workers: Upper bound on concurrent git processes.
+
+    Returns:
+        The changes with summaries, in input order.
+    """
+
+    if not changes:
+        return ()
+    summarized = changes[: max_chars // _MIN_SHARE]
+    if not summarized:
+        return tuple(changes)
+    deadline = time.monotonic() + timeout_s
+    share = max_chars // len(summarized)
+    workers = max(1, min(max_workers, len(summarized)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sgc-submodule") as pool:
+        done = pool.map(lambda change: _summarize(git, root, change, deadline, share), summarized)
+        return (*done, *changes[len(summarized) :])
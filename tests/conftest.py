@@ -0,0 +1,86 @@
+"""Helpers shared by the test modules: throwaway repositories and `sgc` stubs."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from smart_git_commit.git_context import GitContext
+
+
+def run(cmd: list[str], cwd: Path) -> str:
+    """Run `cmd` in `cwd` and return its stdout; a non-zero exit fails the test."""
+
+    return subprocess.run(cmd, cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def commit(repo: Path, path: str, message: str, *, content: str | None = None) -> None:
+    """Write `path` (default content: `message`), stage it and commit it."""
+
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(message if content is None else content)
+    run(["git", "add", path], cwd=repo)
+    run(["git", "commit", "-m", message], cwd=repo)
+
+
+@pytest.fixture()
+def tmp_git_repo(tmp_path: Path) -> Path:
+    """An empty repository on branch `main` with a committer identity."""
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    run(["git", "init", "-b", "main"], cwd=repo)
+    run(["git", "config", "user.email", "test@example.com"], cwd=repo)
+    run(["git", "config", "user.name", "Test"], cwd=repo)
+    return repo
+
+
+class StubCollector:
+    """Stands in for `GitContextCollector`; reports one staged change."""
+
+    def __init__(self, **kwargs: object) -> None:
+        _ = kwargs
+
+    def collect(self, *, max_diff_chars: int) -> GitContext:  # noqa: ARG002
+        return GitContext(
+            branch="main",
+            status_porcelain="M a.txt",
+            staged_diff="diff --git a/a.txt b/a.txt\n+hello\n",
+            diff_truncated=False,
+            original_diff_chars=10,
+        )
+
+
+class StubClient:
+    """Stands in for `ChatCompletionsClient`; always answers `MESSAGE`."""
+
+    MESSAGE = "feat: add commit generator"
+
+    def __enter__(self) -> StubClient:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        return None
+
+    def create(self, *, model: str, messages: object, max_tokens: int, temperature: float) -> str:
+        _ = (model, messages, max_tokens, temperature)
+        return self.MESSAGE
+
+
+@pytest.fixture()
+def stub_collector(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Make `sgc` collect `StubCollector`'s change instead of the real index."""
+
+    monkeypatch.setattr("smart_git_commit.git_context.GitContextCollector", StubCollector)
+
+
+@pytest.fixture()
+def stub_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Make `sgc` talk to `StubClient` instead of an endpoint."""
+
+    monkeypatch.setattr(
+        "smart_git_commit.llm_client.ChatCompletionsClient.from_config", lambda cfg: StubClient()
+    )
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from smart_git_commit.cassette import RecordingTransport, ReplayTransport, cassette_transport
+from smart_git_commit.config import LlmConfig
+from smart_git_commit.errors import CassetteError, LlmRequestError
+from smart_git_commit.llm_client import ChatCompletionsClient, ChatMessage
+
+_MESSAGES = [ChatMessage(role="user", content="hi")]
+
+
+def _server(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    if body.get("temperature") == 1.0:
+        raise httpx.ReadTimeout("timed out", request=request)
+    return httpx.Response(
+        200,
+        headers={"x-ratelimit-remaining-requests": "9", "set-cookie": "session=abc"},
+        json={"choices": [{"message": {"content": f"feat: add {body['model']}"}}]},
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 0.25
+        return self.now
+
+
+def _record(path: Path) -> None:
+    transport = RecordingTransport(
+        path, inner=httpx.MockTransport(_server), secret="sk-secret", clock=_Clock()
+    )
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="sk-secret", timeout_s=5, transport=transport
+    ) as client:
+        assert client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0) == (
+            "feat: add m"
+        )
+        with pytest.raises(LlmRequestError, match="timed out"):
+            client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=1.0)
+
+
+def test_recording_writes_redacted_cassette_with_timings(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.json"
+    _record(path)
+
+    text = path.read_text(encoding="utf-8")
+    assert "sk-secret" not in text
+    data = json.loads(text)
+    first, second = data["interactions"]
+    assert first["request"]["path"] == "/v1/chat/completions"
+    assert first["request"]["body"]["model"] == "m"
+    assert first["response"]["status"] == 200
+    assert first["response"]["headers"]["x-ratelimit-remaining-requests"] == "9"
+    assert "set-cookie" not in first["response"]["headers"]
+    assert first["elapsed_s"] == pytest.approx(0.25)
+    assert second["error"]["type"] == "ReadTimeout"
+
+
+def test_replay_reproduces_responses_errors_and_latency(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.json"
+    _record(path)
+
+    sleeps: list[float] = []
+    transport = ReplayTransport(path, latency=2.0, sleep=sleeps.append)
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="other", timeout_s=5, transport=transport
+    ) as client:
+        assert client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0) == (
+            "feat: add m"
+        )
+        with pytest.raises(LlmRequestError, match="timed out"):
+            client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0)
+        assert transport.remaining == 0
+        with pytest.raises(CassetteError, match="no more interactions"):
+            client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0)
+
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+
+
+def test_replay_rejects_requests_that_do_not_match(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.json"
+    _record(path)
+
+    transport = ReplayTransport(path)
+    client = ChatCompletionsClient(
+        base_url="https://example.com/api/v3", api_key="k", timeout_s=5, transport=transport
+    )
+    with client, pytest.raises(CassetteError, match="recorded for POST /v1/chat/completions"):
+        client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0)
+
+
+def test_cassette_transport_validates_mode_and_file(tmp_path: Path) -> None:
+    with pytest.raises(CassetteError, match="Unknown cassette mode"):
+        cassette_transport(tmp_path / "c.json", "rewind")
+    with pytest.raises(CassetteError, match="Cannot load cassette"):
+        cassette_transport(tmp_path / "missing.json", "replay")
+
+
+def test_from_config_replays_configured_cassette(tmp_path: Path) -> None:
+    path = tmp_path / "cassette.json"
+    _record(path)
+    cfg = LlmConfig(
+        base_url="https://example.com",
+        api_key="k",
+        model="m",
+        timeout_s=5,
+        max_tokens=5,
+        max_diff_chars=100,
+        temperature=0.0,
+        cassette=str(path),
+        cassette_mode="replay",
+    )
+    with ChatCompletionsClient.from_config(cfg) as client:
+        assert client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0) == (
+            "feat: add m"
+        )
+
+
+def test_replay_retries_recorded_rate_limits(tmp_path: Path) -> None:
+    def _interaction(status: int, headers: dict[str, str], body: object) -> dict[str, object]:
+        return {
+            "request": {"method": "POST", "path": "/v1/chat/completions"},
+            "response": {"status": status, "headers": headers, "body": body},
+        }
+
+    path = tmp_path / "cassette.json"
+    ok = {"choices": [{"message": {"content": "feat: add m"}}]}
+    path.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "interactions": [
+                    _interaction(429, {"retry-after": "30"}, {"error": "slow down"}),
+                    _interaction(200, {}, ok),
+                ],
+            }
+        )
+    )
+    cfg = LlmConfig(
+        base_url="https://example.com",
+        api_key="",
+        model="m",
+        timeout_s=5,
+        max_tokens=5,
+        max_diff_chars=100,
+        temperature=0.0,
+        cassette=str(path),
+        cassette_mode="replay",
+    )
+    started = time.monotonic()
+    with ChatCompletionsClient.from_config(cfg) as client:
+        assert client.create(model="m", messages=_MESSAGES, max_tokens=5, temperature=0.0) == (
+            "feat: add m"
+        )
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.usefixtures("stub_collector")
+def test_cli_replay_needs_no_api_key(tmp_path: Path) -> None:
+    from typer.testing import CliRunner
+
+    from smart_git_commit.cli import app
+
+    path = tmp_path / "cassette.json"
+    _record(path)
+    result = CliRunner().invoke(
+        app,
+        ["--base-url", "https://example.com", "--model", "m", "--no-single-flight"],
+        env={"SGC_API_KEY": "", "OPENAI_API_KEY": "", "SGC_CASSETTE": str(path)},
+    )
+    assert result.exit_code == 0, result.output
+    assert "feat: add m" in result.output
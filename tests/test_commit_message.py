@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import pytest
 
-from smart_git_commit.commit_message import generate_commit_message
+from smart_git_commit.commit_message import generate_commit_candidates, generate_commit_message
 from smart_git_commit.config import LlmConfig
 from smart_git_commit.errors import InvalidCommitMessageError
 from smart_git_commit.git_context import GitContext
+from smart_git_commit.semantic import CommitRules
 
 
 class _StubClient:
@@ -62,3 +63,121 @@ def test_generate_commit_message_raises_when_unfixable() -> None:
         generate_commit_message(client=client, context=_ctx(), cfg=_cfg())
     assert client.calls == 2
 
+
+def test_generate_commit_message_uses_repo_rules_in_prompt_and_validation() -> None:
+    class _RecordingClient(_StubClient):
+        def __init__(self, outputs: list[str]) -> None:
+            super().__init__(outputs)
+            self.prompts: list[str] = []
+
+        def create(
+            self, *, model: str, messages: object, max_tokens: int, temperature: float
+        ) -> str:
+            self.prompts.append(messages[-1].content)  # type: ignore[index]
+            return super().create(
+                model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+            )
+
+    rules = CommitRules(scopes=("cli",), scope_required=True)
+    client = _RecordingClient(["feat: add commit generator", "feat(cli): add commit generator"])
+    out = generate_commit_message(client=client, context=_ctx(), cfg=_cfg(), rules=rules)
+    assert out == "feat(cli): add commit generator"
+    assert "Allowed scopes: cli (scope is required)" in client.prompts[0]
+    assert "Commit scope is required" in client.prompts[1]
+
+
+def test_generate_commit_message_fills_single_scope_hint_locally() -> None:
+    rules = CommitRules(scope_required=True)
+    client = _StubClient(["feat: add commit generator"])
+    out = generate_commit_message(
+        client=client, context=_ctx(), cfg=_cfg(), rules=rules, scope_hints=["cli"]
+    )
+    assert out == "feat(cli): add commit generator"
+    assert client.calls == 1
+
+
+class _MultiStubClient(_StubClient):
+    def __init__(self, choices: list[str], outputs: list[str] | None = None) -> None:
+        super().__init__(outputs or [])
+        self._choices = choices
+        self.many_calls: int = 0
+
+    def create_many(
+        self, *, model: str, messages: object, max_tokens: int, temperature: float, n: int
+    ) -> list[str]:
+        _ = (model, messages, max_tokens, temperature)
+        self.many_calls += 1
+        return self._choices[:n]
+
+
+def test_generate_commit_candidates_ranks_valid_choices_without_fix_call() -> None:
+    client = _MultiStubClient(
+        ["add commit generator", "feat: added commit generator", "feat(cli): add commit generator"]
+    )
+    out = generate_commit_candidates(
+        client=client, context=_ctx(), cfg=_cfg(), scope_hints=["cli"], n=3
+    )
+    assert out == ["feat(cli): add commit generator", "feat(cli): added commit generator"]
+    assert client.many_calls == 1
+    assert client.calls == 0
+
+
+def test_generate_commit_candidates_fixes_first_choice_when_none_is_valid() -> None:
+    client = _MultiStubClient(["add x", "also bad"], outputs=["feat: add x"])
+    out = generate_commit_candidates(client=client, context=_ctx(), cfg=_cfg(), n=2)
+    assert out == ["feat: add x"]
+    assert client.many_calls == 1
+    assert client.calls == 1
+
+
+def test_generate_commit_message_assembles_structured_output() -> None:
+    class _StructuredClient(_StubClient):
+        def create_structured(self, **kwargs: object) -> dict[str, object]:
+            self.schema = kwargs["schema"]
+            return {
+                "type": "feat", "scope": None, "subject": "add x", "body": None, "breaking": False
+            }
+
+    client = _StructuredClient([])
+    out = generate_commit_message(
+        client=client, context=_ctx(), cfg=_cfg(), scope_hints=["cli"], structured=True
+    )
+    assert out == "feat(cli): add x"
+    assert client.calls == 0
+
+
+def test_generate_commit_message_falls_back_to_text_without_structured_support() -> None:
+    class _TextOnlyClient(_StubClient):
+        def create_structured(self, **kwargs: object) -> None:
+            _ = kwargs
+            return None
+
+    client = _TextOnlyClient(["feat: add x"])
+    out = generate_commit_message(client=client, context=_ctx(), cfg=_cfg(), structured=True)
+    assert out == "feat: add x"
+    assert client.calls == 1
+
+
+def test_generate_commit_message_uses_text_answer_from_ignored_schema() -> None:
+    class _IgnoringClient(_StubClient):
+        def create_structured(self, **kwargs: object) -> str:
+            _ = kwargs
+            return "feat: add x"
+
+    client = _IgnoringClient([])
+    out = generate_commit_message(client=client, context=_ctx(), cfg=_cfg(), structured=True)
+    assert out == "feat: add x"
+    assert client.calls == 0
+
+
+def test_generation_prompt_includes_submodule_summaries() -> None:
+    from dataclasses import replace
+
+    from smart_git_commit.commit_message import _build_generation_messages
+    from smart_git_commit.submodules import SubmoduleChange
+
+    change = SubmoduleChange("libs/a", "a" * 40, "b" * 40, "abc1234 fix: patch parser")
+    messages = _build_generation_messages(replace(_ctx(), submodules=(change,)))
+    expected = "- libs/a: aaaaaaaaaaaa..bbbbbbbbbbbb\n  abc1234 fix: patch parser\n"
+    assert expected in messages[-1].content
+    assert "Submodule changes" not in _build_generation_messages(_ctx())[-1].content
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from conftest import run
+
+from smart_git_commit.errors import GitBackendUnavailableError
+from smart_git_commit.git_backend import SubprocessGitBackend, create_git_backend
+from smart_git_commit.repo import RepoHandle
+
+needs_pygit2 = pytest.mark.skipif(
+    importlib.util.find_spec("pygit2") is None, reason="pygit2 is not installed"
+)
+
+
+@pytest.fixture()
+def tmp_git_repo(tmp_git_repo: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_git_repo)
+    return tmp_git_repo
+
+
+def _backends(repo: Path) -> tuple[SubprocessGitBackend, object]:
+    handle = RepoHandle.discover(repo)
+    return SubprocessGitBackend(handle), create_git_backend("pygit2", handle)
+
+
+def _assert_parity(repo: Path, pathspecs: list[str] | None = None) -> None:
+    sub, pyg = _backends(repo)
+    specs = pathspecs or []
+    assert pyg.branch() == sub.branch()  # type: ignore[attr-defined]
+    assert pyg.staged_diff(specs) == sub.staged_diff(specs)  # type: ignore[attr-defined]
+    for untracked in (True, False):
+        expected = sub.status(specs, include_untracked=untracked)
+        assert pyg.status(specs, include_untracked=untracked) == expected  # type: ignore[attr-defined]
+
+
+@needs_pygit2
+def test_parity_on_unborn_head(tmp_git_repo: Path) -> None:
+    (tmp_git_repo / "a.txt").write_text("hello\n")
+    (tmp_git_repo / "b.txt").write_text("untracked\n")
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+    _assert_parity(tmp_git_repo)
+
+
+@needs_pygit2
+def test_parity_on_mixed_changes(tmp_git_repo: Path) -> None:
+    (tmp_git_repo / "a.txt").write_text("a\nb\n")
+    (tmp_git_repo / "gone.txt").write_text("x\n")
+    (tmp_git_repo / "ren.txt").write_text("rename me please\n")
+    run(["git", "add", "."], cwd=tmp_git_repo)
+    run(["git", "commit", "-m", "chore: init"], cwd=tmp_git_repo)
+
+    (tmp_git_repo / "a.txt").write_text("a\nc\n")
+    (tmp_git_repo / "d").mkdir()
+    (tmp_git_repo / "d" / "new.txt").write_text("n\n")
+    run(["git", "rm", "-q", "gone.txt"], cwd=tmp_git_repo)
+    run(["git", "mv", "ren.txt", "ren2.txt"], cwd=tmp_git_repo)
+    run(["git", "add", "a.txt", "d"], cwd=tmp_git_repo)
+    (tmp_git_repo / "a.txt").write_text("a\nc\nw\n")
+    (tmp_git_repo / "scratch").mkdir()
+    (tmp_git_repo / "scratch" / "u.txt").write_text("u\n")
+
+    _assert_parity(tmp_git_repo)
+    _assert_parity(tmp_git_repo, ["d"])
+    _assert_parity(tmp_git_repo, ["*.txt"])
+
+
+def test_unknown_backend_raises(tmp_git_repo: Path) -> None:
+    with pytest.raises(GitBackendUnavailableError):
+        create_git_backend("nope", RepoHandle.discover(tmp_git_repo))
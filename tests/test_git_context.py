@@ -1,27 +1,17 @@
 from __future__ import annotations
 
 import os
-import subprocess
 from pathlib import Path
 
 import pytest
+from conftest import run
 
 from smart_git_commit.errors import NoStagedChangesError, NotAGitRepositoryError
-from smart_git_commit.git_context import GitContextCollector
-
-
-def _run(cmd: list[str], cwd: Path) -> None:
-    subprocess.run(cmd, cwd=cwd, check=True, capture_output=True, text=True)
-
-
-@pytest.fixture()
-def tmp_git_repo(tmp_path: Path) -> Path:
-    repo = tmp_path / "repo"
-    repo.mkdir()
-    _run(["git", "init"], cwd=repo)
-    _run(["git", "config", "user.email", "test@example.com"], cwd=repo)
-    _run(["git", "config", "user.name", "Test"], cwd=repo)
-    return repo
+from smart_git_commit.git_context import (
+    GitContextCollector,
+    staged_paths_from_diff,
+    summarize_status,
+)
 
 
 def test_collect_raises_outside_repo(tmp_path: Path) -> None:
@@ -51,10 +41,52 @@ def test_collect_ok_with_staged_changes(tmp_git_repo: Path) -> None:
     try:
         os.chdir(tmp_git_repo)
         (tmp_git_repo / "a.txt").write_text("hello")
-        _run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+        run(["git", "add", "a.txt"], cwd=tmp_git_repo)
         ctx = GitContextCollector().collect(max_diff_chars=200)
         assert ctx.branch
         assert "a.txt" in ctx.staged_diff
     finally:
         os.chdir(cwd)
 
+
+def test_collect_monorepo_skips_untracked_and_honors_pathspec(tmp_git_repo: Path) -> None:
+    cwd = os.getcwd()
+    try:
+        os.chdir(tmp_git_repo)
+        (tmp_git_repo / "app").mkdir()
+        (tmp_git_repo / "lib").mkdir()
+        (tmp_git_repo / "app" / "a.txt").write_text("hello")
+        (tmp_git_repo / "lib" / "b.txt").write_text("world")
+        (tmp_git_repo / "untracked.txt").write_text("noise")
+        run(["git", "add", "app/a.txt", "lib/b.txt"], cwd=tmp_git_repo)
+
+        ctx = GitContextCollector(monorepo=True, pathspecs=["app"]).collect(max_diff_chars=2000)
+        assert "untracked.txt" not in ctx.status_porcelain
+        assert "app/a.txt" in ctx.status_porcelain
+        assert "lib/b.txt" not in ctx.status_porcelain
+        assert "lib/b.txt" not in ctx.staged_diff
+    finally:
+        os.chdir(cwd)
+
+
+def test_summarize_status_aggregates_by_directory_under_cap() -> None:
+    status = "\n".join(
+        [f"M  src/core/file{i}.py" for i in range(500)]
+        + [f"A  docs/page{i}.md" for i in range(100)]
+        + [f"D  pkg{i}/x.py" for i in range(300)]
+    )
+    out = summarize_status(status, max_chars=300)
+    assert len(out) <= 300
+    assert out.splitlines()[0] == "src/core/ (500 files: M=500)"
+    assert "docs/ (100 files: A=100)" in out
+    assert out.splitlines()[-1].startswith("[NOTE]")
+    assert summarize_status("M  a.txt", max_chars=300) == "M  a.txt"
+
+
+def test_staged_paths_from_diff() -> None:
+    diff = (
+        "diff --git a/a.txt b/a.txt\n+x\n"
+        "diff --git a/old.py b/new.py\nrename from old.py\n"
+        'diff --git "a/sp ace.txt" "b/sp ace.txt"\n'
+    )
+    assert staged_paths_from_diff(diff) == ("a.txt", "new.py", "sp ace.txt")
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import dataclasses
+import time
+from pathlib import Path
+
+import pytest
+from conftest import commit, run
+
+from smart_git_commit.errors import NotAGitRepositoryError
+from smart_git_commit.history import (
+    HistoryIndex,
+    _iter_log,
+    path_tokens,
+    similar_commit_headers,
+)
+from smart_git_commit.repo import RepoHandle
+
+
+@pytest.fixture()
+def tmp_git_repo(tmp_git_repo: Path) -> Path:
+    repo = tmp_git_repo
+    commit(repo, "src/cli/main.py", "feat(cli): add entrypoint")
+    commit(repo, "src/llm/client.py", "feat(llm): add chat client")
+    commit(repo, "docs/guide.md", "docs: add guide")
+    commit(repo, "src/cli/args.py", "fix(cli): parse flags")
+    return repo
+
+
+def test_path_tokens() -> None:
+    assert path_tokens("src/pkg/cli.py") == {"d:src", "d:src/pkg", "f:cli", "e:py"}
+    assert path_tokens("Makefile") == {"f:Makefile"}
+
+
+def test_index_retrieves_similar_commits_and_updates_incrementally(tmp_git_repo: Path) -> None:
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 4
+        assert index.update(repo) == 0
+        top = index.similar(["src/cli/main.py"], limit=2)
+        assert top == ["feat(cli): add entrypoint", "fix(cli): parse flags"]
+
+    commit(tmp_git_repo, "src/llm/retry.py", "feat(llm): retry requests")
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 1
+        assert len(index) == 5
+        assert index.similar(["src/llm/client.py"], limit=1) == ["feat(llm): add chat client"]
+
+
+def test_index_drops_rewritten_commits(tmp_git_repo: Path) -> None:
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 4
+
+    run(["git", "reset", "--hard", "HEAD~1"], cwd=tmp_git_repo)
+    commit(tmp_git_repo, "src/cli/opts.py", "feat(cli): add options")
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 1
+        assert len(index) == 4
+        assert "fix(cli): parse flags" not in index.similar(["src/cli/args.py"], limit=4)
+        db = index._db
+        postings = dict(db.execute("SELECT token, COUNT(*) FROM postings GROUP BY token"))
+        assert dict(db.execute("SELECT token, df FROM tokens")) == postings
+
+
+def test_switching_between_diverged_branches_only_adds_new_commits(tmp_git_repo: Path) -> None:
+    run(["git", "checkout", "-q", "-b", "feature", "HEAD~2"], cwd=tmp_git_repo)
+    commit(tmp_git_repo, "src/llm/retry.py", "feat(llm): retry requests")
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 3
+
+    run(["git", "checkout", "-q", "main"], cwd=tmp_git_repo)
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        # Only the two commits `feature` doesn't share; nothing is dropped.
+        assert index.update(repo) == 2
+        assert len(index) == 5
+
+    run(["git", "checkout", "-q", "feature"], cwd=tmp_git_repo)
+    repo = RepoHandle.discover(tmp_git_repo)
+    with HistoryIndex.for_repo(repo) as index:
+        assert index.update(repo) == 0
+        assert len(index) == 5
+        assert index.similar(["src/llm/retry.py"], limit=1) == ["feat(llm): retry requests"]
+
+
+def test_similar_commit_headers_filters_invalid_headers(tmp_git_repo: Path) -> None:
+    commit(tmp_git_repo, "src/cli/main.py", "tweak cli main")
+    repo = RepoHandle.discover(tmp_git_repo)
+    headers = similar_commit_headers(repo, ["src/cli/main.py"], limit=3)
+    assert "tweak cli main" not in headers
+    assert headers[0] == "feat(cli): add entrypoint"
+
+
+def test_stalled_git_is_killed(tmp_git_repo: Path, tmp_path: Path) -> None:
+    hung = tmp_path / "git"
+    hung.write_text("#!/bin/sh\nexec sleep 30\n")
+    hung.chmod(0o755)
+    repo = dataclasses.replace(RepoHandle.discover(tmp_git_repo), git=str(hung))
+
+    started = time.monotonic()
+    with pytest.raises(NotAGitRepositoryError, match="no output"):
+        list(_iter_log(repo, "HEAD", (), idle_timeout_s=0.2))
+    assert time.monotonic() - started < 5
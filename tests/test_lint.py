@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from conftest import run
+from typer.testing import CliRunner
+
+from smart_git_commit.cli import app
+from smart_git_commit.lint import iter_commit_messages, lint_messages
+
+
+@pytest.fixture()
+def repo_with_history(tmp_git_repo: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    repo = tmp_git_repo
+    messages = [
+        "chore: init",
+        "feat(cli): add lint command\n\n- stream git log\n- validate in a pool",
+        "update stuff",
+        "fix: handle empty range",
+    ]
+    for i, message in enumerate(messages):
+        (repo / f"f{i}.txt").write_text(str(i))
+        run(["git", "add", "."], cwd=repo)
+        run(["git", "commit", "-m", message], cwd=repo)
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def test_iter_commit_messages_streams_full_messages(repo_with_history: Path) -> None:
+    items = list(iter_commit_messages("HEAD"))
+    assert len(items) == 4
+    assert all(len(sha) == 40 for sha, _ in items)
+    assert items[2][1].startswith("feat(cli): add lint command\n\n- stream git log")
+
+
+def test_lint_messages_reports_invalid_in_order_with_pool() -> None:
+    items = [(f"{i:040x}", "feat: ok" if i % 3 else "bad header") for i in range(50)]
+    serial = lint_messages(items, jobs=1)
+    pooled = lint_messages(items, jobs=2, batch_size=8)
+    assert serial.checked == pooled.checked == 50
+    assert [i.sha for i in pooled.issues] == [i.sha for i in serial.issues]
+    assert len(serial.issues) == 17
+
+
+def test_cli_lint_outputs_json_and_fails_on_invalid(repo_with_history: Path) -> None:
+    result = CliRunner().invoke(app, ["lint", "HEAD", "--json", "--jobs", "1"])
+    assert result.exit_code == 1
+    report = json.loads(result.stdout)
+    assert report["checked"] == 4
+    assert report["invalid"] == 1
+    assert report["issues"][0]["header"] == "update stuff"
+
+
+def test_cli_lint_passes_on_valid_range(repo_with_history: Path) -> None:
+    result = CliRunner().invoke(app, ["lint", "HEAD~1..HEAD"])
+    assert result.exit_code == 0
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
+
+import pytest
 import respx
-from httpx import Response
+from httpx import Request, Response
 
-from smart_git_commit.llm_client import ChatCompletionsClient, ChatMessage
+from smart_git_commit.errors import LlmRequestError
+from smart_git_commit.llm_client import CapabilityCache, ChatCompletionsClient, ChatMessage
 
 
 @respx.mock
@@ -29,3 +34,228 @@ def test_chat_completions_client_calls_expected_endpoint() -> None:
     assert out == "feat: add x"
     assert route.called
 
+
+@respx.mock
+def test_create_many_requests_n_choices_in_one_call() -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(
+            200,
+            json={
+                "choices": [
+                    {"message": {"content": "feat: add x"}},
+                    {"message": {"content": "feat: add y"}},
+                ]
+            },
+        )
+    )
+
+    with ChatCompletionsClient(base_url="https://example.com", api_key="k", timeout_s=5) as client:
+        out = client.create_many(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.5,
+            n=2,
+        )
+
+    assert out == ["feat: add x", "feat: add y"]
+    assert route.call_count == 1
+    assert json.loads(route.calls[0].request.content)["n"] == 2
+
+
+@respx.mock
+def test_create_many_falls_back_to_sequential_calls_without_n_support() -> None:
+    def _handler(request: Request) -> Response:
+        if "n" in json.loads(request.content):
+            return Response(400, json={"error": "unknown parameter n"})
+        return Response(200, json={"choices": [{"message": {"content": "feat: add x"}}]})
+
+    route = respx.post("https://example.com/v1/chat/completions").mock(side_effect=_handler)
+    messages = [ChatMessage(role="user", content="hi")]
+
+    with ChatCompletionsClient(base_url="https://example.com", api_key="k", timeout_s=5) as client:
+        out = client.create_many(model="m", messages=messages, max_tokens=10, temperature=0.5, n=2)
+        assert out == ["feat: add x", "feat: add x"]
+        assert route.call_count == 3
+
+        # The unsupported parameter is not sent again.
+        client.create_many(model="m", messages=messages, max_tokens=10, temperature=0.5, n=2)
+        assert route.call_count == 5
+
+
+@respx.mock
+def test_create_many_reports_a_400_unrelated_to_n() -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(400, json={"error": "context length exceeded"})
+    )
+    messages = [ChatMessage(role="user", content="hi")]
+
+    with (
+        ChatCompletionsClient(base_url="https://example.com", api_key="k", timeout_s=5) as client,
+        pytest.raises(LlmRequestError, match="context length exceeded"),
+    ):
+        client.create_many(model="m", messages=messages, max_tokens=10, temperature=0.5, n=3)
+
+    # The n request and one plain request; the bad request is not repeated n times.
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_create_many_tops_up_when_server_ignores_n() -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(200, json={"choices": [{"message": {"content": "feat: add x"}}]})
+    )
+
+    with ChatCompletionsClient(base_url="https://example.com", api_key="k", timeout_s=5) as client:
+        out = client.create_many(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.5,
+            n=3,
+        )
+
+    assert len(out) == 3
+    assert route.call_count == 3
+
+
+_SCHEMA = {"type": "object", "properties": {"subject": {"type": "string"}}}
+
+
+@respx.mock
+def test_create_structured_uses_json_schema_and_caches_capability(tmp_path: Path) -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(200, json={"choices": [{"message": {"content": '{"subject": "x"}'}}]})
+    )
+    cache = CapabilityCache(tmp_path / "capabilities.json")
+
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="k", timeout_s=5, capabilities=cache
+    ) as client:
+        out = client.create_structured(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.0,
+            schema=_SCHEMA,
+            name="commit_message",
+        )
+
+    assert out == {"subject": "x"}
+    body = json.loads(route.calls[0].request.content)
+    assert body["response_format"]["json_schema"]["schema"] == _SCHEMA
+    assert CapabilityCache(tmp_path / "capabilities.json").get("https://example.com/v1|m") == (
+        "json_schema"
+    )
+
+
+@respx.mock
+def test_create_structured_falls_back_to_tool_calls() -> None:
+    def _handler(request: Request) -> Response:
+        if "response_format" in json.loads(request.content):
+            return Response(400, json={"error": "response_format not supported"})
+        call = {"function": {"name": "commit_message", "arguments": '{"subject": "y"}'}}
+        return Response(200, json={"choices": [{"message": {"tool_calls": [call]}}]})
+
+    route = respx.post("https://example.com/v1/chat/completions").mock(side_effect=_handler)
+    cache = CapabilityCache()
+    kwargs = dict(
+        model="m",
+        messages=[ChatMessage(role="user", content="hi")],
+        max_tokens=10,
+        temperature=0.0,
+        schema=_SCHEMA,
+        name="commit_message",
+    )
+
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="k", timeout_s=5, capabilities=cache
+    ) as client:
+        assert client.create_structured(**kwargs) == {"subject": "y"}  # type: ignore[arg-type]
+        assert route.call_count == 2
+        # The working mode is remembered: no second probe.
+        assert client.create_structured(**kwargs) == {"subject": "y"}  # type: ignore[arg-type]
+        assert route.call_count == 3
+    assert cache.get("https://example.com/v1|m") == "tools"
+
+
+@respx.mock
+def test_create_structured_remembers_unsupported_endpoints() -> None:
+    def _handler(request: Request) -> Response:
+        body = json.loads(request.content)
+        if "response_format" in body or "tools" in body:
+            return Response(400, json={"error": "unsupported"})
+        return Response(200, json={"choices": [{"message": {"content": "f"}}]})
+
+    route = respx.post("https://example.com/v1/chat/completions").mock(side_effect=_handler)
+    cache = CapabilityCache()
+    kwargs = dict(
+        model="m",
+        messages=[ChatMessage(role="user", content="hi")],
+        max_tokens=10,
+        temperature=0.0,
+        schema=_SCHEMA,
+        name="commit_message",
+    )
+
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="k", timeout_s=5, capabilities=cache
+    ) as client:
+        assert client.create_structured(**kwargs) is None  # type: ignore[arg-type]
+        # Both mechanisms, then a one-token plain request confirming the prompt is fine.
+        assert route.call_count == 3
+        assert json.loads(route.calls[2].request.content)["max_tokens"] == 1
+        assert client.create_structured(**kwargs) is None  # type: ignore[arg-type]
+        assert route.call_count == 3
+    assert cache.get("https://example.com/v1|m") == "none"
+
+
+@respx.mock
+def test_create_structured_does_not_remember_rejected_prompts(tmp_path: Path) -> None:
+    error = {"error": {"code": "context_length_exceeded", "message": "too long"}}
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(400, json=error)
+    )
+    path = tmp_path / "capabilities.json"
+    cache = CapabilityCache(path)
+
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="k", timeout_s=5, capabilities=cache
+    ) as client:
+        out = client.create_structured(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.0,
+            schema=_SCHEMA,
+            name="commit_message",
+        )
+
+    assert out is None
+    assert route.call_count == 3
+    assert CapabilityCache(path).get("https://example.com/v1|m") is None
+
+
+@respx.mock
+def test_create_structured_returns_text_when_parameters_are_ignored() -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        return_value=Response(200, json={"choices": [{"message": {"content": "feat: add x"}}]})
+    )
+    cache = CapabilityCache()
+
+    with ChatCompletionsClient(
+        base_url="https://example.com", api_key="k", timeout_s=5, capabilities=cache
+    ) as client:
+        out = client.create_structured(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.0,
+            schema=_SCHEMA,
+            name="commit_message",
+        )
+
+    # The first answer is used; no tools probe and no extra text request.
+    assert out == "feat: add x"
+    assert route.call_count == 1
+    assert cache.get("https://example.com/v1|m") == "none"
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from conftest import commit, run
+from typer.testing import CliRunner
+
+from smart_git_commit.config import LlmConfig
+from smart_git_commit.pipeline import PipelineOptions
+from smart_git_commit.pregen import IndexWatcher, PregenStore, pregen_key, watch
+from smart_git_commit.repo import RepoHandle
+
+
+def _cfg(**kwargs: object) -> LlmConfig:
+    return LlmConfig(
+        base_url="https://example.com/v1",
+        api_key="k",
+        model="m",
+        timeout_s=5,
+        max_tokens=50,
+        max_diff_chars=1000,
+        temperature=0.2,
+        **kwargs,  # type: ignore[arg-type]
+    )
+
+
+@pytest.fixture()
+def tmp_git_repo(tmp_git_repo: Path) -> Path:
+    commit(tmp_git_repo, "a.txt", "chore: init", content="a\n")
+    return tmp_git_repo
+
+
+def test_store_round_trip_and_eviction(tmp_path: Path) -> None:
+    store = PregenStore(tmp_path / "sgc" / "pregen.json")
+    assert store.get("k0") is None
+    for i in range(20):
+        store.put(f"k{i}", [f"feat: add {i}"])
+    assert store.get("k19") == ["feat: add 19"]
+    assert store.get("k0") is None
+    assert len(json.loads(store.path.read_text())) == 16
+
+
+def test_key_tracks_staged_changes_and_options(tmp_git_repo: Path) -> None:
+    repo = RepoHandle.discover(tmp_git_repo)
+    opts = PipelineOptions()
+    first = pregen_key(repo, _cfg(), opts)
+    assert first == pregen_key(repo, _cfg(), opts)
+    assert first != pregen_key(repo, _cfg(), PipelineOptions(examples=3))
+
+    # Unstaged edits do not change the key; staging them does.
+    (tmp_git_repo / "a.txt").write_text("b\n")
+    assert pregen_key(repo, _cfg(), opts) == first
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+    assert pregen_key(repo, _cfg(), opts) != first
+
+
+def test_key_does_not_write_to_the_repository(tmp_git_repo: Path) -> None:
+    (tmp_git_repo / "d").mkdir()
+    (tmp_git_repo / "d" / "b.txt").write_text("b\n")
+    run(["git", "add", "d"], cwd=tmp_git_repo)
+    repo = RepoHandle.discover(tmp_git_repo)
+    git_dir = tmp_git_repo / ".git"
+
+    def _objects() -> set[Path]:
+        return set((git_dir / "objects").rglob("*"))
+
+    index_before = (git_dir / "index").stat().st_mtime_ns
+    objects_before = _objects()
+    assert pregen_key(repo, _cfg(), PipelineOptions())
+    # `git write-tree` would have stored tree objects for the new directory.
+    assert _objects() == objects_before
+    assert (git_dir / "index").stat().st_mtime_ns == index_before
+
+
+def test_key_is_unavailable_with_conflicts(tmp_git_repo: Path) -> None:
+    run(["git", "checkout", "-q", "-b", "other"], cwd=tmp_git_repo)
+    (tmp_git_repo / "a.txt").write_text("other\n")
+    run(["git", "commit", "-qam", "fix: other"], cwd=tmp_git_repo)
+    run(["git", "checkout", "-q", "main"], cwd=tmp_git_repo)
+    (tmp_git_repo / "a.txt").write_text("main\n")
+    run(["git", "commit", "-qam", "fix: main"], cwd=tmp_git_repo)
+    subprocess.run(["git", "merge", "other"], cwd=tmp_git_repo, capture_output=True)
+    assert pregen_key(RepoHandle.discover(tmp_git_repo), _cfg(), PipelineOptions()) == ""
+
+
+@pytest.mark.parametrize("force_polling", [False, True])
+def test_index_watcher_sees_staging(tmp_git_repo: Path, force_polling: bool) -> None:
+    repo = RepoHandle.discover(tmp_git_repo)
+    with IndexWatcher(
+        repo.git_dir / "index", poll_interval_s=0.01, force_polling=force_polling
+    ) as watcher:
+        assert not watcher.wait(0.05)
+        time.sleep(0.01)  # Distinct mtime for the polling signature.
+        (tmp_git_repo / "b.txt").write_text("b\n")
+        run(["git", "add", "b.txt"], cwd=tmp_git_repo)
+        assert watcher.wait(2.0)
+
+
+def test_cli_prints_pregenerated_message_without_calling_the_model(
+    tmp_git_repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from smart_git_commit import cli as cli_mod
+
+    def _no_client(cfg: LlmConfig) -> None:
+        raise AssertionError("the model must not be called")
+
+    monkeypatch.setattr("smart_git_commit.llm_client.ChatCompletionsClient.from_config", _no_client)
+    monkeypatch.chdir(tmp_git_repo)
+    (tmp_git_repo / "a.txt").write_text("b\n")
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+
+    repo = RepoHandle.discover(tmp_git_repo)
+    cfg = _cfg()
+    key = pregen_key(repo, cfg, PipelineOptions(git_backend="subprocess"))
+    PregenStore.for_repo(repo).put(key, ["fix: update a", "fix: change a"])
+
+    result = CliRunner().invoke(
+        cli_mod.app,
+        [
+            "--api-key", "k", "--base-url", cfg.base_url, "--model", cfg.model,
+            "--max-tokens", "50", "--temperature", "0.2", "--max-diff-chars", "1000",
+            "--git-backend", "subprocess",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "fix: update a" in result.output
+    assert "Alternate 1:" in result.output
+
+
+def test_watch_pregenerates_for_the_staged_tree(
+    tmp_git_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_git_repo)
+    cassette = tmp_path / "cassette.json"
+    cassette.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "interactions": [
+                    {
+                        "request": {"method": "POST", "path": "/v1/chat/completions", "body": {}},
+                        "response": {
+                            "status": 200,
+                            "headers": {"content-type": "application/json"},
+                            "body": {"choices": [{"message": {"content": "feat: add b"}}]},
+                        },
+                        "elapsed_s": 0.0,
+                    }
+                ],
+            }
+        )
+    )
+    repo = RepoHandle.discover(tmp_git_repo)
+    cfg = _cfg(cassette=str(cassette), cassette_mode="replay", rate_limit_wait_s=0.0)
+    opts = PipelineOptions(infer_scope=False, structured=False)
+    (tmp_git_repo / "b.txt").write_text("b\n")
+    run(["git", "add", "b.txt"], cwd=tmp_git_repo)
+    key = pregen_key(repo, cfg, opts)
+
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch,
+        args=(repo, cfg, opts),
+        kwargs={"debounce_s": 0.05, "poll_interval_s": 0.05, "stop": stop},
+    )
+    thread.start()
+    try:
+        deadline = time.monotonic() + 30
+        while PregenStore.for_repo(repo).get(key) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+    assert PregenStore.for_repo(repo).get(key) == ["feat: add b"]
+
+
+def test_watch_cancels_stale_speculation_and_follows_branch_switches(
+    tmp_git_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_git_repo)
+    cassette = tmp_path / "cassette.json"
+    slow = {
+        "request": {"method": "POST", "path": "/v1/chat/completions", "body": {}},
+        "response": {"status": 200, "body": {"choices": [{"message": {"content": "feat: x"}}]}},
+        "elapsed_s": 60.0,
+    }
+    cassette.write_text(json.dumps({"version": 1, "interactions": [slow]}))
+    cfg = _cfg(
+        cassette=str(cassette), cassette_mode="replay", cassette_latency=1.0, rate_limit_wait_s=0.0
+    )
+    opts = PipelineOptions()
+    inflight = tmp_git_repo / ".git" / "sgc" / "inflight"
+
+    def _wait_for_lock(key: str) -> None:
+        deadline = time.monotonic() + 30
+        while not (inflight / f"{key}.lock").exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert (inflight / f"{key}.lock").exists()
+
+    (tmp_git_repo / "b.txt").write_text("b\n")
+    run(["git", "add", "b.txt"], cwd=tmp_git_repo)
+    stale_key = pregen_key(RepoHandle.discover(tmp_git_repo), cfg, opts)
+
+    logs: list[str] = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch,
+        args=(RepoHandle.discover(tmp_git_repo), cfg, opts),
+        kwargs={"debounce_s": 0.05, "poll_interval_s": 0.05, "stop": stop, "log": logs.append},
+    )
+    thread.start()
+    try:
+        _wait_for_lock(stale_key)
+        run(["git", "checkout", "-q", "-b", "feature"], cwd=tmp_git_repo)
+        (tmp_git_repo / "c.txt").write_text("c\n")
+        run(["git", "add", "c.txt"], cwd=tmp_git_repo)
+        fresh = RepoHandle.discover(tmp_git_repo)
+        assert fresh.branch == "feature"
+        # The watcher keys the new speculation like a fresh `sgc` on `feature` would.
+        _wait_for_lock(pregen_key(fresh, cfg, opts))
+    finally:
+        stop.set()
+        thread.join()
+    assert "Staged tree changed; canceled stale generation." in logs
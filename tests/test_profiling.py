@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from smart_git_commit.profiling import PipelineProfiler, phase
+
+
+def _work(size: int) -> bytes:
+    return b"x" * size
+
+
+def test_phase_is_a_no_op_without_profiler() -> None:
+    with phase("collect"):
+        assert _work(3) == b"xxx"
+
+
+def test_cpu_profile_per_phase(tmp_path: Path) -> None:
+    with PipelineProfiler("cpu", tmp_path, top=50) as profiler:
+        for _ in range(2):
+            with phase("create"):
+                _work(10)
+        with phase("collect"), phase("prompt"):  # Nested phases count towards the outer one.
+            _work(10)
+
+    assert [(s.name, s.calls) for s in profiler.phases.values()] == [("create", 2), ("collect", 1)]
+    paths = profiler.write()
+    assert sorted(p.name for p in paths) == ["cpu-collect.pstats", "cpu-create.pstats"]
+    funcs = pstats.Stats(str(tmp_path / "cpu-create.pstats")).get_stats_profile().func_profiles
+    assert "_work" in funcs
+
+    summary = "\n".join(profiler.summary())
+    assert "create" in summary and "functions by own time" in summary
+    assert "_work" in summary
+
+
+def test_memory_profile_reports_peak_and_allocation_sites(tmp_path: Path) -> None:
+    kept: list[bytes] = []
+    with PipelineProfiler("memory", tmp_path) as profiler, phase("collect"):
+        _work(4 << 20)  # Freed before the phase ends: only visible in the peak.
+        kept.append(_work(1 << 20))
+
+    assert not tracemalloc.is_tracing()
+    stats = profiler.phases["collect"]
+    assert stats.peak_bytes > 3 << 20
+    assert [p.name for p in profiler.write()] == ["memory-collect.snapshot"]
+    snapshot = tracemalloc.Snapshot.load(str(tmp_path / "memory-collect.snapshot"))
+    assert snapshot.statistics("lineno")
+
+    summary = "\n".join(profiler.summary())
+    assert "peak MiB" in summary
+    assert "test_profiling.py" in summary
+
+
+def test_unknown_mode_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="cpu, memory"):
+        PipelineProfiler("wall", tmp_path)
+
+
+@pytest.mark.usefixtures("stub_collector", "stub_client")
+def test_cli_profile_writes_files_and_summary(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    from smart_git_commit import cli as cli_mod
+
+    out_dir = tmp_path / "prof"
+    args = ["--api-key", "k", "--no-single-flight", "--profile-dir", str(out_dir)]
+    result = CliRunner().invoke(cli_mod.app, [*args, "--profile", "cpu"])
+    assert result.exit_code == 0, result.output
+    assert "feat: add commit generator" in result.output
+    assert "Profile (cpu)" in result.output
+    names = {p.name for p in out_dir.iterdir()}
+    assert {"cpu-config.pstats", "cpu-collect.pstats", "cpu-prompt.pstats"} <= names
+    assert {"cpu-create.pstats", "cpu-normalize.pstats"} <= names
+
+    result = CliRunner().invoke(cli_mod.app, [*args, "--profile", "wall"])
+    assert result.exit_code == 2
+    assert "'cpu', 'memory'" in result.output
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    result = CliRunner().invoke(
+        cli_mod.app, ["--api-key", "k", "--no-single-flight", "--profile", "memory"]
+    )
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "cache" / "sgc" / "profile" / "memory-collect.snapshot").exists()
+
+
+def test_cli_profile_rejects_subcommands() -> None:
+    from smart_git_commit import cli as cli_mod
+
+    result = CliRunner().invoke(cli_mod.app, ["--profile", "cpu", "watch"])
+    assert result.exit_code == 2
+    assert "not `sgc watch`" in result.output
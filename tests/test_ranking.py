@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from smart_git_commit.ranking import rank_commit_messages, score_commit_message
+from smart_git_commit.semantic import CommitRules
+
+
+def test_score_prefers_imperative_mood() -> None:
+    assert score_commit_message("feat: add parser") > score_commit_message("feat: added parser")
+    assert score_commit_message("feat: add parser") > score_commit_message("feat: adds parser")
+    assert score_commit_message("feat: add parser") > score_commit_message("feat: Add parser")
+    assert score_commit_message("fix: address review") == score_commit_message("fix: remove flag")
+
+
+def test_score_penalizes_long_headers() -> None:
+    short = "feat: add parser"
+    long = "feat: add a parser for the configuration files used by the command line"
+    assert score_commit_message(short) > score_commit_message(long)
+
+
+def test_score_rewards_scope_consistency() -> None:
+    hints = ["cli", "git"]
+    assert score_commit_message("feat(cli): add x", scope_hints=hints) > score_commit_message(
+        "feat(git): add x", scope_hints=hints
+    )
+    assert score_commit_message("feat(git): add x", scope_hints=hints) > score_commit_message(
+        "feat: add x", scope_hints=hints
+    )
+    assert score_commit_message("feat: add x", scope_hints=hints) == score_commit_message(
+        "feat(docs): add x", scope_hints=hints
+    )
+
+
+def test_rank_drops_invalid_and_duplicates_and_keeps_order_on_ties() -> None:
+    ranked = rank_commit_messages(
+        [
+            "added parser",
+            "feat: added parser",
+            "feat: add parser",
+            "feat: add parser",
+            "fix: handle empty input",
+        ]
+    )
+    assert ranked == ["feat: add parser", "fix: handle empty input", "feat: added parser"]
+
+
+def test_rank_applies_rules() -> None:
+    rules = CommitRules(scopes=("cli",), scope_required=True)
+    assert rank_commit_messages(["feat: add x", "feat(cli): add x"], rules=rules) == [
+        "feat(cli): add x"
+    ]
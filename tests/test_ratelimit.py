@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+import respx
+from httpx import Response
+
+from smart_git_commit.errors import LlmRequestError
+from smart_git_commit.llm_client import ChatCompletionsClient, ChatMessage
+from smart_git_commit.ratelimit import RateLimitScheduler, parse_duration, parse_retry_after
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(tmp_path: Path, clock: _FakeClock, max_wait_s: float = 60.0) -> RateLimitScheduler:
+    return RateLimitScheduler(
+        tmp_path / "ratelimit.json", max_wait_s=max_wait_s, clock=clock, sleep=clock.sleep
+    )
+
+
+def test_parse_duration_and_retry_after() -> None:
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("soon") is None
+    assert parse_retry_after({"retry-after": "3"}, now=0) == 3
+    assert parse_retry_after({"retry-after-ms": "250"}, now=0) == 0.25
+    assert parse_retry_after({}, now=0) is None
+
+
+def test_scheduler_paces_when_bucket_is_empty(tmp_path: Path) -> None:
+    clock = _FakeClock()
+    headers = {
+        "x-ratelimit-limit-requests": "10",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "10s",
+    }
+    scheduler = _scheduler(tmp_path, clock)
+    scheduler.observe("k", headers, 200)
+    scheduler.acquire("k", tokens=100)
+    # One request refills after a tenth of the window.
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+    # A second process sees the same state and the reservation just made.
+    other = _scheduler(tmp_path, clock)
+    other.acquire("k", tokens=100)
+    assert clock.sleeps[-1] == pytest.approx(1.0)
+
+
+def test_scheduler_gives_up_beyond_wait_budget(tmp_path: Path) -> None:
+    clock = _FakeClock()
+    scheduler = _scheduler(tmp_path, clock, max_wait_s=5)
+    assert scheduler.observe("k", {"retry-after": "20"}, 429) == 20
+    with pytest.raises(LlmRequestError):
+        scheduler.acquire("k", tokens=1)
+
+
+@respx.mock
+def test_client_waits_and_retries_after_429(tmp_path: Path) -> None:
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        side_effect=[
+            Response(429, headers={"retry-after": "2"}, json={"error": "slow down"}),
+            Response(200, json={"choices": [{"message": {"content": "feat: add x"}}]}),
+        ]
+    )
+    clock = _FakeClock()
+    client = ChatCompletionsClient(
+        base_url="https://example.com",
+        api_key="k",
+        timeout_s=5,
+        scheduler=_scheduler(tmp_path, clock),
+    )
+    try:
+        out = client.create(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.0,
+        )
+    finally:
+        client.close()
+
+    assert out == "feat: add x"
+    assert route.call_count == 2
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        "x",
+        {"requests": {"limit": 1}},
+        {"requests": {"limit": 10, "remaining": 0, "rate": 0, "updated_at": 0}},
+        {"tokens": {"limit": "10", "remaining": 0, "rate": 1, "updated_at": 0}},
+        {"blocked_until": "soon"},
+        {"blocked_until": None, "requests": []},
+    ],
+)
+def test_malformed_state_entries_are_reset(tmp_path: Path, entry: object) -> None:
+    clock = _FakeClock()
+    state = tmp_path / "ratelimit.json"
+    state.write_text(json.dumps({"k": entry, "other": {"blocked_until": 5}}))
+    scheduler = _scheduler(tmp_path, clock)
+
+    scheduler.acquire("k", tokens=100)
+    assert clock.sleeps == []
+    assert scheduler.observe("k", {"retry-after": "2"}, 429) == 2
+    assert json.loads(state.read_text()) == {
+        "k": {"blocked_until": clock.now + 2},
+        "other": {"blocked_until": 5},
+    }
+
+
+@respx.mock
+def test_unusable_cache_dir_disables_pacing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(blocker / "cache"))
+    route = respx.post("https://example.com/v1/chat/completions").mock(
+        side_effect=[
+            Response(429, headers={"retry-after": "0"}, json={"error": "slow down"}),
+            Response(200, json={"choices": [{"message": {"content": "feat: add x"}}]}),
+        ]
+    )
+    client = ChatCompletionsClient(
+        base_url="https://example.com",
+        api_key="k",
+        timeout_s=5,
+        scheduler=RateLimitScheduler.default(),
+    )
+    try:
+        out = client.create(
+            model="m",
+            messages=[ChatMessage(role="user", content="hi")],
+            max_tokens=10,
+            temperature=0.0,
+        )
+    finally:
+        client.close()
+
+    # No traceback from the state file; Retry-After is still honored.
+    assert out == "feat: add x"
+    assert route.call_count == 2
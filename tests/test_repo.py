@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+from conftest import run
+
+from smart_git_commit.errors import NotAGitRepositoryError
+from smart_git_commit.git_context import GitContextCollector
+from smart_git_commit.repo import RepoHandle
+
+
+def test_discover_from_subdirectory(tmp_git_repo: Path) -> None:
+    sub = tmp_git_repo / "sub"
+    sub.mkdir()
+    handle = RepoHandle.discover(sub)
+    assert handle.toplevel.resolve() == tmp_git_repo.resolve()
+    assert handle.git_dir.resolve() == (tmp_git_repo / ".git").resolve()
+    assert handle.common_dir.resolve() == (tmp_git_repo / ".git").resolve()
+    assert handle.branch == "main"
+
+
+def test_discover_raises_outside_repo(tmp_path: Path) -> None:
+    with pytest.raises(NotAGitRepositoryError):
+        RepoHandle.discover(tmp_path)
+    assert RepoHandle.try_discover(tmp_path) is None
+
+
+def test_discover_linked_worktree_and_detached_head(tmp_git_repo: Path, tmp_path: Path) -> None:
+    (tmp_git_repo / "a.txt").write_text("hello")
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+    run(["git", "commit", "-m", "feat: init"], cwd=tmp_git_repo)
+    sha = run(["git", "rev-parse", "HEAD"], cwd=tmp_git_repo).strip()
+
+    wt = tmp_path / "wt"
+    run(["git", "worktree", "add", "--detach", str(wt)], cwd=tmp_git_repo)
+    handle = RepoHandle.discover(wt)
+    assert handle.toplevel.resolve() == wt.resolve()
+    assert handle.git_dir.resolve() != handle.common_dir.resolve()
+    assert handle.common_dir.resolve() == (tmp_git_repo / ".git").resolve()
+    assert handle.branch == f"detached@{sha[:7]}"
+
+
+def test_detached_branch_uses_gits_short_sha(tmp_git_repo: Path) -> None:
+    (tmp_git_repo / "a.txt").write_text("hello")
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+    run(["git", "commit", "-m", "feat: init"], cwd=tmp_git_repo)
+    run(["git", "checkout", "-q", "--detach"], cwd=tmp_git_repo)
+    run(["git", "config", "core.abbrev", "12"], cwd=tmp_git_repo)
+    short = run(["git", "rev-parse", "--short", "HEAD"], cwd=tmp_git_repo).strip()
+
+    assert len(short) == 12
+    assert RepoHandle.discover(tmp_git_repo).branch == f"detached@{short}"
+
+
+def test_collect_with_handle_only_runs_status_and_diff(
+    tmp_git_repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_git_repo)
+    (tmp_git_repo / "a.txt").write_text("hello")
+    run(["git", "add", "a.txt"], cwd=tmp_git_repo)
+    handle = RepoHandle.discover()
+
+    calls: list[list[str]] = []
+    real_run = subprocess.run
+
+    def _spy(cmd: list[str], **kwargs: object) -> object:
+        calls.append(cmd)
+        return real_run(cmd, **kwargs)  # type: ignore[call-overload]
+
+    monkeypatch.setattr(subprocess, "run", _spy)
+    ctx = GitContextCollector(repo=handle).collect()
+    assert ctx.branch == "main"
+    assert [c[1] for c in calls] == ["status", "diff"]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from smart_git_commit.errors import RulesConfigError
+from smart_git_commit.rules import load_commit_rules, parse_commitlint_config
+from smart_git_commit.semantic import DEFAULT_RULES, CommitRules
+
+
+def test_parse_commitlint_config_supported_subset() -> None:
+    rules = parse_commitlint_config(
+        {
+            "extends": ["@commitlint/config-conventional"],
+            "parserPreset": {"parserOpts": {"issuePrefixes": ["PROJ-"]}},
+            "rules": {
+                "type-enum": [2, "always", ["feat", "fix"]],
+                "scope-enum": [2, "always", ["cli"]],
+                "scope-empty": [2, "never"],
+                "header-max-length": [2, "always", 72],
+                "subject-full-stop": [2, "never", "."],
+                "references-empty": [2, "never"],
+                "breaking-body-empty": [2, "never"],
+                "body-max-line-length": [2, "always", 100],
+                "subject-case": [1, "always", "lower-case"],
+            },
+        }
+    )
+    assert rules == CommitRules(
+        types=("feat", "fix"),
+        scopes=("cli",),
+        scope_required=True,
+        header_max_length=72,
+        subject_no_full_stop=True,
+        breaking_body_required=True,
+        references_required=True,
+        issue_prefixes=("PROJ-",),
+    )
+
+
+def test_parse_commitlint_config_ignores_disabled_rules() -> None:
+    assert parse_commitlint_config({"rules": {"type-enum": [0, "always", ["x"]]}}) == DEFAULT_RULES
+
+
+def test_parse_commitlint_config_ignores_string_parser_preset() -> None:
+    rules = parse_commitlint_config(
+        {
+            "parserPreset": "conventional-changelog-conventionalcommits",
+            "rules": {"references-empty": [2, "never"]},
+        }
+    )
+    assert rules.references_required
+    assert rules.issue_prefixes == DEFAULT_RULES.issue_prefixes
+
+
+def test_parse_commitlint_config_rejects_malformed_rule() -> None:
+    with pytest.raises(RulesConfigError):
+        parse_commitlint_config({"rules": {"type-enum": [2, "always", "feat"]}})
+
+
+def test_load_commit_rules_from_repo_root(tmp_path: Path) -> None:
+    assert load_commit_rules(tmp_path) is DEFAULT_RULES
+    (tmp_path / ".commitlintrc.json").write_text(
+        json.dumps({"rules": {"header-max-length": [2, "always", 50]}}), encoding="utf-8"
+    )
+    assert load_commit_rules(tmp_path).header_max_length == 50
+
+    (tmp_path / ".commitlintrc.json").write_text("{not json", encoding="utf-8")
+    with pytest.raises(RulesConfigError):
+        load_commit_rules(tmp_path)
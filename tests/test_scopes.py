@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+from conftest import commit
+
+from smart_git_commit.errors import RulesConfigError
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.scopes import ScopeMap, ScopeTrie, _iter_scoped_commits
+
+
+@pytest.fixture()
+def tmp_git_repo(tmp_git_repo: Path) -> Path:
+    repo = tmp_git_repo
+    commit(repo, "src/cli/main.py", "feat(cli): add entrypoint")
+    commit(repo, "src/cli/args.py", "fix(cli): parse flags")
+    commit(repo, "src/llm/client.py", "feat(llm): add client")
+    commit(repo, "src/llm/retry.py", "feat(llm): retry")
+    return repo
+
+
+def test_trie_picks_deepest_dominant_scope() -> None:
+    trie = ScopeTrie()
+    for _ in range(3):
+        trie.vote(["src/cli/main.py"], "cli")
+        trie.vote(["src/llm/client.py"], "llm")
+    trie.vote(["src/misc/x.py"], "misc")
+    trie.decide()
+    assert trie.lookup("src/cli/new/deep.py") == "cli"
+    assert trie.lookup("src/llm/client.py") == "llm"
+    assert trie.lookup("src/misc/x.py") is None
+    assert trie.lookup("README.md") is None
+
+
+def test_trie_counts_one_vote_per_commit() -> None:
+    trie = ScopeTrie()
+    # One large commit must not outweigh several small ones.
+    trie.vote([f"src/core/m{i}.py" for i in range(50)], "bulk")
+    for _ in range(3):
+        trie.vote(["src/core/a.py", "src/core/b.py"], "core")
+    trie.decide()
+    assert trie.root["c"]["src"]["c"]["core"]["n"] == {"bulk": 1, "core": 3}
+    assert trie.lookup("src/core/x.py") == "core"
+
+
+def test_scope_map_learns_from_history_and_updates_on_head_move(tmp_git_repo: Path) -> None:
+    scopes = ScopeMap.for_repo(RepoHandle.discover(tmp_git_repo))
+    assert scopes.infer(["src/cli/new.py", "src/cli/main.py", "src/llm/client.py"]) == [
+        "cli",
+        "llm",
+    ]
+    assert (tmp_git_repo / ".git" / "sgc" / "scopes.json").exists()
+
+    commit(tmp_git_repo, "web/app.ts", "feat(web): add app")
+    commit(tmp_git_repo, "web/page.ts", "feat(web): add page")
+    scopes = ScopeMap.for_repo(RepoHandle.discover(tmp_git_repo))
+    assert scopes.lookup("web/other.ts") == "web"
+    assert scopes.lookup("src/cli/main.py") == "cli"
+
+
+def test_scope_overrides_take_precedence(tmp_git_repo: Path) -> None:
+    (tmp_git_repo / ".sgc-scopes.json").write_text(
+        json.dumps({"src/cli/args.py": "args"}), encoding="utf-8"
+    )
+    scopes = ScopeMap.for_repo(RepoHandle.discover(tmp_git_repo))
+    assert scopes.lookup("src/cli/args.py") == "args"
+    assert scopes.lookup("src/cli/main.py") == "cli"
+
+    (tmp_git_repo / ".sgc-scopes.json").write_text("[1]", encoding="utf-8")
+    with pytest.raises(RulesConfigError):
+        ScopeMap.for_repo(RepoHandle.discover(tmp_git_repo))
+
+
+def test_history_scan_times_out(tmp_git_repo: Path, tmp_path: Path) -> None:
+    hung = tmp_path / "git"
+    hung.write_text("#!/bin/sh\nexec sleep 30\n")
+    hung.chmod(0o755)
+    repo = dataclasses.replace(RepoHandle.discover(tmp_git_repo), git=str(hung))
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        list(_iter_scoped_commits(repo, "HEAD", None, timeout_s=0.2))
@@ -3,7 +3,16 @@ from __future__ import annotations
 import pytest
 
 from smart_git_commit.errors import InvalidCommitMessageError
-from smart_git_commit.semantic import normalize_commit_message, validate_commit_message
+from smart_git_commit.semantic import (
+    CommitRules,
+    apply_scope,
+    assemble_commit_message,
+    check_commit_message,
+    commit_message_schema,
+    compile_rules,
+    normalize_commit_message,
+    validate_commit_message,
+)
 
 
 def test_validate_commit_message_accepts_basic() -> None:
@@ -23,3 +32,70 @@ def test_normalize_commit_message_strips_wrappers() -> None:
     assert normalize_commit_message("Commit message: feat: add x") == "feat: add x"
     assert normalize_commit_message("'feat: add x'") == "feat: add x"
 
+
+def test_validate_commit_message_with_custom_rules() -> None:
+    rules = CommitRules(
+        types=("feat", "fix"),
+        scopes=("cli", "git"),
+        scope_required=True,
+        header_max_length=30,
+        breaking_body_required=True,
+        references_required=True,
+        issue_prefixes=("PROJ-",),
+    )
+    validate_commit_message("feat(cli): add lint\n\nRefs PROJ-12", rules)
+    validate_commit_message("feat(cli)!: drop flag\n\nRemoved --x. PROJ-3", rules)
+
+    bad = [
+        "docs(cli): add lint\n\nPROJ-1",
+        "feat: add lint\n\nPROJ-1",
+        "feat(llm): add lint\n\nPROJ-1",
+        "feat(cli): add a much longer subject here\n\nPROJ-1",
+        "feat(cli)!: drop flag PROJ-3",
+        "feat(cli): add lint",
+    ]
+    for message in bad:
+        assert check_commit_message(message, rules) is not None, message
+
+
+def test_compile_rules_reuses_validator() -> None:
+    rules = CommitRules(types=("feat",))
+    assert compile_rules(rules) is compile_rules(CommitRules(types=("feat",)))
+
+
+def test_apply_scope_only_fills_missing_scope() -> None:
+    assert apply_scope("feat: add x\n\nbody", "cli") == "feat(cli): add x\n\nbody"
+    assert apply_scope("feat!: drop x", "cli") == "feat(cli)!: drop x"
+    assert apply_scope("feat(git): add x", "cli") == "feat(git): add x"
+    assert apply_scope("add x", "cli") == "add x"
+
+
+def test_commit_message_schema_restricts_types_and_scopes() -> None:
+    schema = commit_message_schema(CommitRules(types=("feat", "fix"), scopes=("cli",)))
+    props = schema["properties"]
+    assert props["type"]["enum"] == ["feat", "fix"]
+    assert props["scope"]["enum"] == ["cli", None]
+    assert set(schema["required"]) == set(props)
+
+
+def test_assemble_commit_message_builds_header_and_body() -> None:
+    assert (
+        assemble_commit_message(
+            {"type": "feat", "scope": "cli", "subject": " add x ", "body": None, "breaking": False}
+        )
+        == "feat(cli): add x"
+    )
+    assert (
+        assemble_commit_message(
+            {
+                "type": "feat",
+                "scope": None,
+                "subject": "drop y",
+                "body": "- why\n",
+                "breaking": True,
+            }
+        )
+        == "feat!: drop y\n\n- why"
+    )
+    # Malformed fields yield an invalid message instead of raising.
+    assert check_commit_message(assemble_commit_message({"subject": 3})) is not None
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from smart_git_commit.singleflight import SingleFlight
+
+
+def _hold(
+    flight: SingleFlight,
+    key: str,
+    release: threading.Event,
+    result: list[str],
+    error: Exception | None = None,
+) -> tuple[threading.Thread, dict[str, object]]:
+    """Run `flight` for `key` in a thread whose producer blocks until `release` is set."""
+
+    entered = threading.Event()
+    out: dict[str, object] = {}
+
+    def _produce() -> list[str]:
+        entered.set()
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    def _target() -> None:
+        try:
+            out["messages"] = flight.run(key, _produce)
+        except Exception as e:  # noqa: BLE001 - surfaced by the test
+            out["error"] = e
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    assert entered.wait(5)
+    return thread, out
+
+
+def test_uncontended_run_produces_and_cleans_up(tmp_path: Path) -> None:
+    flight = SingleFlight(tmp_path)
+    assert flight.run("k", lambda: ["feat: add a"]) == ["feat: add a"]
+    assert not (tmp_path / "k.lock").exists()
+    assert (tmp_path / "k.json").exists()
+    # A later, uncontended run generates again instead of reusing the old result.
+    assert flight.run("k", lambda: ["feat: add b"]) == ["feat: add b"]
+
+
+def test_waiter_reuses_the_holders_result(tmp_path: Path) -> None:
+    flight = SingleFlight(tmp_path, poll_interval_s=0.01)
+    release = threading.Event()
+    thread, out = _hold(flight, "k", release, ["feat: add shared"])
+
+    waits: list[bool] = []
+    threading.Timer(0.1, release.set).start()
+    messages = flight.run(
+        "k", lambda: pytest.fail("waiter must not generate"), on_wait=lambda: waits.append(True)
+    )
+    thread.join(5)
+
+    assert messages == ["feat: add shared"]
+    assert out["messages"] == ["feat: add shared"]
+    assert waits == [True]
+
+
+def test_other_keys_do_not_wait(tmp_path: Path) -> None:
+    flight = SingleFlight(tmp_path, timeout_s=5)
+    release = threading.Event()
+    thread, _ = _hold(flight, "k1", release, ["feat: one"])
+    try:
+        assert flight.run("k2", lambda: ["feat: two"]) == ["feat: two"]
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_waiter_generates_when_the_holder_fails(tmp_path: Path) -> None:
+    flight = SingleFlight(tmp_path, poll_interval_s=0.01)
+    release = threading.Event()
+    thread, out = _hold(flight, "k", release, [], error=RuntimeError("boom"))
+
+    threading.Timer(0.1, release.set).start()
+    assert flight.run("k", lambda: ["feat: add own"]) == ["feat: add own"]
+    thread.join(5)
+    assert isinstance(out["error"], RuntimeError)
+
+
+def test_waiter_times_out_and_generates_independently(tmp_path: Path) -> None:
+    holder = SingleFlight(tmp_path)
+    waiter = SingleFlight(tmp_path, timeout_s=0.1, poll_interval_s=0.01)
+    release = threading.Event()
+    thread, _ = _hold(holder, "k", release, ["feat: slow"])
+    try:
+        assert waiter.run("k", lambda: ["feat: fast"]) == ["feat: fast"]
+    finally:
+        release.set()
+        thread.join(5)
+    # The holder still publishes its own result.
+    assert (tmp_path / "k.json").exists()
+
+
+def test_crashed_holder_releases_the_lock(tmp_path: Path) -> None:
+    script = (
+        "import fcntl, os, sys, time\n"
+        "fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT)\n"
+        "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+        "print('locked', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-c", script, str(tmp_path / "k.lock")],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert proc.stdout is not None and proc.stdout.readline().strip() == "locked"
+        threading.Timer(0.1, proc.kill).start()
+        flight = SingleFlight(tmp_path, timeout_s=5, poll_interval_s=0.01)
+        assert flight.run("k", lambda: ["feat: after crash"]) == ["feat: after crash"]
+    finally:
+        proc.kill()
+        proc.wait()
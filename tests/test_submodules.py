@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from smart_git_commit.git_context import GitContextCollector
+from smart_git_commit.repo import RepoHandle
+from smart_git_commit.submodules import SubmoduleChange, gitlink_changes, summarize_submodules
+
+
+def _git(cwd: Path, *args: str) -> str:
+    proc = subprocess.run(
+        ["git", "-c", "protocol.file.allow=always", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return proc.stdout.strip()
+
+
+def _init(path: Path) -> Path:
+    path.mkdir()
+    _git(path, "init", "-b", "main")
+    _git(path, "config", "user.email", "test@example.com")
+    _git(path, "config", "user.name", "Test")
+    return path
+
+
+def _commit(repo: Path, name: str, message: str) -> str:
+    (repo / name).write_text(message)
+    _git(repo, "add", name)
+    _git(repo, "commit", "-m", message)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+_DIFF = """\
+diff --git a/libs/a b/libs/a
+index 1111111..2222222 160000
+--- a/libs/a
++++ b/libs/a
+@@ -1 +1 @@
+-Subproject commit 1111111111111111111111111111111111111111
++Subproject commit 2222222222222222222222222222222222222222
+diff --git a/README.md b/README.md
+index 3333333..4444444 100644
+--- a/README.md
++++ b/README.md
+@@ -1 +1 @@
+-Subproject commit is just text here
++Subproject commit 5555555 is too
+diff --git a/libs/b b/libs/b
+new file mode 160000
+index 0000000..6666666
+--- /dev/null
++++ b/libs/b
+@@ -0,0 +1 @@
++Subproject commit 6666666666666666666666666666666666666666
+"""
+
+
+def test_gitlink_changes_parses_bumps_and_additions_only() -> None:
+    assert gitlink_changes(_DIFF) == [
+        SubmoduleChange("libs/a", "1" * 40, "2" * 40),
+        SubmoduleChange("libs/b", "", "6" * 40),
+    ]
+
+
+@pytest.fixture()
+def superproject(tmp_path: Path) -> tuple[Path, list[str]]:
+    lib = _init(tmp_path / "lib")
+    _commit(lib, "a.txt", "feat: first")
+    super_repo = _init(tmp_path / "super")
+    for name in ("one", "two"):
+        _git(super_repo, "submodule", "add", str(lib), f"libs/{name}")
+    _git(super_repo, "commit", "-m", "chore: add libs")
+
+    shas = []
+    for name in ("one", "two"):
+        sub = super_repo / "libs" / name
+        _git(sub, "config", "user.email", "test@example.com")
+        _git(sub, "config", "user.name", "Test")
+        shas.append(_commit(sub, "b.txt", f"fix: patch {name}"))
+        _git(super_repo, "add", f"libs/{name}")
+    return super_repo, shas
+
+
+def test_collector_summarizes_bumped_submodules(
+    superproject: tuple[Path, list[str]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    super_repo, shas = superproject
+    monkeypatch.chdir(super_repo)
+    repo = RepoHandle.discover(super_repo)
+
+    ctx = GitContextCollector(repo=repo, submodules=True).collect()
+
+    assert [c.path for c in ctx.submodules] == ["libs/one", "libs/two"]
+    assert [c.new for c in ctx.submodules] == shas
+    assert "fix: patch one" in ctx.submodules[0].summary
+    assert "1 file changed" in ctx.submodules[0].summary
+    assert ctx.submodules[0].describe().startswith("libs/one: ")
+
+    assert GitContextCollector(repo=repo).collect().submodules == ()
+
+
+def test_collector_ignores_diff_submodule_config(
+    superproject: tuple[Path, list[str]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    super_repo, shas = superproject
+    _git(super_repo, "config", "diff.submodule", "log")
+    monkeypatch.chdir(super_repo)
+
+    ctx = GitContextCollector(repo=RepoHandle.discover(super_repo), submodules=True).collect()
+
+    assert [c.new for c in ctx.submodules] == shas
+
+
+def test_summaries_report_missing_checkouts(tmp_path: Path) -> None:
+    changes = [SubmoduleChange("missing", "1" * 40, "2" * 40)]
+    (out,) = summarize_submodules(changes, root=tmp_path)
+    assert out.summary == "(not checked out)"
+
+
+def test_summaries_are_truncated_to_their_share(superproject: tuple[Path, list[str]]) -> None:
+    super_repo, _ = superproject
+    sub = super_repo / "libs" / "one"
+    for i in range(15):
+        _commit(sub, "c.txt", f"feat: change number {i} with a fairly long subject line")
+    head = _git(sub, "rev-parse", "HEAD")
+    first = _git(sub, "rev-list", "--max-parents=0", "HEAD")
+
+    (out,) = summarize_submodules(
+        [SubmoduleChange("libs/one", first, head)], root=super_repo, max_chars=200
+    )
+    assert len(out.summary) <= 200
+    assert out.summary.endswith("[truncated]")
+
+
+def test_summaries_stay_within_the_budget(tmp_path: Path) -> None:
+    changes = [SubmoduleChange(f"missing{i}", "1" * 40, "2" * 40) for i in range(10)]
+    out = summarize_submodules(changes, root=tmp_path, max_chars=250)
+    assert [c.path for c in out] == [c.path for c in changes]
+    assert [c.summary for c in out[:3]] == ["(not checked out)"] * 3
+    assert all(not c.summary for c in out[3:])
+    assert sum(len(c.summary) for c in out) <= 250